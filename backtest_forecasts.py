@@ -0,0 +1,186 @@
+# backtest_forecasts.py
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from src.analytics import NON_CRIME_COLUMNS, CrimeTensor
+from src.forecasting import (ANNUAL_HORIZON, MIN_ANNUAL_POINTS, MONTHLY_FIT_MONTHS, SEASONAL_PERIODS, LinearTrends,
+                             annual_dates, fit_monthly_model, monthly_series_is_fittable, time_index_days)
+from src.monthly_cube import MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE, MonthlyCube
+
+MASTER_FILE = 'master_analytics_data.parquet'
+OUTPUT_FILE = 'backtest_summary.csv'
+ANNUAL_MODELS = ['naive', 'linear']
+MONTHLY_MODELS = ['naive', 'linear', 'ets', 'arima']
+DEFAULTS = {
+    'annual': {'models': ANNUAL_MODELS, 'origins': 5, 'horizon': ANNUAL_HORIZON, 'series_per_task': 2000},
+    'monthly': {'models': ['naive', 'linear', 'ets'], 'origins': 4, 'horizon': 12, 'series_per_task': 50},
+}
+
+# Loaded once per worker process by _init_worker: (N series x T periods) values and observation weights.
+_values = None
+_weights = None
+_x = None
+
+def load_series(data, n_months=None):
+    """
+    Every suburb x offence series of the chosen source as (values, weights, x)
+    arrays. Monthly series are cut to their trailing `n_months` months.
+    """
+    if data == 'annual':
+        crime_tensor = CrimeTensor.from_master(pd.read_parquet(MASTER_FILE))
+        n_suburbs, n_years, n_offences = crime_tensor.counts.shape
+        values = crime_tensor.counts.transpose(0, 2, 1).reshape(-1, n_years)
+        weights = np.repeat(crime_tensor.present, n_offences, axis=0).astype('float64')
+        dates = annual_dates(crime_tensor.years)
+        return values, weights, time_index_days(dates, dates[0])
+
+    cube = MonthlyCube.open(MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE)
+    n_months = min(len(cube.months), n_months or len(cube.months))
+    values = np.asarray(cube.counts[:, :, -n_months:], dtype='float64').reshape(-1, n_months)
+    return values, np.ones_like(values), np.arange(n_months, dtype='float64')
+
+def count_series(data):
+    """Number of suburb x offence series, read from the column schema and the suburb column only."""
+    if data == 'annual':
+        columns = [name for name in pq.read_schema(MASTER_FILE).names if not name.startswith('__')]
+        n_offences = len([col for col in columns if col not in NON_CRIME_COLUMNS])
+        return pd.read_parquet(MASTER_FILE, columns=['Suburb'])['Suburb'].nunique() * n_offences
+    cube = MonthlyCube.open(MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE)
+    return len(cube.suburbs) * len(cube.offences)
+
+def _init_worker(data, n_months):
+    global _values, _weights, _x
+    _values, _weights, _x = load_series(data, n_months)
+
+def _naive(values, weights, origin, horizon, data):
+    """Last observed year (annual) or the same month last year (monthly)."""
+    if data == 'annual':
+        observed = weights[:, :origin] > 0
+        last = origin - 1 - np.argmax(observed[:, ::-1], axis=1)
+        point = values[np.arange(len(values)), last]
+        return np.repeat(point[:, None], horizon, axis=1), observed.sum(axis=1) >= 1
+    steps = origin - SEASONAL_PERIODS + np.arange(horizon) % SEASONAL_PERIODS
+    return values[:, steps], np.full(len(values), origin >= SEASONAL_PERIODS)
+
+def _linear(values, weights, x, origin, horizon):
+    trends = LinearTrends(x[:origin], values[:, :origin], weights[:, :origin])
+    return np.maximum(trends.predict(x[origin:origin + horizon]), 0), trends.n >= MIN_ANNUAL_POINTS
+
+def _statsmodels(model, values, origin, horizon):
+    point = np.full((len(values), horizon), np.nan)
+    for row, series in enumerate(values):
+        train = series[max(0, origin - MONTHLY_FIT_MONTHS):origin]
+        if not monthly_series_is_fittable(train):
+            continue
+        try:
+            point[row] = fit_monthly_model(model, train, horizon=horizon)[0]
+        except Exception:
+            continue
+    return point, ~np.isnan(point).any(axis=1)
+
+def backtest_batch(series_slice, data, models, origins, horizon):
+    """
+    Rolling-origin evaluation of every model on a block of series. Each origin
+    trains on the periods before it and forecasts the next `horizon` periods.
+    Returns per-model error sums, forecast counts and fit seconds.
+    """
+    values, weights = _values[series_slice], _weights[series_slice]
+    n_periods = values.shape[1]
+    origin_positions = [n_periods - horizon - k for k in range(origins - 1, -1, -1)]
+    totals = {model: {'abs_error': 0.0, 'pct_error': 0.0, 'forecasts': 0, 'pct_forecasts': 0, 'fit_seconds': 0.0} for model in models}
+    evaluated = {model: np.zeros(len(values), dtype=bool) for model in models}
+
+    for origin in origin_positions:
+        if origin < 2:
+            continue
+        actual = values[:, origin:origin + horizon]
+        actual_observed = weights[:, origin:origin + horizon] > 0
+        for model in models:
+            start_time = time.perf_counter()
+            if model == 'naive':
+                point, fitted = _naive(values, weights, origin, horizon, data)
+            elif model == 'linear':
+                point, fitted = _linear(values, weights, _x, origin, horizon)
+            else:
+                point, fitted = _statsmodels(model, values, origin, horizon)
+            totals[model]['fit_seconds'] += time.perf_counter() - start_time
+
+            scored = actual_observed & fitted[:, None]
+            errors = np.abs(point - actual)[scored]
+            # MAPE is only defined where incidents occurred.
+            nonzero = scored & (actual > 0)
+            totals[model]['abs_error'] += errors.sum()
+            totals[model]['forecasts'] += errors.size
+            totals[model]['pct_error'] += (np.abs(point - actual)[nonzero] / actual[nonzero]).sum()
+            totals[model]['pct_forecasts'] += int(nonzero.sum())
+            evaluated[model] |= scored.any(axis=1)
+    for model in models:
+        totals[model]['series'] = int(evaluated[model].sum())
+    return totals
+
+def summarize(batch_totals, data):
+    """
+    Combines per-batch sums into one row per model. A model with no scored
+    forecasts gets NaN errors and is listed last rather than ranked best.
+    """
+    rows = []
+    for model in batch_totals[0]:
+        combined = {key: sum(totals[model][key] for totals in batch_totals) for key in batch_totals[0][model]}
+        rows.append({
+            'Data': data, 'Model': model, 'Series': combined['series'], 'Forecasts': combined['forecasts'],
+            'MAE': combined['abs_error'] / combined['forecasts'] if combined['forecasts'] else np.nan,
+            'MAPE (%)': 100 * combined['pct_error'] / combined['pct_forecasts'] if combined['pct_forecasts'] else np.nan,
+            'FitSeconds': combined['fit_seconds'],
+            'PredictionsPerSec': combined['forecasts'] / max(combined['fit_seconds'], 1e-9),
+        })
+    return pd.DataFrame(rows).sort_values('MAE', na_position='last', ignore_index=True)
+
+def run_backtest(data='annual', models=None, origins=None, horizon=None, workers=None, output_path=OUTPUT_FILE):
+    """
+    Rolling-origin backtest of the forecasting models over every suburb x
+    offence series of the annual master data or the monthly cube. Blocks of
+    series are spread across worker processes; fit time is summed over workers.
+    """
+    settings = DEFAULTS[data]
+    models = models or settings['models']
+    origins = origins or settings['origins']
+    horizon = horizon or settings['horizon']
+    workers = workers or os.cpu_count() or 1
+
+    n_series = count_series(data)
+    # Monthly models see at most MONTHLY_FIT_MONTHS of history before the earliest origin.
+    n_months = MONTHLY_FIT_MONTHS + origins - 1 + horizon
+    batch_size = settings['series_per_task']
+    slices = [slice(i, min(i + batch_size, n_series)) for i in range(0, n_series, batch_size)]
+    print(f"--- Backtesting {', '.join(models)} on {n_series} {data} series ({origins} origins, horizon {horizon}) with {workers} worker(s) ---")
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data, n_months)) as executor:
+        batch_totals = list(executor.map(partial(backtest_batch, data=data, models=models, origins=origins, horizon=horizon), slices))
+    summary = summarize(batch_totals, data)
+
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:,.3f}"))
+    summary.to_csv(output_path, index=False)
+    print(f"\n✅ Backtest finished in {time.perf_counter() - start_time:.1f}s. Summary saved to {output_path}.")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecasting models across all suburbs and offences.")
+    parser.add_argument('--data', choices=['annual', 'monthly'], default='annual', help="Annual master data or the monthly cube.")
+    parser.add_argument('--models', nargs='+', choices=MONTHLY_MODELS, help="Models to evaluate (default depends on --data).")
+    parser.add_argument('--origins', type=int, help="Number of rolling forecast origins.")
+    parser.add_argument('--horizon', type=int, help="Periods forecast from each origin.")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores).")
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if args.data == 'annual' and args.models and set(args.models) - set(ANNUAL_MODELS):
+        parser.error(f"Annual series support only: {', '.join(ANNUAL_MODELS)}")
+    run_backtest(data=args.data, models=args.models, origins=args.origins, horizon=args.horizon, workers=args.workers, output_path=args.output)
@@ -0,0 +1,48 @@
+# build_suburb_crosswalk.py
+
+import time
+from pathlib import Path
+
+import pandas as pd
+from src.geodata import BOUNDARIES_FILE, PREMISES_FILE
+from src.name_resolution import CROSSWALK_FILE, build_crosswalk, match_report
+
+PROCESSED_CRIME_FILE = 'crime_data_processed.parquet'
+SEIFA_FILE = 'ABS_ABS_SEIFA2016_SSC_1.0.0.csv' # Optional; included in the report when present
+BOUNDARIES_PATH = BOUNDARIES_FILE
+OUTPUT_FILE = CROSSWALK_FILE
+
+def create_suburb_crosswalk():
+    """
+    Resolves the suburb names of every source (BOCSAR, premises and SEIFA)
+    onto the NSW SAL boundary names once, and saves the crosswalk that the
+    join stages use instead of matching on upper-cased strings.
+    """
+    print("--- Building Suburb Name Crosswalk ---")
+    start_time = time.perf_counter()
+
+    print(f"Loading canonical suburb names from {BOUNDARIES_PATH}...")
+    canonical_names = pd.read_parquet(BOUNDARIES_PATH, columns=['Suburb'])['Suburb'].dropna().unique()
+
+    sources = {'bocsar': pd.read_parquet(PROCESSED_CRIME_FILE, columns=['Suburb'])['Suburb'].astype(str).unique()}
+    sources['premises'] = pd.read_parquet(PREMISES_FILE, columns=['Suburb'])['Suburb'].dropna().astype(str).unique()
+    if Path(SEIFA_FILE).exists():
+        sources['seifa'] = pd.read_csv(SEIFA_FILE, usecols=['State Suburb'])['State Suburb'].unique()
+    print(f"Resolving {sum(len(names) for names in sources.values())} source names against {len(canonical_names)} suburbs...")
+
+    crosswalk, resolver = build_crosswalk(sources, canonical_names)
+    crosswalk.to_parquet(OUTPUT_FILE, compression='zstd', index=False)
+    elapsed = time.perf_counter() - start_time
+
+    print("\n--- Match Report ---")
+    print(match_report(crosswalk).to_string(float_format=lambda value: f"{value:.1%}"))
+    unresolved = len(crosswalk) - (crosswalk['MatchType'] == 'exact').sum()
+    all_pairs = unresolved * len(resolver.keys)
+    print(f"\nFuzzy scoring compared {resolver.comparisons:,} blocked pairs instead of {all_pairs:,} all-pairs comparisons.")
+    unmatched = crosswalk.loc[crosswalk['MatchType'] == 'unmatched', 'SourceName']
+    if not unmatched.empty:
+        print("Sample of unmatched names:", unmatched.head(10).tolist())
+    print(f"\n✅ Success! Crosswalk of {len(crosswalk)} names saved to {OUTPUT_FILE} in {elapsed:.1f}s.")
+
+if __name__ == "__main__":
+    create_suburb_crosswalk()
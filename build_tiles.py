@@ -0,0 +1,98 @@
+# build_tiles.py
+
+import argparse
+import time
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from src.risk_grid import RISK_LAYERS, RiskGrid
+from src.vector_tiles import (RISK_GRID_LAYER, RISK_GRID_TILES_FILE, SUBURB_LAYER, SUBURB_TILES_FILE, TILE_EXTENT,
+                              MBTiles, encode_tile, features_by_tile, tile_size, to_web_mercator)
+
+GEOJSON_FILE = 'nsw_suburbs.json'
+RISK_GRID_FILE = 'risk_grid.parquet'
+SUBURB_ZOOMS = range(5, 13) # The map overzooms the z12 tiles beyond this
+RISK_GRID_ZOOMS = range(10, 15) # ~200m cells are sub-pixel below z10
+
+def write_tileset(path, layer_name, geometries, ids, properties, zooms, metadata, simplify=True):
+    """
+    Cuts Web Mercator geometries into vector tiles for every zoom and stores
+    them in an MBTiles file. With `simplify`, each zoom first drops detail
+    smaller than one tile unit, so low-zoom tiles stay small.
+    """
+    store = MBTiles(path, mode='w')
+    bounds = shapely.bounds(geometries)
+    n_tiles = 0
+    for zoom in zooms:
+        start_time = time.perf_counter()
+        zoom_geometries = shapely.simplify(geometries, tile_size(zoom) / TILE_EXTENT, preserve_topology=True) if simplify else geometries
+        tiles = []
+        for (x, y), positions in features_by_tile(bounds, zoom).items():
+            tile_data = encode_tile(layer_name, zoom_geometries[positions], ids[positions], properties[positions], zoom, x, y)
+            if tile_data is not None:
+                tiles.append((zoom, x, y, tile_data))
+        store.write_tiles(tiles)
+        n_tiles += len(tiles)
+        print(f"  z{zoom}: {len(tiles)} tiles in {time.perf_counter() - start_time:.1f}s")
+
+    store.write_metadata({
+        'name': layer_name, 'format': 'pbf', 'type': 'overlay',
+        'minzoom': str(min(zooms)), 'maxzoom': str(max(zooms)),
+        'json': {'vector_layers': [{'id': layer_name, 'minzoom': min(zooms), 'maxzoom': max(zooms), 'fields': {}}]},
+        **metadata,
+    })
+    store.close()
+    return n_tiles
+
+def create_suburb_tiles(geojson_path=GEOJSON_FILE, output_path=SUBURB_TILES_FILE):
+    """
+    Suburb boundary tiles. Feature IDs are positions in the sorted suburb
+    list stored in the 'feature_ids' metadata entry, which the tile server
+    uses to join crime counts onto each tile.
+    """
+    print(f"--- Building suburb tiles from {geojson_path} ---")
+    suburbs_gdf = gpd.read_file(geojson_path).sort_values('suburb_name', ignore_index=True)
+    geometries = to_web_mercator(suburbs_gdf.geometry.values)
+    ids = np.arange(len(suburbs_gdf))
+    properties = np.array([{'suburb_name': name} for name in suburbs_gdf['suburb_name']], dtype=object)
+    n_tiles = write_tileset(output_path, SUBURB_LAYER, geometries, ids, properties, SUBURB_ZOOMS, {
+        'bounds': ','.join(str(value) for value in suburbs_gdf.total_bounds),
+        'feature_ids': suburbs_gdf['suburb_name'].tolist(),
+    })
+    print(f"\n✅ Success! {n_tiles} suburb tiles saved to {output_path}.")
+
+def create_risk_grid_tiles(risk_grid_path=RISK_GRID_FILE, output_path=RISK_GRID_TILES_FILE):
+    """
+    Risk grid tiles: one square per cell with any crime or venue risk. The
+    feature ID is the grid_id, so any per-cell layer can be joined on later.
+    """
+    print(f"--- Building risk grid tiles from {risk_grid_path} ---")
+    risk_grid = RiskGrid.from_parquet(risk_grid_path)
+    grid_spec = risk_grid.grid_spec
+    has_risk = np.zeros(grid_spec.n_cells, dtype=bool)
+    for layer in RISK_LAYERS:
+        has_risk |= risk_grid.layers[layer].ravel() > 0
+    grid_ids = np.flatnonzero(has_risk)
+    print(f"{len(grid_ids)} of {grid_spec.n_cells} cells carry risk.")
+
+    geometries = to_web_mercator(grid_spec.cell_polygons(grid_ids))
+    properties = np.array([{}] * len(grid_ids), dtype=object)
+    min_lon, min_lat, max_lon, max_lat = grid_spec.cell_bounds(grid_ids)
+    n_tiles = write_tileset(output_path, RISK_GRID_LAYER, geometries, grid_ids, properties, RISK_GRID_ZOOMS, {
+        'bounds': f"{min_lon.min()},{min_lat.min()},{max_lon.max()},{max_lat.max()}",
+    }, simplify=False)
+    print(f"\n✅ Success! {n_tiles} risk grid tiles saved to {output_path}.")
+
+def create_vector_tiles(only=None):
+    """Builds both tilesets, or just 'suburbs' / 'risk_grid'."""
+    if only != 'risk_grid':
+        create_suburb_tiles()
+    if only != 'suburbs':
+        create_risk_grid_tiles()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cut the suburb boundaries and the risk grid into MBTiles vector tiles.")
+    parser.add_argument('--only', choices=['suburbs', 'risk_grid'], help="Build a single tileset.")
+    args = parser.parse_args()
+    create_vector_tiles(only=args.only)
@@ -1,18 +1,55 @@
-import geopandas as gpd
+import json
 
-SHAPEFILE_PATH = "shapefile_source/SAL_2021_AUST_GDA2020.shp"
+import topojson as tp
+from src.geodata import BOUNDARIES_FILE, load_boundaries
+from src.suburb_topology import LOD_MANIFEST_FILE
+
+BOUNDARIES_PATH = BOUNDARIES_FILE
 OUTPUT_GEOJSON_PATH = "nsw_suburbs.json"
+LOD_MANIFEST_PATH = LOD_MANIFEST_FILE
+
+# Level-of-detail TopoJSON files for the Crime Map. Each level is simplified on the
+# shared arcs (so neighbouring suburbs keep a common border) and is used from min_zoom up.
+LOD_LEVELS = [
+    {'file': 'nsw_suburbs_lod0.topojson', 'tolerance': 0.005, 'quantization': 1e5, 'min_zoom': 0},
+    {'file': 'nsw_suburbs_lod1.topojson', 'tolerance': 0.001, 'quantization': 1e6, 'min_zoom': 8},
+    {'file': 'nsw_suburbs_lod2.topojson', 'tolerance': 0.0002, 'quantization': 1e6, 'min_zoom': 11},
+]
+LOD_OUTPUT_PATHS = [LOD_MANIFEST_PATH] + [level['file'] for level in LOD_LEVELS]
+
+def create_topojson_levels(gdf_nsw):
+    """
+    Writes the NSW suburbs as quantized TopoJSON at several simplification
+    levels, plus a manifest the map page uses to pick a level by zoom. The
+    bounding box of each suburb is stored in its properties, so features
+    outside the view can be skipped without decoding their arcs.
+    """
+    print("Building shared-arc topology for the level-of-detail files...")
+    bounds = gdf_nsw.geometry.bounds
+    lod_gdf = gdf_nsw[['suburb_name', 'centroid_lon', 'centroid_lat', 'geometry']].assign(
+        min_lon=bounds['minx'], min_lat=bounds['miny'], max_lon=bounds['maxx'], max_lat=bounds['maxy']
+    )
+    topology = tp.Topology(lod_gdf, prequantize=max(level['quantization'] for level in LOD_LEVELS))
+
+    for level in LOD_LEVELS:
+        print(f"Writing {level['file']} (tolerance {level['tolerance']}, from zoom {level['min_zoom']})...")
+        simplified = topology.toposimplify(level['tolerance']).topoquantize(level['quantization'])
+        with open(level['file'], 'w') as f:
+            f.write(simplified.to_json())
+
+    with open(LOD_MANIFEST_PATH, 'w') as f:
+        json.dump({'levels': [{'file': level['file'], 'min_zoom': level['min_zoom'], 'tolerance': level['tolerance']} for level in LOD_LEVELS]}, f, indent=2)
 
 def create_geojson_with_centroids():
     """
-    Reads the shapefile, filters for NSW, and saves a GeoJSON file
-    that includes pre-calculated centroid coordinates for each suburb.
+    Reads the NSW boundaries prepared by prepare_boundaries.py and saves a
+    GeoJSON file that includes pre-calculated centroid coordinates for each suburb.
     """
-    print(f"Loading shapefile from {SHAPEFILE_PATH}...")
-    gdf = gpd.read_file(SHAPEFILE_PATH)
-    
-    print("Filtering for New South Wales...")
-    gdf_nsw = gdf[gdf['STE_NAME21'] == 'New South Wales'].copy()
+    print(f"Loading NSW boundaries from {BOUNDARIES_PATH}...")
+    gdf_nsw = load_boundaries(BOUNDARIES_PATH, columns=['Suburb'])
+
+    # The LOD files are simplified from the full-resolution boundaries.
+    full_geometry = gdf_nsw.geometry.copy()
 
     print("Simplifying geometries for web performance...")
     gdf_nsw['geometry'] = gdf_nsw['geometry'].simplify(tolerance=0.001)
@@ -23,9 +60,11 @@ def create_geojson_with_centroids():
     gdf_nsw['centroid_lat'] = gdf_nsw.geometry.centroid.y
     # --- END NEW ---
 
-    gdf_nsw.rename(columns={'SAL_NAME21': 'suburb_name'}, inplace=True)
+    gdf_nsw.rename(columns={'Suburb': 'suburb_name'}, inplace=True)
     gdf_nsw['suburb_name'] = gdf_nsw['suburb_name'].str.upper()
 
+    create_topojson_levels(gdf_nsw.set_geometry(full_geometry))
+
     print(f"Saving final data to {OUTPUT_GEOJSON_PATH}...")
     # Save the geometry and the new centroid columns
     final_gdf = gdf_nsw[['suburb_name', 'geometry', 'centroid_lon', 'centroid_lat']]
@@ -2,11 +2,14 @@
 
 import pandas as pd
 import geopandas as gpd
+from src.geodata import BOUNDARIES_FILE, PREMISES_FILE, load_boundaries, load_premises
+from src.instrumentation import step
+from src.name_resolution import CROSSWALK_FILE, load_crosswalk, resolve_suburbs
 
 # --- CONFIGURATION ---
 PROCESSED_CRIME_FILE = 'crime_data_processed.parquet'
-PREMISES_FILE = 'premises-list-as-at-8-february-2021.csv'
-SHAPEFILE_PATH = "shapefile_source/SAL_2021_AUST_GDA2020.shp"
+BOUNDARIES_PATH = BOUNDARIES_FILE
+CROSSWALK_PATH = CROSSWALK_FILE
 OUTPUT_FILE = 'master_analytics_data.parquet'
 
 # Builds the master analytics dataset by merging crime data with geospatially derived venue counts.
@@ -15,60 +18,55 @@ def create_master_dataset():
 
     # --- Part 1: Load and Aggregate Crime Data ---
     print(f"Loading crime data from {PROCESSED_CRIME_FILE}...")
-    raw_crime_dataframe = pd.read_parquet(PROCESSED_CRIME_FILE)
-    raw_crime_dataframe['Year'] = raw_crime_dataframe['Date'].dt.year
-    crime_summary_pivot_dataframe = raw_crime_dataframe.pivot_table(
-        index=['Suburb', 'Year'], columns='OffenceCategory', 
-        values='Incidents', aggfunc='sum'
-    ).fillna(0).reset_index()
-    crime_summary_pivot_dataframe['Suburb_Clean'] = crime_summary_pivot_dataframe['Suburb'].str.upper().str.strip()
+    with step('load_crime') as s:
+        raw_crime_dataframe = pd.read_parquet(PROCESSED_CRIME_FILE)
+        s.rows_out = len(raw_crime_dataframe)
+    with step('pivot_table', rows_in=len(raw_crime_dataframe)) as s:
+        raw_crime_dataframe['Year'] = raw_crime_dataframe['Date'].dt.year
+        crime_summary_pivot_dataframe = raw_crime_dataframe.pivot_table(
+            index=['Suburb', 'Year'], columns='OffenceCategory', 
+            values='Incidents', aggfunc='sum', observed=True
+        ).fillna(0).reset_index()
+        s.rows_out = len(crime_summary_pivot_dataframe)
+    crime_summary_pivot_dataframe['Suburb'] = crime_summary_pivot_dataframe['Suburb'].astype(str)
+    # BOCSAR names are mapped onto the SAL boundary names through the persisted crosswalk.
+    suburb_crosswalk = load_crosswalk(CROSSWALK_PATH)
+    if suburb_crosswalk is None:
+        print(f"⚠️ {CROSSWALK_PATH} not found; joining on upper-cased names. Run build_suburb_crosswalk.py first.")
+    crime_summary_pivot_dataframe['Suburb_Clean'] = resolve_suburbs(crime_summary_pivot_dataframe['Suburb'], 'bocsar', suburb_crosswalk)
 
     # --- Part 2: Prepare Geospatial Data ---
-    print("Loading suburb shapefile for geospatial analysis...")
-    suburb_boundaries_geodataframe = gpd.read_file(SHAPEFILE_PATH)
-    suburb_boundaries_geodataframe = suburb_boundaries_geodataframe[suburb_boundaries_geodataframe['STE_NAME21'] == 'New South Wales'].copy()
-    suburb_boundaries_geodataframe.rename(columns={'SAL_NAME21': 'Suburb'}, inplace=True)
-    suburb_boundaries_geodataframe['Suburb_Clean'] = suburb_boundaries_geodataframe['Suburb'].str.upper().str.strip()
-    suburb_boundaries_geodataframe = suburb_boundaries_geodataframe[['Suburb_Clean', 'geometry']]
+    print(f"Loading NSW suburb boundaries from {BOUNDARIES_PATH}...")
+    with step('load_boundaries') as s:
+        suburb_boundaries_geodataframe = load_boundaries(BOUNDARIES_PATH, columns=['Suburb_Clean'])
+        s.rows_out = len(suburb_boundaries_geodataframe)
 
     # --- Part 3: Load and Prepare Premises Data as Geographic Points ---
+    # Coordinates were cleaned and typed once by prepare_premises.py.
     print(f"Loading Premises data from {PREMISES_FILE}...")
-    raw_premises_dataframe = pd.read_csv(PREMISES_FILE, encoding='latin1', low_memory=False)
-    raw_premises_dataframe.dropna(subset=['Latitude', 'Longitude'], inplace=True)
-
-    # --- THIS IS THE FIX ---
-    # The Latitude/Longitude columns have commas and are not clean numbers.
-    # We must clean them and convert them to a numeric type before using them.
-    print("Cleaning Latitude and Longitude columns to ensure numeric types...")
-    raw_premises_dataframe['Latitude'] = raw_premises_dataframe['Latitude'].astype(str).str.replace(',', '').str.strip()
-    raw_premises_dataframe['Longitude'] = raw_premises_dataframe['Longitude'].astype(str).str.replace(',', '').str.strip()
-    
-    raw_premises_dataframe['Latitude'] = pd.to_numeric(raw_premises_dataframe['Latitude'], errors='coerce')
-    raw_premises_dataframe['Longitude'] = pd.to_numeric(raw_premises_dataframe['Longitude'], errors='coerce')
-    raw_premises_dataframe.dropna(subset=['Latitude', 'Longitude'], inplace=True)
-    # --- END OF FIX ---
-
-    premises_points_geodataframe = gpd.GeoDataFrame(
-        raw_premises_dataframe, 
-        geometry=gpd.points_from_xy(raw_premises_dataframe.Longitude, raw_premises_dataframe.Latitude),
-        crs="EPSG:4326"
-    )
-    premises_points_geodataframe = premises_points_geodataframe.to_crs(suburb_boundaries_geodataframe.crs)
+    with step('load_premises') as s:
+        premises_points_geodataframe = load_premises(PREMISES_FILE, columns=[], crs=suburb_boundaries_geodataframe.crs)
+        s.rows_out = len(premises_points_geodataframe)
 
     # --- Part 4: The Geospatial Join ---
     print("Performing geospatial join...")
-    premises_within_suburb_geodataframe = gpd.sjoin(premises_points_geodataframe, suburb_boundaries_geodataframe, how="inner", predicate='within')
-    venue_counts_per_suburb_dataframe = premises_within_suburb_geodataframe.groupby('Suburb_Clean').size().reset_index(name='VenueCount')
+    with step('sjoin', rows_in=len(premises_points_geodataframe)) as s:
+        premises_within_suburb_geodataframe = gpd.sjoin(premises_points_geodataframe, suburb_boundaries_geodataframe, how="inner", predicate='within')
+        venue_counts_per_suburb_dataframe = premises_within_suburb_geodataframe.groupby('Suburb_Clean').size().reset_index(name='VenueCount')
+        s.rows_out = len(premises_within_suburb_geodataframe)
     print(f"Spatially joined and counted venues for {len(venue_counts_per_suburb_dataframe)} suburbs.")
 
     # --- Part 5: Final Merge ---
     print("Merging crime data with geospatially-derived venue counts...")
-    master_analytics_dataframe = pd.merge(crime_summary_pivot_dataframe, venue_counts_per_suburb_dataframe, on='Suburb_Clean', how='left')
-    master_analytics_dataframe['VenueCount'] = master_analytics_dataframe['VenueCount'].fillna(0).astype(int)
+    with step('merge', rows_in=len(crime_summary_pivot_dataframe)) as s:
+        master_analytics_dataframe = pd.merge(crime_summary_pivot_dataframe, venue_counts_per_suburb_dataframe, on='Suburb_Clean', how='left')
+        master_analytics_dataframe['VenueCount'] = master_analytics_dataframe['VenueCount'].fillna(0).astype(int)
+        s.rows_out = len(master_analytics_dataframe)
     
     print(f"✅ Merge successful! Master dataset created with {len(master_analytics_dataframe['Suburb'].unique())} suburbs.")
     print(f"Saving master dataset to {OUTPUT_FILE}...")
-    master_analytics_dataframe.to_parquet(OUTPUT_FILE)
+    with step('write', rows_in=len(master_analytics_dataframe)):
+        master_analytics_dataframe.to_parquet(OUTPUT_FILE)
 
     print("\n✅ --- Master Analytics File Created Successfully! ---")
     print("Final Fused Data Head:\n", master_analytics_dataframe.head())
@@ -0,0 +1,278 @@
+# generate_synthetic_data.py
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from process_data import INPUT_FILE
+from prepare_boundaries import SHAPEFILE_PATH, STATE_NAME
+from prepare_premises import PREMISES_CSV_FILE
+from src.regions import GREATER_SYDNEY_BOUNDS
+
+# --- CONFIGURATION ---
+OUTPUT_DIR = 'synthetic_data'
+SYNTHETIC_MANIFEST_FILE = 'synthetic_manifest.json'
+N_SUBURBS = 5000
+N_OFFENCES = 60
+N_MONTHS = 360
+N_PREMISES = 17000 # About the size of the real licensed premises list
+FIRST_MONTH = '1995-01'
+SEED = 42
+CSV_CHUNK_SUBURBS = 250 # Suburbs generated and written per block, which bounds memory at full scale
+
+SHAPEFILE_CRS = 'EPSG:7844' # GDA2020, as in the ABS SAL shapefile
+NSW_BOUNDS = (141.0, -37.5, 153.6, -28.2) # (min_lon, min_lat, max_lon, max_lat)
+INTERSTATE_LAT = -37.0 # Cells seeded south of this are labelled Victoria, so the NSW filter has work to do
+SYDNEY_SHARE = 0.6 # Share of suburbs seeded inside Greater Sydney, where the risk grid is built
+MISSING_COUNT_SHARE = 0.002 # Cells BOCSAR reports as '-' instead of a count
+MISSING_COORDINATE_SHARE = 0.01 # Premises listed without coordinates
+
+# --- Name variants the suburb crosswalk has to resolve ---
+STATE_QUALIFIER_SHARE = 0.03 # SAL names qualified as 'Name (NSW)'
+ABBREVIATED_SHARE = 0.5 # Share of 'Mount'/'Saint'/'Port' suburbs BOCSAR lists as 'Mt'/'St'/'Pt'
+ABBREVIATIONS = {'Mount': 'Mt', 'Saint': 'St', 'Port': 'Pt'}
+MISSPELT_SHARE = 0.01 # Premises suburbs with a doubled letter, left to the fuzzy matcher
+
+OFFENCE_CATEGORIES = [
+    'Homicide', 'Assault', 'Sexual offences', 'Abduction and kidnapping', 'Robbery', 'Blackmail and extortion',
+    'Intimidation, stalking and harassment', 'Other offences against the person', 'Theft', 'Arson',
+    'Malicious damage to property', 'Drug offences', 'Prohibited and regulated weapons offences',
+    'Disorderly conduct', 'Betting and gaming offences', 'Liquor offences', 'Pornography offences',
+    'Prostitution offences', 'Against justice procedures', 'Transport regulatory offences', 'Other offences',
+]
+LICENCE_TYPES = ['Liquor - hotel licence', 'Liquor - club licence', 'Liquor - on-premises licence',
+                 'Liquor - packaged liquor licence', 'Liquor - small bar licence', 'Liquor - producer/wholesaler licence']
+STREET_NAMES = ['George', 'Pitt', 'Church', 'King', 'Victoria', 'Railway', 'Station', 'High', 'Park', 'Beach', 'Bridge', 'Market']
+STREET_TYPES = ['St', 'Rd', 'Ave', 'Pde', 'Hwy', 'Lane']
+
+NAME_PREFIXES = ['North', 'South', 'East', 'West', 'Mount', 'Port', 'Lake', 'Saint', 'Upper', 'Lower']
+NAME_STEMS = [
+    'Ash', 'Bel', 'Bran', 'Carl', 'Cran', 'Dun', 'Elm', 'Fair', 'Glen', 'Hazel', 'Kings', 'Lang', 'Marr', 'Nor',
+    'Oak', 'Pen', 'Rose', 'Sand', 'Thorn', 'Wal', 'Wood', 'Bally', 'Coo', 'Kur', 'Mur', 'Nar', 'Wol', 'Yar',
+    'Bur', 'Gun', 'Kal', 'Tum', 'War', 'Bin', 'Mil', 'Cob',
+]
+NAME_ENDINGS = [
+    'field', 'ford', 'ville', 'wood', 'dale', 'ton', 'vale', 'hurst', 'leigh', 'mere', 'brook', 'bury',
+    'gate', 'ridge', 'view', 'worth', 'ong', 'ina', 'arra', 'alla', 'ee', 'ulla', 'abah', 'andra',
+]
+
+def suburb_names(n_suburbs, rng):
+    """
+    Unique, pronounceable suburb names: stem + ending, with a prefix word on
+    some of them. Numbered names ('Ashfield 2') take over past the pool size.
+    """
+    bases = [stem + ending for stem in NAME_STEMS for ending in NAME_ENDINGS]
+    pool = bases + [f"{prefix} {base}" for prefix in NAME_PREFIXES for base in bases]
+    names = list(rng.choice(pool, size=min(n_suburbs, len(pool)), replace=False))
+    names += [f"{pool[i % len(pool)]} {i // len(pool) + 2}" for i in range(len(pool), n_suburbs)]
+    return np.array(names, dtype=object)
+
+def abbreviate(name):
+    """BOCSAR spelling of a SAL name, e.g. 'Mount Kurdale' -> 'Mt Kurdale'."""
+    first, _, rest = name.partition(' ')
+    return f"{ABBREVIATIONS[first]} {rest}" if first in ABBREVIATIONS and rest else name
+
+def misspell(name, rng):
+    """Doubles one letter after the first, e.g. 'KURDALE' -> 'KURDDALE'."""
+    position = int(rng.integers(1, len(name)))
+    return name[:position] + name[position - 1] + name[position:]
+
+def month_headers(n_months, first_month=FIRST_MONTH):
+    """BOCSAR monthly column names ('Jan 1995', 'Feb 1995', ...)."""
+    return pd.period_range(first_month, periods=n_months, freq='M').strftime('%b %Y').tolist()
+
+def offence_taxonomy(n_offences):
+    """(Offence category, Subcategory) pairs, spread round-robin over the BOCSAR categories."""
+    categories = [OFFENCE_CATEGORIES[i % len(OFFENCE_CATEGORIES)] for i in range(n_offences)]
+    return [(category, f"{category} - type {i // len(OFFENCE_CATEGORIES) + 1}") for i, category in enumerate(categories)]
+
+# --- Part 1: Suburb polygons ---
+def suburb_seeds(n_suburbs, rng):
+    """Voronoi seed points: a dense share in Greater Sydney, the rest spread across NSW."""
+    n_sydney = int(n_suburbs * SYDNEY_SHARE)
+    sydney = rng.uniform([GREATER_SYDNEY_BOUNDS['min_lon'], GREATER_SYDNEY_BOUNDS['min_lat']],
+                         [GREATER_SYDNEY_BOUNDS['max_lon'], GREATER_SYDNEY_BOUNDS['max_lat']], size=(n_sydney, 2))
+    statewide = rng.uniform(NSW_BOUNDS[:2], NSW_BOUNDS[2:], size=(n_suburbs - n_sydney, 2))
+    seeds = np.vstack([sydney, statewide])
+    # Voronoi needs distinct seeds; duplicates are vanishingly rare but are nudged apart.
+    _, first = np.unique(seeds.round(6), axis=0, return_index=True)
+    duplicate = np.setdiff1d(np.arange(len(seeds)), first)
+    seeds[duplicate] += rng.uniform(-1e-4, 1e-4, size=(len(duplicate), 2))
+    return seeds
+
+def suburb_polygons(seeds):
+    """One Voronoi cell per seed, in seed order, clipped to the NSW bounding box."""
+    extent = shapely.box(*NSW_BOUNDS)
+    cells = shapely.voronoi_polygons(shapely.multipoints(seeds), extend_to=extent, ordered=True)
+    return shapely.intersection(shapely.get_parts(cells), extent)
+
+def write_shapefile(path, sal_names, polygons, seeds):
+    """SAL-shaped shapefile: SAL_CODE21, SAL_NAME21 and STE_NAME21 in GDA2020."""
+    state = np.where(seeds[:, 1] < INTERSTATE_LAT, 'Victoria', STATE_NAME)
+    suburbs_gdf = gpd.GeoDataFrame({
+        'SAL_CODE21': [str(10000 + i) for i in range(len(sal_names))],
+        'SAL_NAME21': sal_names,
+        'STE_NAME21': state,
+    }, geometry=polygons, crs=SHAPEFILE_CRS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    suburbs_gdf.to_file(path)
+    return state == STATE_NAME
+
+# --- Part 2: BOCSAR wide CSV ---
+def write_crime_csv(path, bocsar_names, suburb_scale, n_offences, n_months, rng):
+    """
+    Monthly counts per (suburb, offence): Poisson draws around a suburb size
+    times an offence rate, with a per-offence linear trend and a seasonal
+    cycle. Most series are sparse, as in the real extract. Suburbs are listed
+    alphabetically, as BOCSAR does, and written in blocks so memory stays
+    bounded at full scale.
+    """
+    taxonomy = offence_taxonomy(n_offences)
+    months = month_headers(n_months)
+    offence_rate = rng.lognormal(mean=-3.0, sigma=1.5, size=n_offences)
+    years = np.arange(n_months) / 12
+    trend = np.clip(1 + np.outer(rng.normal(0, 0.02, size=n_offences), years), 0.1, None)
+    phase = rng.uniform(0, 2 * np.pi, size=(n_offences, 1))
+    season = 1 + 0.2 * np.sin(2 * np.pi * np.arange(n_months) / 12 + phase)
+    offence_profile = offence_rate[:, None] * trend * season # (offences, months)
+
+    n_rows = 0
+    alphabetical = np.argsort(bocsar_names.astype(str), kind='stable')
+    for block_start in range(0, len(bocsar_names), CSV_CHUNK_SUBURBS):
+        block = alphabetical[block_start:block_start + CSV_CHUNK_SUBURBS]
+        rates = suburb_scale[block, None, None] * offence_profile[None, :, :] # (suburbs, offences, months)
+        counts = rng.poisson(rates).reshape(-1, n_months)
+        values = pd.DataFrame(counts, columns=months).astype(object)
+        missing = rng.random(counts.shape) < MISSING_COUNT_SHARE
+        values = values.mask(missing, '-')
+
+        block_names = bocsar_names[block]
+        id_df = pd.DataFrame({
+            'Suburb': np.repeat(block_names, n_offences),
+            'Offence category': [category for category, _ in taxonomy] * len(block_names),
+            'Subcategory': [subcategory for _, subcategory in taxonomy] * len(block_names),
+        })
+        block_df = pd.concat([id_df, values], axis=1)
+        block_df.to_csv(path, mode='w' if block_start == 0 else 'a', header=block_start == 0, index=False)
+        n_rows += len(block_df)
+    return n_rows
+
+# --- Part 3: Licensed premises ---
+def write_premises_csv(path, sal_names, seeds, polygons, suburb_scale, is_nsw, n_premises, rng):
+    """
+    Premises placed near the seed of a suburb drawn in proportion to its size,
+    so busy suburbs have more venues. Suburb names are upper-cased with
+    occasional misspellings, trailing postcodes and stray spaces, and
+    coordinates are text with a few blanks, like the Data.NSW export.
+    """
+    nsw_positions = np.flatnonzero(is_nsw)
+    weights = suburb_scale[nsw_positions] / suburb_scale[nsw_positions].sum()
+    suburb_positions = rng.choice(nsw_positions, size=n_premises, p=weights)
+    # Scatter within about a quarter of the cell's width, which keeps nearly every point inside it.
+    spread = np.sqrt(shapely.area(polygons[suburb_positions])) / 4
+    lon = seeds[suburb_positions, 0] + rng.normal(0, 1, n_premises) * spread / 2
+    lat = seeds[suburb_positions, 1] + rng.normal(0, 1, n_premises) * spread / 2
+
+    postcodes = 2000 + suburb_positions % 900
+    suburbs = pd.Series(sal_names[suburb_positions]).str.replace(' (NSW)', '', regex=False).str.upper()
+    misspelt = rng.random(n_premises) < MISSPELT_SHARE
+    suburbs[misspelt] = [misspell(name, rng) for name in suburbs[misspelt]]
+    with_postcode = rng.random(n_premises) < 0.02
+    suburbs[with_postcode] = suburbs[with_postcode] + ' ' + postcodes[with_postcode].astype(str)
+    padded = rng.random(n_premises) < 0.05
+    suburbs[padded] = suburbs[padded] + '  '
+
+    latitude, longitude = pd.Series(lat.round(6).astype(str)), pd.Series(lon.round(6).astype(str))
+    missing = rng.random(n_premises) < MISSING_COORDINATE_SHARE
+    latitude[missing], longitude[missing] = '', ''
+
+    premises_df = pd.DataFrame({
+        'Licence number': [f"LIQ{6000000000 + i}" for i in range(n_premises)],
+        'Licence name': [f"Venue {i}" for i in range(n_premises)],
+        'Licence type': rng.choice(LICENCE_TYPES, size=n_premises),
+        'Address': [f"{number} {street} {kind}" for number, street, kind in zip(
+            rng.integers(1, 400, n_premises), rng.choice(STREET_NAMES, n_premises), rng.choice(STREET_TYPES, n_premises))],
+        'Suburb': suburbs,
+        'Postcode': postcodes,
+        'Latitude': latitude,
+        'Longitude': longitude,
+    })
+    premises_df.to_csv(path, index=False, encoding='latin1')
+    return len(premises_df)
+
+def generate_synthetic_data(output_dir=OUTPUT_DIR, n_suburbs=N_SUBURBS, n_offences=N_OFFENCES, n_months=N_MONTHS,
+                            n_premises=N_PREMISES, seed=SEED, force=False):
+    """
+    Writes a BOCSAR-shaped wide crime CSV, a licensed premises CSV and a SAL
+    suburb shapefile under `output_dir`, using the file names the pipeline
+    expects, so `run_benchmarks.py` can build and time every stage there
+    without the real downloads. The same arguments always give the same files.
+    """
+    print(f"--- Generating Synthetic Data: {n_suburbs:,} suburbs x {n_offences} offences x {n_months} months ---")
+    output_dir = Path(output_dir)
+    crime_path, premises_path, shapefile_path = output_dir / INPUT_FILE, output_dir / PREMISES_CSV_FILE, output_dir / SHAPEFILE_PATH
+    existing = [path for path in (crime_path, premises_path, shapefile_path) if path.exists()]
+    if existing and not force:
+        print(f"❌ {', '.join(map(str, existing))} already exist. Pass --force to overwrite them.")
+        return None
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+
+    # --- Part 1: Suburbs ---
+    print("Placing suburbs...")
+    names = suburb_names(n_suburbs, rng)
+    seeds = suburb_seeds(n_suburbs, rng)
+    polygons = suburb_polygons(seeds)
+    # Suburb size drives both crime volume and venue counts; heavy-tailed like the real data.
+    suburb_scale = rng.lognormal(mean=0.0, sigma=1.0, size=n_suburbs)
+
+    qualified = rng.random(n_suburbs) < STATE_QUALIFIER_SHARE
+    sal_names = np.where(qualified, names + ' (NSW)', names)
+    abbreviated = rng.random(n_suburbs) < ABBREVIATED_SHARE
+    bocsar_names = np.array([abbreviate(name) if short else name for name, short in zip(names, abbreviated)], dtype=object)
+
+    print(f"Writing suburb boundaries to {shapefile_path}...")
+    is_nsw = write_shapefile(shapefile_path, sal_names, polygons, seeds)
+    print(f"{is_nsw.sum():,} NSW suburbs and {(~is_nsw).sum():,} interstate ones.")
+
+    # --- Part 2: Crime counts (NSW suburbs only, as BOCSAR reports) ---
+    print(f"Writing crime counts to {crime_path}...")
+    n_crime_rows = write_crime_csv(crime_path, bocsar_names[is_nsw], suburb_scale[is_nsw], n_offences, n_months, rng)
+
+    # --- Part 3: Premises ---
+    print(f"Writing {n_premises:,} premises to {premises_path}...")
+    write_premises_csv(premises_path, sal_names, seeds, polygons, suburb_scale, is_nsw, n_premises, rng)
+
+    manifest = {
+        'suburbs': n_suburbs, 'nsw_suburbs': int(is_nsw.sum()), 'offences': n_offences, 'months': n_months,
+        'premises': n_premises, 'seed': seed, 'crime_rows': n_crime_rows,
+        'files': {str(path.relative_to(output_dir)): path.stat().st_size for path in (crime_path, premises_path, shapefile_path)},
+    }
+    with open(output_dir / SYNTHETIC_MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"\n✅ Synthetic data written to {output_dir} in {time.perf_counter() - start_time:.1f}s "
+          f"({manifest['files'][INPUT_FILE] / 1e6:,.0f} MB of crime CSV).")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate BOCSAR-shaped crime, premises and suburb boundary files at a chosen scale.")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--suburbs', type=int, default=N_SUBURBS)
+    parser.add_argument('--offences', type=int, default=N_OFFENCES, help="Offence subcategory rows per suburb.")
+    parser.add_argument('--months', type=int, default=N_MONTHS, help=f"Monthly columns, starting {FIRST_MONTH}.")
+    parser.add_argument('--premises', type=int, default=N_PREMISES)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--force', action='store_true', help="Overwrite existing files in the output directory.")
+    args = parser.parse_args()
+
+    manifest = generate_synthetic_data(args.output_dir, args.suburbs, args.offences, args.months, args.premises, args.seed, args.force)
+    if manifest is None:
+        sys.exit(1)
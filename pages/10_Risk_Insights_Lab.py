@@ -1,91 +1,171 @@
 import streamlit as st
-import pandas as pd
-from geopy.geocoders import Nominatim
 from pathlib import Path
 from datetime import datetime
 import pytz
+import pydeck as pdk
+from src.analytics import get_crime_columns
+from src.geocoder import OfflineGeocoder, geocode_remotely
+from src.geodata import PREMISES_FILE
+from src.profiling import PageProfiler
+from src.risk_grid import RiskGrid, apply_temporal_bonus, load_coverage, offence_risk_layer, risk_band, temporal_risk_factors
+from src.utils import load_master_data, tile_server_url
+from src.vector_tiles import RISK_GRID_LAYER, tile_url
+
+ALL_OFFENCES = "All offences"
+RISK_MAP_LAYERS = {"Base risk": "BaseRisk", "Crime risk": "CrimeRisk", "Venue risk": "VenueRisk"}
 
 # --- Page Config ---
 st.set_page_config(page_title="Risk Engine", page_icon="🛡️", layout="wide")
 
 # --- Data Loading ---
-@st.cache_data
+@st.cache_resource
 def load_risk_grid():
-    """Loads the pre-computed risk grid data."""
+    """Loads the pre-computed risk grid as dense arrays for constant-time cell lookup."""
     project_root = Path(__file__).parent.parent
     data_file_path = project_root / "risk_grid.parquet"
     try:
-        return pd.read_parquet(data_file_path)
+        return RiskGrid.from_parquet(data_file_path)
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource
+def load_geocoder():
+    """Builds the offline geocoder from the suburb GeoJSON and the premises list."""
+    project_root = Path(__file__).parent.parent
+    try:
+        return OfflineGeocoder.from_sources(
+            project_root / "nsw_suburbs.json",
+            project_root / PREMISES_FILE,
+            cache_path=project_root / "geocode_cache.sqlite",
+        )
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource
+def load_coverage_matrix():
+    """Loads the sparse suburb-to-grid coverage matrix saved by precompute_risk.py."""
+    project_root = Path(__file__).parent.parent
+    try:
+        return load_coverage(project_root / "risk_coverage.npz")
     except FileNotFoundError:
         return None
 
+@st.cache_data
+def crime_risk_layer(offence, year_range):
+    """
+    CrimeRisk (0-10) for every grid cell, restricted to one offence category and
+    a range of years: a single sparse matrix-vector product over suburb totals.
+    """
+    coverage, suburb_keys, _ = load_coverage_matrix()
+    master_df = load_master_data()
+    offence_cols = get_crime_columns(master_df) if offence == ALL_OFFENCES else [offence]
+    return offence_risk_layer(master_df, coverage, suburb_keys, offence_cols, year_range)
+
 # --- Main App ---
+profiler = PageProfiler("Risk Insights Lab")
 st.title("🛡️ Live Address-Specific Risk Engine")
 st.write("A decision-support tool to analyze location-based risk, combining historical data with live temporal factors.")
 
 risk_grid = load_risk_grid()
+profiler.lap('load')
 
 if risk_grid is None:
     st.error("Risk grid data not found. Please run `precompute_risk.py` locally first.")
 else:
+    # --- Crime Layer Selection ---
+    coverage_data = load_coverage_matrix()
+    master_df = load_master_data()
+    profiler.lap('load')
+    crime_layer = None
+    if coverage_data is not None and not master_df.empty:
+        st.sidebar.header("🧭 Crime Risk Layer")
+        years = sorted(master_df['Year'].unique())
+        selected_offence = st.sidebar.selectbox("Offence Category:", options=[ALL_OFFENCES] + get_crime_columns(master_df))
+        selected_years = st.sidebar.slider("Years:", min_value=int(min(years)), max_value=int(max(years)), value=(int(min(years)), int(max(years))))
+        crime_layer = crime_risk_layer(selected_offence, selected_years)
+    profiler.lap('compute')
+
+    # --- Risk Map ---
+    # Grid cells are streamed as vector tiles; the tile server colours each cell for
+    # the offence and years selected in the sidebar.
+    st.subheader("🗺️ Risk Map")
+    tiles_url = tile_server_url()
+    if tiles_url is None:
+        st.info("Start the tile server with `python tile_server.py` (after `build_tiles.py`) to map the risk grid.")
+    else:
+        map_layer = st.radio("Map Layer:", options=list(RISK_MAP_LAYERS), horizontal=True)
+        style = {'layer': RISK_MAP_LAYERS[map_layer]}
+        if crime_layer is not None:
+            style.update(offence=selected_offence, start=selected_years[0], end=selected_years[1])
+        risk_layer = pdk.Layer(
+            "MVTLayer",
+            data=tile_url(tiles_url, RISK_GRID_LAYER, **style),
+            min_zoom=10, max_zoom=14, pickable=True,
+            get_fill_color="[properties.r, properties.g, properties.b, 150]",
+        )
+        st.pydeck_chart(pdk.Deck(
+            layers=[risk_layer], map_style="light",
+            initial_view_state=pdk.ViewState(latitude=-33.8688, longitude=151.2093, zoom=11),
+            tooltip={"text": f"{map_layer}: {{value}} / 10"},
+        ))
+    profiler.lap('render')
+
     address_input = st.text_input("Enter a specific address in NSW (e.g., 44 Bridge St, Sydney):", "44 Bridge St, Sydney NSW 2000")
 
+    geocoder = load_geocoder()
+    profiler.lap('load')
+    allow_remote = st.checkbox("Fall back to the online geocoder (Nominatim) if the address is not found locally", value=geocoder is None)
+
     if st.button("Assess Live Risk"):
-        geolocator = Nominatim(user_agent="nsw_crime_risk_app", timeout=10)
         try:
-            location = geolocator.geocode(address_input)
+            if geocoder is not None:
+                location = geocoder.geocode(address_input, allow_remote=allow_remote)
+            else:
+                location = geocode_remotely(address_input) if allow_remote else None
+            profiler.lap('geocode')
             if location:
                 lat, lon = location.latitude, location.longitude
+                if location.source in ('street', 'suburb'):
+                    st.caption(f"Exact address not found locally; using the {location.source}-level location instead.")
                 
-                cell = risk_grid[
-                    (lon >= risk_grid['min_lon']) & (lon < risk_grid['max_lon']) &
-                    (lat >= risk_grid['min_lat']) & (lat < risk_grid['max_lat'])
-                ]
+                cell = risk_grid.score_points(lon, lat, crime_layer=crime_layer).iloc[0]
+                profiler.lap('compute')
 
-                if not cell.empty:
+                if cell['grid_id'] >= 0:
                     # --- Risk Calculation (Final, More Nuanced Model) ---
-                    historical_crime_risk = cell['CrimeRisk'].iloc[0]
-                    venue_proximity_risk = cell['VenueRisk'].iloc[0]
+                    historical_crime_risk = cell['CrimeRisk']
+                    venue_proximity_risk = cell['VenueRisk']
                     
                     sydney_tz = pytz.timezone('Australia/Sydney')
                     now = datetime.now(sydney_tz)
                     st.info(f"Analysis based on current time: **{now.strftime('%A, %I:%M %p')}**")
                     
                     # --- UPGRADED LOGIC: More Granular Temporal Factors ---
-                    temporal_risk_bonus = 0.0
+                    temporal_factors = temporal_risk_factors(now.weekday(), now.hour)
+                    temporal_risk_bonus = float(temporal_factors['bonus'])
                     temporal_reasons = []
-                    
-                    # Define risk periods
-                    is_peak_weekend_night = (now.weekday() in [4, 5]) and (22 <= now.hour or now.hour <= 3) # Fri/Sat 10pm-3am
-                    is_standard_night = (20 <= now.hour or now.hour <= 4) and not is_peak_weekend_night
-                    is_evening_rush = 16 <= now.hour < 19
 
-                    if is_peak_weekend_night:
-                        temporal_risk_bonus += 2.5
+                    if temporal_factors['is_peak_weekend_night']:
                         temporal_reasons.append("It is a **peak weekend night**, a period with the highest historical risk.")
-                    elif is_standard_night:
-                        temporal_risk_bonus += 1.0
+                    elif temporal_factors['is_standard_night']:
                         temporal_reasons.append("It is currently **late night**, a period with an elevated baseline risk.")
                     
-                    if is_evening_rush:
-                        temporal_risk_bonus += 0.5
+                    if temporal_factors['is_evening_rush']:
                         temporal_reasons.append("It is the **evening rush hour**, which can see a slight increase in opportunistic crime.")
 
-                    base_risk = (historical_crime_risk * 0.7) + (venue_proximity_risk * 0.3)
-                    final_risk_score = min(base_risk + temporal_risk_bonus, 10.0)
+                    base_risk = cell['BaseRisk']
+                    final_risk_score = float(apply_temporal_bonus(base_risk, temporal_risk_bonus))
                     # --- END OF UPGRADED LOGIC ---
 
                     # --- Display Results ---
                     st.subheader(f"Live Risk Assessment for: {location.address}")
                     
-                    color = "green"
-                    if final_risk_score > 6.5: color = "red"
-                    elif final_risk_score > 4: color = "orange"
+                    band = str(risk_band(final_risk_score))
                     
                     st.metric(
                         label="Live Risk Score", 
                         value=f"{final_risk_score:.1f} / 10",
-                        delta=f"{'High' if color=='red' else 'Moderate' if color=='orange' else 'Low'} Risk",
+                        delta=f"{band} Risk",
                         delta_color="inverse"
                     )
 
@@ -115,3 +195,6 @@ else:
                 st.error("Could not find the address.")
         except Exception as e:
             st.error(f"An error occurred: {e}")
+        profiler.lap('render')
+
+profiler.finish()
@@ -0,0 +1,60 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from src.profiling import BUFFER, PROFILE_LOG_FILE, latency_summary, load_profile_log
+
+st.set_page_config(page_title="Diagnostics", page_icon="⏱️", layout="wide")
+st.title("⏱️ App Diagnostics")
+st.write("Render timings recorded by every page on each rerun, split into data loading, computation, figure building and rendering (serialization and transfer to the browser).")
+
+SOURCE_MEMORY = "This server process"
+SOURCE_LOG = "Persisted log"
+
+st.sidebar.header("⏱️ Diagnostics")
+sources = [SOURCE_MEMORY] + ([SOURCE_LOG] if PROFILE_LOG_FILE else [])
+source = st.sidebar.radio("Timings from:", options=sources)
+if source == SOURCE_MEMORY:
+    records = BUFFER.frame()
+    st.sidebar.caption(f"Keeps the last {BUFFER.records.maxlen:,} phase records. Set `PAGE_PROFILE_LOG` to also append them to a file.")
+    if st.sidebar.button("Clear timings"):
+        BUFFER.clear()
+        records = BUFFER.frame()
+else:
+    records = load_profile_log()
+    if records is None:
+        records = BUFFER.frame().iloc[0:0]
+
+if records.empty:
+    st.info("No timings recorded yet. Open a few pages and come back.")
+else:
+    pages = sorted(records['page'].unique())
+    selected_pages = st.sidebar.multiselect("Pages:", options=pages, default=pages)
+    records = records[records['page'].isin(selected_pages)]
+    summary = latency_summary(records)
+    totals = summary[summary['phase'] == 'total'].sort_values('p95_ms', ascending=False)
+
+    st.subheader("Latency per Page")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Reruns recorded", f"{records['rerun'].nunique():,}")
+    col2.metric("Slowest page (p95)", totals['page'].iloc[0] if not totals.empty else "–")
+    col3.metric("Its p95 rerun time", f"{totals['p95_ms'].iloc[0]:,.0f} ms" if not totals.empty else "–")
+
+    # Where each page spends its time: the p95 of every phase, stacked per page.
+    phases = summary[summary['phase'] != 'total']
+    phase_chart = px.bar(
+        phases, x='page', y='p95_ms', color='phase', barmode='stack',
+        category_orders={'page': totals['page'].tolist()},
+        labels={'p95_ms': 'p95 latency (ms)', 'page': 'Page', 'phase': 'Phase'},
+        title="p95 Latency by Page and Phase", template='plotly_white'
+    )
+    st.plotly_chart(phase_chart, use_container_width=True)
+
+    st.dataframe(
+        summary.round({'p50_ms': 1, 'p95_ms': 1, 'max_ms': 1, 'p50_kb': 1}),
+        hide_index=True, use_container_width=True
+    )
+
+    st.subheader("Slowest Reruns")
+    reruns = records.pivot_table(index=['rerun', 'page'], columns='phase', values='ms', aggfunc='sum').round(1).reset_index()
+    reruns['time'] = pd.to_datetime(records.groupby('rerun')['ts'].max().reindex(reruns['rerun']).values, unit='s')
+    st.dataframe(reruns.sort_values('total', ascending=False).head(20), hide_index=True, use_container_width=True)
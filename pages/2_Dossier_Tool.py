@@ -1,25 +1,31 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from src.utils import load_master_data
+from src.monthly_cube import rolling_totals
+from src.profiling import PageProfiler
+from src.utils import load_crime_tensor, load_monthly_cube
 
 st.set_page_config(page_title="Dossier Tool", page_icon="🔎", layout="wide")
+profiler = PageProfiler("Dossier Tool")
 st.title("🔎 Crime Dossier Tool")
 st.write("Select a suburb and crime categories to investigate long-term trends.")
 
-master_df = load_master_data()
+crime_tensor = load_crime_tensor()
+monthly_cube = load_monthly_cube()
+profiler.lap('load')
 
-if master_df.empty:
+if crime_tensor is None:
     st.error("Master data file is empty or not found.")
 else:
     st.sidebar.header("🔍 Investigation Filters")
-    suburbs = sorted(master_df['Suburb'].unique())
-    crime_metrics = [col for col in master_df.columns if col not in ['Suburb', 'Year', 'Suburb_Clean', 'Suburb_For_Join', 'geometry', 'Index of Relative Socio-economic Advantage and Disadvantage', 'Index of Economic Resources', 'Index of Education and Occupation', 'VenueCount']]
+    suburbs = list(crime_tensor.suburbs)
+    crime_metrics = crime_tensor.offences
 
     selected_suburb = st.sidebar.selectbox("Select a Suburb", options=suburbs)
     selected_offences = st.sidebar.multiselect("Select Offence Categories to Compare", options=crime_metrics, default=crime_metrics[:2])
 
-    filtered_df = master_df[master_df['Suburb'] == selected_suburb]
+    filtered_df = crime_tensor.suburb_frame(selected_suburb, selected_offences)
+    profiler.lap('compute')
 
     if filtered_df.empty or not selected_offences:
         st.warning(f"No data found for the selected criteria in {selected_suburb}.")
@@ -35,7 +41,44 @@ else:
             labels={'value': 'Number of Incidents', 'Year': 'Year'},
             template='plotly_white', markers=True
         )
+        profiler.lap('figure')
         st.plotly_chart(trend_chart, use_container_width=True)
 
         with st.expander("Show Annual Data for Selection"):
             st.dataframe(filtered_df[['Year', 'Suburb'] + selected_offences])
+        profiler.lap('render', payload=filtered_df)
+
+        st.subheader(f"Monthly Detail in {selected_suburb}")
+        if monthly_cube is None or selected_suburb not in monthly_cube.suburb_index:
+            st.info("Monthly data not available. Run `precompute_monthly_cube.py` to build the monthly cube.")
+        else:
+            monthly_offences = [offence for offence in selected_offences if offence in monthly_cube.offence_index]
+            monthly_df = monthly_cube.suburb_frame(selected_suburb, monthly_offences)
+            show_rolling = st.checkbox("Show 12-month rolling totals", value=False)
+            if show_rolling:
+                monthly_df[monthly_offences] = rolling_totals(monthly_df[monthly_offences].to_numpy().T, 12).T
+            profiler.lap('compute')
+
+            monthly_chart = px.line(
+                monthly_df, x='Date', y=monthly_offences,
+                title=f"{'12-Month Rolling' if show_rolling else 'Monthly'} Incidents in {selected_suburb}",
+                labels={'value': 'Number of Incidents', 'Date': 'Month'},
+                template='plotly_white'
+            )
+            profiler.lap('figure')
+            st.plotly_chart(monthly_chart, use_container_width=True)
+            profiler.lap('render')
+
+            seasonal_df = pd.DataFrame({offence: monthly_cube.seasonal_profile(selected_suburb, offence) for offence in monthly_offences})
+            profiler.lap('compute')
+            seasonal_chart = px.bar(
+                seasonal_df, barmode='group',
+                title=f"Average Incidents by Calendar Month in {selected_suburb}",
+                labels={'value': 'Average Incidents', 'index': 'Month'},
+                template='plotly_white'
+            )
+            profiler.lap('figure')
+            st.plotly_chart(seasonal_chart, use_container_width=True)
+            profiler.lap('render')
+
+profiler.finish()
@@ -1,44 +1,118 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from src.utils import load_master_data, load_geojson_data
+import pydeck as pdk
+from src.profiling import PageProfiler
+from src.suburb_topology import view_bounds
+from src.utils import load_crime_tensor, load_geojson_data, load_suburb_topology, tile_server_url
+from src.vector_tiles import SUBURB_LAYER, tile_url
 
 st.set_page_config(page_title="Geospatial Insights", page_icon="🗺️", layout="wide")
+profiler = PageProfiler("Crime Map")
 st.title("🗺️ Geospatial Insights")
 st.write("Use the filters to explore historical crime patterns across NSW suburbs.")
 
-master_df = load_master_data()
-nsw_geojson = load_geojson_data()
+# Preset map views: (centre, default zoom)
+MAP_VIEWS = {
+    "Greater Sydney": ({"lat": -33.8688, "lon": 151.2093}, 9),
+    "All NSW": ({"lat": -32.5, "lon": 147.0}, 5),
+}
+SUBURB_VIEW = "Focus on a suburb"
+VECTOR_TILES = "Vector tiles"
+GEOJSON = "GeoJSON"
 
-if master_df.empty or nsw_geojson is None:
+@st.cache_data(max_entries=64)
+def view_geojson(zoom, bounds):
+    """Suburb boundaries at the detail level for `zoom`, limited to the features inside `bounds`."""
+    return load_suburb_topology().level_for_zoom(zoom).to_geojson(bounds)
+
+crime_tensor = load_crime_tensor()
+suburb_topology = load_suburb_topology()
+tiles_url = tile_server_url()
+nsw_geojson = load_geojson_data() if suburb_topology is None and tiles_url is None else None
+profiler.lap('load')
+
+if crime_tensor is None or (suburb_topology is None and tiles_url is None and nsw_geojson is None):
     st.error("Could not load necessary data files.")
 else:
     st.sidebar.header("🗺️ Map Filters")
-    crime_metrics = [col for col in master_df.columns if col not in ['Suburb', 'Year', 'Suburb_Clean', 'Suburb_For_Join', 'geometry', 'Index of Relative Socio-economic Advantage and Disadvantage', 'Index of Economic Resources', 'Index of Education and Occupation', 'VenueCount']]
-    years = sorted(master_df['Year'].unique(), reverse=True)
+    crime_metrics = crime_tensor.offences
+    years = sorted(crime_tensor.available_years(), reverse=True)
 
     selected_offence = st.sidebar.selectbox("Select Offence Category:", options=crime_metrics)
     selected_year = st.sidebar.slider("Select Year:", min_value=min(years), max_value=max(years), value=max(years))
 
-    year_df = master_df[master_df['Year'] == selected_year]
-    map_data = year_df[['Suburb', selected_offence]].copy()
+    map_data = crime_tensor.year_frame(selected_year, [selected_offence])
     map_data.rename(columns={selected_offence: 'Incidents'}, inplace=True)
-    map_data['Suburb'] = map_data['Suburb'].str.upper()
+    # Boundaries are named by Suburb_Clean, the crosswalk key fuse_data.py resolved each BOCSAR name to.
+    boundary_data = map_data.groupby('Suburb_Clean', as_index=False)['Incidents'].sum()
+    profiler.lap('compute')
+
+    # With the tile server running, the browser fetches only the visible tiles and the
+    # server joins this selection's counts onto them by suburb ID.
+    renderers = [VECTOR_TILES] if tiles_url else []
+    if suburb_topology is not None or nsw_geojson is not None:
+        renderers.append(GEOJSON)
+    renderer = st.sidebar.radio("Renderer:", options=renderers, horizontal=True) if len(renderers) > 1 else renderers[0]
+
+    center, zoom = MAP_VIEWS["Greater Sydney"]
+    if renderer == VECTOR_TILES or suburb_topology is not None:
+        view_options = list(MAP_VIEWS) + ([SUBURB_VIEW] if suburb_topology is not None else [])
+        selected_view = st.sidebar.selectbox("Map View:", options=view_options)
+        if selected_view == SUBURB_VIEW:
+            focus_suburb = st.sidebar.selectbox("Suburb:", options=sorted(map_data['Suburb']))
+            focus = suburb_topology.centroid(map_data.loc[map_data['Suburb'] == focus_suburb, 'Suburb_Clean'].iloc[0])
+            center, zoom = ({"lat": focus[0], "lon": focus[1]}, 12) if focus else MAP_VIEWS["Greater Sydney"]
+        else:
+            center, zoom = MAP_VIEWS[selected_view]
+        zoom = st.sidebar.slider("Zoom:", min_value=5, max_value=14, value=zoom, key=f"zoom_{selected_view}")
 
     if map_data.empty:
         st.warning("No data found for the selected year and offence category.")
     else:
         st.subheader(f"Hotspots for '{selected_offence}' in {selected_year}")
-        fig = px.choropleth_mapbox(
-            map_data, geojson=nsw_geojson,
-            locations='Suburb', featureidkey="properties.suburb_name",
-            color='Incidents', color_continuous_scale="Viridis",
-            mapbox_style="carto-positron", zoom=9,
-            center={"lat": -33.8688, "lon": 151.2093},
-            opacity=0.6, labels={'Incidents': 'Total Incidents'}
-        )
-        fig.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
-        st.plotly_chart(fig, use_container_width=True)
+        if renderer == VECTOR_TILES:
+            suburb_layer = pdk.Layer(
+                "MVTLayer",
+                data=tile_url(tiles_url, SUBURB_LAYER, offence=selected_offence, year=selected_year),
+                min_zoom=5, max_zoom=12, pickable=True, stroked=True,
+                get_fill_color="[properties.r, properties.g, properties.b, 160]",
+                get_line_color=[255, 255, 255], line_width_min_pixels=0.5,
+            )
+            st.pydeck_chart(pdk.Deck(
+                layers=[suburb_layer], map_style="light",
+                initial_view_state=pdk.ViewState(latitude=center["lat"], longitude=center["lon"], zoom=zoom),
+                tooltip={"text": "{suburb_name}\nTotal Incidents: {value}"},
+            ))
+            profiler.lap('render')
+        else:
+            if suburb_topology is not None:
+                # Only the suburbs in view are sent to the browser, at the detail level for this zoom.
+                bounds = tuple(round(value, 3) for value in view_bounds(center["lat"], center["lon"], zoom))
+                map_geojson = view_geojson(zoom, bounds)
+                in_view = {feature['properties']['suburb_name'] for feature in map_geojson['features']}
+                view_data = boundary_data[boundary_data['Suburb_Clean'].isin(in_view)]
+            else:
+                map_geojson, view_data = nsw_geojson, boundary_data
+            profiler.lap('compute')
+
+            fig = px.choropleth_mapbox(
+                view_data, geojson=map_geojson,
+                locations='Suburb_Clean', featureidkey="properties.suburb_name",
+                color='Incidents', color_continuous_scale="Viridis",
+                range_color=(0, boundary_data['Incidents'].max()),
+                mapbox_style="carto-positron", zoom=zoom,
+                center=center,
+                opacity=0.6, labels={'Incidents': 'Total Incidents'}
+            )
+            fig.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
+            profiler.lap('figure')
+            st.plotly_chart(fig, use_container_width=True)
+            profiler.lap('render')
 
         with st.expander("Show Top 10 Suburbs for this selection"):
-            st.dataframe(map_data.sort_values('Incidents', ascending=False).head(10))
+            top_suburbs = map_data[['Suburb', 'Incidents']].sort_values('Incidents', ascending=False).head(10)
+            st.dataframe(top_suburbs)
+        profiler.lap('render', payload=top_suburbs)
+
+profiler.finish()
@@ -1,32 +1,31 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from src.utils import load_processed_crime_data
+from src.monthly_cube import rolling_totals
+from src.profiling import PageProfiler
+from src.utils import load_keyed_crime_data, load_monthly_cube
 
 st.set_page_config(page_title="Trend Analysis", page_icon="📈", layout="wide")
+profiler = PageProfiler("Trend Analysis")
 st.title("📈 Trend Analysis Dashboard")
 st.write("Analyze historical crime trends over time to identify weekly, seasonal, and long-term patterns.")
 
-crime_df = load_processed_crime_data()
+crime_table = load_keyed_crime_data()
+monthly_cube = load_monthly_cube()
+profiler.lap('load')
 
-if crime_df.empty:
+if crime_table is None or crime_table.long_df.empty:
     st.error("Could not load temporal crime data.")
 else:
-    crime_df['Year'] = crime_df['Date'].dt.year
-    crime_df['Month'] = crime_df['Date'].dt.month_name()
-    crime_df['DayOfWeek'] = crime_df['Date'].dt.day_name()
-
     st.sidebar.header("🗓️ Temporal Filters")
-    suburbs = sorted(crime_df['Suburb'].unique())
-    offence_categories = sorted(crime_df['OffenceCategory'].unique())
+    suburbs = crime_table.suburbs
+    offence_categories = crime_table.offence_categories
 
     selected_suburb = st.sidebar.selectbox("Select a Suburb", options=suburbs)
     selected_offence = st.sidebar.selectbox("Select an Offence Category", options=offence_categories)
 
-    filtered_df = crime_df[
-        (crime_df['Suburb'] == selected_suburb) &
-        (crime_df['OffenceCategory'] == selected_offence)
-    ]
+    filtered_df = crime_table.select(selected_suburb, selected_offence)
+    profiler.lap('compute')
 
     if filtered_df.empty:
         st.warning(f"No '{selected_offence}' data found for {selected_suburb}.")
@@ -39,17 +38,51 @@ else:
             st.subheader("Incidents by Day of the Week")
             day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
             day_df = filtered_df.groupby('DayOfWeek')['Incidents'].sum().reindex(day_order).reset_index()
+            profiler.lap('compute')
             fig_day = px.bar(day_df, x='DayOfWeek', y='Incidents', title="Weekly Crime Rhythm")
+            profiler.lap('figure')
             st.plotly_chart(fig_day, use_container_width=True)
+            profiler.lap('render')
 
         with col2:
             st.subheader("Incidents by Month")
             month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
             month_df = filtered_df.groupby('Month')['Incidents'].sum().reindex(month_order).reset_index()
+            profiler.lap('compute')
             fig_month = px.bar(month_df, x='Month', y='Incidents', title="Seasonal Crime Variation")
+            profiler.lap('figure')
             st.plotly_chart(fig_month, use_container_width=True)
+            profiler.lap('render')
 
         st.subheader("Long-Term Trend by Year")
         year_df = filtered_df.groupby('Year')['Incidents'].sum().reset_index()
+        profiler.lap('compute')
         fig_year = px.line(year_df, x='Year', y='Incidents', title="Annual Trend", markers=True)
+        profiler.lap('figure')
         st.plotly_chart(fig_year, use_container_width=True)
+        profiler.lap('render')
+
+        st.subheader("Compare Suburbs Month by Month")
+        if monthly_cube is None or selected_offence not in monthly_cube.offence_index:
+            st.info("Monthly data not available. Run `precompute_monthly_cube.py` to build the monthly cube.")
+        else:
+            compare_suburbs = st.multiselect(
+                "Compare with other suburbs",
+                options=[suburb for suburb in monthly_cube.suburbs if suburb != selected_suburb],
+                max_selections=5
+            )
+            window = st.slider("Rolling window (months)", min_value=1, max_value=24, value=12)
+            compare_df = monthly_cube.offence_frame(selected_offence, [selected_suburb] + compare_suburbs)
+            suburb_cols = list(compare_df.columns[1:])
+            compare_df[suburb_cols] = rolling_totals(compare_df[suburb_cols].to_numpy().T, window).T
+            profiler.lap('compute')
+            fig_compare = px.line(
+                compare_df, x='Date', y=suburb_cols,
+                title=f"{window}-Month Rolling {selected_offence} Incidents",
+                labels={'value': 'Incidents', 'Date': 'Month', 'variable': 'Suburb'}
+            )
+            profiler.lap('figure')
+            st.plotly_chart(fig_compare, use_container_width=True)
+            profiler.lap('render')
+
+profiler.finish()
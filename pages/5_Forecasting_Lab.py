@@ -1,51 +1,76 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
-from src.utils import load_master_data
+from src.forecasting import MODEL_LABELS, annual_dates
+from src.profiling import PageProfiler
+from src.utils import load_crime_tensor, load_forecasts, load_monthly_cube
 
 st.set_page_config(page_title="Forecasting Lab", page_icon="🔮", layout="wide")
+profiler = PageProfiler("Forecasting Lab")
 st.title("🔮 Trend Forecasting Lab")
-st.write("This tool uses a simple linear regression model to forecast potential future trends based on historical data. This is for analytical purposes and is not a guarantee of future outcomes.")
+st.write("This tool shows precomputed forecasts of potential future trends based on historical data: a linear trend on annual totals, and seasonal models on monthly counts. This is for analytical purposes and is not a guarantee of future outcomes.")
 
-master_df = load_master_data()
+crime_tensor = load_crime_tensor()
+forecasts = load_forecasts()
+monthly_cube = load_monthly_cube()
+profiler.lap('load')
 
-if master_df.empty:
+if crime_tensor is None:
     st.error("Master data file is empty or not found.")
+elif forecasts is None:
+    st.error("Forecast store not found. Please run `precompute_forecasts.py` after `fuse_data.py`.")
 else:
     st.sidebar.header("🔬 Forecasting Parameters")
-    suburbs = sorted(master_df['Suburb'].unique())
-    crime_metrics = [col for col in master_df.columns if col not in ['Suburb', 'Year', 'Suburb_Clean', 'Suburb_For_Join', 'geometry', 'Index of Relative Socio-economic Advantage and Disadvantage', 'Index of Economic Resources', 'Index of Education and Occupation', 'VenueCount']]
+    suburbs = list(crime_tensor.suburbs)
+    crime_metrics = crime_tensor.offences
+    models = [model for model in MODEL_LABELS if model in forecasts['Model'].cat.categories]
+    if monthly_cube is None and any(model != 'linear' for model in models):
+        # Monthly forecasts are plotted against the cube's history, so they need it too.
+        models = [model for model in models if model == 'linear']
+        st.sidebar.info("Monthly models are hidden: run `precompute_monthly_cube.py` to build the monthly cube.")
 
     selected_suburb = st.sidebar.selectbox("Select a Suburb to Forecast:", options=suburbs)
     selected_offence = st.sidebar.selectbox("Select an Offence Category to Forecast:", options=crime_metrics)
+    selected_model = st.sidebar.selectbox("Select a Model:", options=models, format_func=MODEL_LABELS.get)
 
     st.header(f"Forecast for '{selected_offence}' in {selected_suburb}")
 
-    time_series_df = master_df[['Year', 'Suburb', selected_offence]].copy()
-    time_series_df = time_series_df[time_series_df['Suburb'] == selected_suburb]
-    time_series_df['Date'] = pd.to_datetime(time_series_df['Year'].astype(str) + '-12-31')
+    series_key = (selected_suburb, selected_offence)
+    series_df = forecasts.loc[[series_key]] if series_key in forecasts.index else forecasts.iloc[0:0]
+    series_df = series_df[series_df['Model'] == selected_model]
+    profiler.lap('compute')
 
-    if len(time_series_df) < 3:
-        st.warning("Not enough historical data points (<3 years) to create a reliable forecast.")
+    if series_df.empty:
+        st.warning("Not enough historical data points to create a reliable forecast for this selection.")
     else:
-        time_series_df['TimeIndex'] = (time_series_df['Date'] - time_series_df['Date'].min()).dt.days
-        
-        X_train = time_series_df[['TimeIndex']]
-        y_train = time_series_df[selected_offence]
+        if selected_model == 'linear':
+            history_df = crime_tensor.suburb_frame(selected_suburb, [selected_offence])
+            history_dates, history_values = annual_dates(history_df['Year']), history_df[selected_offence]
+            horizon_label = 'Forecast (3 Years)'
+        else:
+            history = monthly_cube.series(selected_suburb, selected_offence)
+            history_dates, history_values = history.index, history.to_numpy()
+            horizon_label = 'Forecast (24 Months)'
 
-        model = LinearRegression()
-        model.fit(X_train, y_train)
-
-        last_date = time_series_df['Date'].max()
-        future_dates = pd.date_range(start=last_date + pd.DateOffset(years=1), periods=3, freq='A-DEC')
-        future_time_index = (future_dates - time_series_df['Date'].min()).days.values.reshape(-1, 1)
-        future_predictions = model.predict(future_time_index)
-        future_predictions[future_predictions < 0] = 0
+        fitted_df = series_df[series_df['Kind'] == 'fitted']
+        forecast_df = series_df[series_df['Kind'] == 'forecast']
+        profiler.lap('compute')
 
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=time_series_df['Date'], y=y_train, mode='lines+markers', name='Historical Incidents'))
-        fig.add_trace(go.Scatter(x=time_series_df['Date'], y=model.predict(X_train), mode='lines', name='Learned Trend', line={'dash': 'dot'}))
-        fig.add_trace(go.Scatter(x=future_dates, y=future_predictions, mode='lines+markers', name='Forecast (3 Years)', line={'color': 'red'}))
-        
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        fig.add_trace(go.Scatter(x=history_dates, y=history_values, mode='lines+markers', name='Historical Incidents'))
+        if not fitted_df.empty:
+            fig.add_trace(go.Scatter(x=fitted_df['Date'], y=fitted_df['Value'], mode='lines', name='Learned Trend', line={'dash': 'dot'}))
+        fig.add_trace(go.Scatter(x=forecast_df['Date'], y=forecast_df['Upper'], mode='lines', line={'width': 0}, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=forecast_df['Date'], y=forecast_df['Lower'], mode='lines', line={'width': 0}, fill='tonexty', fillcolor='rgba(255, 0, 0, 0.15)', name='95% Interval'))
+        fig.add_trace(go.Scatter(x=forecast_df['Date'], y=forecast_df['Value'], mode='lines+markers', name=horizon_label, line={'color': 'red'}))
+
+        profiler.lap('figure')
+        st.plotly_chart(fig, use_container_width=True)
+
+        export_df = forecast_df.reset_index()[['Suburb', 'Offence', 'Model', 'Date', 'Value', 'Lower', 'Upper']]
+        st.download_button(
+            "Download Forecast (CSV)", export_df.to_csv(index=False),
+            file_name=f"forecast_{selected_suburb}_{selected_offence}_{selected_model}.csv".replace(' ', '_'), mime='text/csv'
+        )
+        profiler.lap('render', payload=export_df)
+
+profiler.finish()
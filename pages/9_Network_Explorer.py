@@ -3,75 +3,87 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import networkx as nx
-from src.utils import load_master_data
+from src.crime_network import ALL_YEARS
+from src.profiling import PageProfiler
+from src.utils import load_crime_network
 
 st.set_page_config(page_title="Network Explorer", page_icon="🕸️", layout="wide")
+profiler = PageProfiler("Network Explorer")
 st.title("🕸️ Crime Network Explorer")
 st.write("Discover hidden relationships between different types of crime. This tool uses a force-directed layout to visualize which offences tend to occur together.")
 
-master_df = load_master_data()
+crime_network = load_crime_network()
+profiler.lap('load')
 
-if master_df.empty:
-    st.error("Master data file not found.")
+if crime_network is None:
+    st.error("Crime network not found. Please run `precompute_crime_network.py` after `fuse_data.py`.")
 else:
     st.sidebar.header("🕸️ Network Controls")
-    
-    crime_cols = [col for col in master_df.columns if col not in ['Suburb', 'Year', 'Suburb_Clean', 'Suburb_For_Join', 'geometry', 'Index of Relative Socio-economic Advantage and Disadvantage', 'Index of Economic Resources', 'Index of Education and Occupation', 'VenueCount']]
-    
-    selected_crime = st.sidebar.selectbox("Select a Central Crime to Analyze:", options=crime_cols, index=crime_cols.index('Theft') if 'Theft' in crime_cols else 0)
-    correlation_threshold = st.sidebar.slider("Correlation Strength Threshold:", 0.1, 1.0, 0.3, 0.05, help="Only show connections stronger than this value.")
 
-    st.header(f"Network of Crimes Related to '{selected_crime}'")
+    selected_year = st.sidebar.selectbox("Period:", options=[ALL_YEARS] + crime_network.years, format_func=lambda year: "All years" if year == ALL_YEARS else str(year))
+    selected_region = st.sidebar.selectbox("Region:", options=crime_network.regions)
+    thresholds = crime_network.thresholds
+    correlation_threshold = st.sidebar.select_slider("Correlation Strength Threshold:", options=thresholds, value=0.3 if 0.3 in thresholds else thresholds[0], help="Only show connections stronger than this value.")
 
-    correlation_matrix = master_df[crime_cols].corr()
-    related_crimes = correlation_matrix[selected_crime]
-    strong_correlations = related_crimes[abs(related_crimes) > correlation_threshold].drop(selected_crime, errors='ignore')
+    G = crime_network.graph(selected_year, selected_region, correlation_threshold)
+    layout = crime_network.layout(selected_year, selected_region, correlation_threshold)
+    crime_cols = sorted(G.nodes())
+    profiler.lap('compute')
 
-    if strong_correlations.empty:
-        st.warning(f"No strong correlations found for '{selected_crime}' at the selected threshold.")
+    if not crime_cols or layout is None:
+        st.warning("No correlations above the selected threshold for this period and region.")
     else:
-        G = nx.Graph()
-        G.add_node(selected_crime)
-        for crime, corr_value in strong_correlations.items():
-            G.add_node(crime)
-            G.add_edge(selected_crime, crime, weight=abs(corr_value))
-
-        pos = nx.spring_layout(G, k=0.8, iterations=50)
+        view = st.sidebar.radio("View:", options=["Neighbourhood of one crime", "Full network"])
+        if view == "Full network":
+            selected_crime = None
+            subgraph = G
+            st.header("Crime Co-occurrence Network")
+        else:
+            selected_crime = st.sidebar.selectbox("Select a Central Crime to Analyze:", options=crime_cols, index=crime_cols.index('Theft') if 'Theft' in crime_cols else 0)
+            hops = st.sidebar.slider("Neighbourhood Depth (hops):", 1, 3, 1, help="1 shows direct links only; 2 and 3 also show the crimes linked to those.")
+            subgraph = nx.ego_graph(G, selected_crime, radius=hops)
+            st.header(f"Network of Crimes Related to '{selected_crime}'")
 
+        # Positions and communities come from the cached layout of the whole graph at this threshold.
         edge_x, edge_y = [], []
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
+        for source, target in subgraph.edges():
+            edge_x.extend([layout.at[source, 'X'], layout.at[target, 'X'], None])
+            edge_y.extend([layout.at[source, 'Y'], layout.at[target, 'Y'], None])
 
-        node_x, node_y, node_text = [], [], []
-        for node in G.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-            node_text.append(node)
+        nodes = list(subgraph.nodes())
+        node_layout = layout.loc[nodes]
+        profiler.lap('compute')
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=edge_x, y=edge_y, mode='lines', line=dict(width=0.7, color='#888'), hoverinfo='none'))
         fig.add_trace(go.Scatter(
-            x=node_x, y=node_y, mode='markers+text', text=node_text,
+            x=node_layout['X'], y=node_layout['Y'], mode='markers+text', text=nodes,
             textposition="bottom center", hoverinfo='text',
+            hovertext=[f"{node} (cluster {community + 1})" for node, community in zip(nodes, node_layout['Community'])],
             marker=dict(
-                showscale=True, colorscale='YlGnBu', size=25,
-                color=[1] + list(strong_correlations.values),
-                colorbar=dict(thickness=15, title=dict(text='Correlation Strength', side='right')),
+                showscale=True, colorscale='Turbo', size=[35 if node == selected_crime else 25 for node in nodes],
+                color=node_layout['Community'],
+                colorbar=dict(thickness=15, title=dict(text='Community Cluster', side='right')),
                 line_width=2
             )
         ))
         fig.update_layout(
-            title=f"Crimes strongly correlated with '{selected_crime}'",
+            title=f"Crimes strongly correlated with '{selected_crime}'" if selected_crime else "Community clusters of co-occurring crimes",
             showlegend=False, hovermode='closest',
             margin=dict(b=20,l=5,r=5,t=40),
             xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
             yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
         )
+        profiler.lap('figure')
         st.plotly_chart(fig, use_container_width=True)
+        profiler.lap('render')
 
         with st.expander("Show Correlation Data"):
-            st.dataframe(strong_correlations.sort_values(ascending=False))
+            edge_df = pd.DataFrame(
+                [(source, target, data['correlation']) for source, target, data in subgraph.edges(data=True)],
+                columns=['Offence A', 'Offence B', 'Correlation']
+            )
+            st.dataframe(edge_df.sort_values('Correlation', key=abs, ascending=False), hide_index=True)
+        profiler.lap('render', payload=edge_df)
+
+profiler.finish()
@@ -0,0 +1,82 @@
+# pipeline_report.py
+
+import argparse
+import sys
+
+import pandas as pd
+from src.instrumentation import HISTORY_FILE, METRICS, REGRESSION_THRESHOLD, compare_runs, load_history
+
+def format_change(value):
+    return '' if pd.isna(value) else f"{value:+.0%}"
+
+def print_run_summary(runs, last=10):
+    """One line per recent run: when, how long, and which stages ran."""
+    rows = [{'run_id': run['run_id'], 'status': run.get('status'), 'wall_s': run.get('wall_s'),
+             'stages_run': len(run.get('stages', [])), 'skipped': len(run.get('skipped', [])),
+             'failed_stage': run.get('failed_stage') or ''} for run in runs[-last:]]
+    print(pd.DataFrame(rows).to_string(index=False))
+
+def create_pipeline_report(history_path=HISTORY_FILE, baseline_runs=5, threshold=REGRESSION_THRESHOLD, stage=None):
+    """
+    Prints every step of the latest pipeline run next to its median over
+    earlier runs and flags the metrics that regressed. Returns the number of
+    regressed steps.
+    """
+    runs = load_history(history_path)
+    if not runs:
+        print(f"❌ No runs recorded in {history_path}. Run `python run_pipeline.py` first.")
+        return 0
+
+    latest = runs[-1]
+    print(f"--- Pipeline run {latest['run_id']} ({latest.get('status')}, {latest.get('wall_s', 0):.1f}s) "
+          f"vs. up to {baseline_runs} earlier runs ---")
+    report = compare_runs(runs, baseline_runs=baseline_runs, threshold=threshold)
+    if stage:
+        report = report[report['stage'].isin(stage)]
+    if report.empty:
+        print("The latest run executed no instrumented steps.")
+        return 0
+
+    table = pd.DataFrame({
+        'stage': report['stage'],
+        'step': ['  ' * int(depth) + name for depth, name in zip(report['depth'], report['step'])],
+        'wall_s': report['wall_s'].round(2),
+        'Δwall': report['wall_s_change'].map(format_change),
+        'cpu_s': report['cpu_s'].round(2),
+        'Δcpu': report['cpu_s_change'].map(format_change),
+        'peak_mb': report['peak_rss_mb'].round(0),
+        'Δpeak': report['peak_rss_mb_change'].map(format_change),
+        'rows_in': report['rows_in'].astype('Int64'),
+        'rows_out': report['rows_out'].astype('Int64'),
+        '': report['regressed'].map({True: '⚠️', False: ''}),
+    })
+    print(table.to_string(index=False))
+
+    regressed = report[report['regressed']]
+    if regressed.empty:
+        print(f"\n✅ No regressions beyond {threshold:.0%} of the baseline.")
+    else:
+        print(f"\n⚠️ {len(regressed)} step(s) regressed by more than {threshold:.0%}:")
+        for _, row in regressed.iterrows():
+            changes = ', '.join(f"{metric} {row[metric]:,.2f} vs {row[f'{metric}_baseline']:,.2f}" for metric in METRICS if row[f'{metric}_regressed'])
+            # Input growth explains a slowdown better than a code change does.
+            if pd.notna(row['rows_in_baseline']) and pd.notna(row['rows_in']) and row['rows_in'] != row['rows_in_baseline']:
+                changes += f" (rows_in {row['rows_in_baseline']:,.0f} -> {row['rows_in']:,.0f})"
+            print(f"  {row['stage']} / {row['step']}: {changes}")
+
+    print("\nRecent runs:")
+    print_run_summary(runs)
+    return len(regressed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the latest pipeline run with earlier runs and flag performance regressions.")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--baseline-runs', type=int, default=5, help="Earlier successful runs of each step to take the median over.")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help="Relative increase that counts as a regression.")
+    parser.add_argument('--stage', nargs='+', help="Only report these stages.")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 if any step regressed.")
+    args = parser.parse_args()
+
+    n_regressed = create_pipeline_report(args.history, args.baseline_runs, args.threshold, args.stage)
+    if args.fail_on_regression and n_regressed:
+        sys.exit(1)
@@ -0,0 +1,32 @@
+# precompute_anomalies.py
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.anomalies import compute_anomaly_scores
+
+MASTER_FILE = 'master_analytics_data.parquet'
+OUTPUT_FILE = 'anomaly_scores.parquet'
+ROW_GROUP_ROWS = 100_000
+
+def create_anomaly_store():
+    """
+    Precomputes rolling-baseline z-scores for every suburb, offence, target year
+    and baseline length (1-10 years). The anomaly pages and Mission Control
+    then only filter this table when a widget changes.
+    """
+    print("--- Building Anomaly Score Store ---")
+    print(f"Loading master data from {MASTER_FILE}...")
+    master_df = pd.read_parquet(MASTER_FILE)
+
+    print("Computing baseline statistics for every year and baseline length...")
+    scores = compute_anomaly_scores(master_df)
+
+    print(f"Saving {len(scores)} candidate anomalies to {OUTPUT_FILE}...")
+    # Sorted by (Year, Baseline), so row-group statistics also let filtered reads skip groups.
+    pq.write_table(pa.Table.from_pandas(scores, preserve_index=False), OUTPUT_FILE, row_group_size=ROW_GROUP_ROWS, compression='zstd')
+
+    print(f"\n✅ Success! Anomaly store saved to {OUTPUT_FILE}.")
+
+if __name__ == "__main__":
+    create_anomaly_store()
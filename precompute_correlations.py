@@ -0,0 +1,31 @@
+# precompute_correlations.py
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.analytics import CrimeTensor
+from src.correlations import compute_correlation_store
+
+MASTER_FILE = 'master_analytics_data.parquet'
+OUTPUT_FILE = 'correlations.parquet'
+
+def create_correlation_store():
+    """
+    Precomputes the socio-economic x crime correlation matrix, OLS fit and top
+    residual outliers for every year. The Correlation Lab and Mission Control
+    then only look up rows of this table.
+    """
+    print("--- Building Correlation Store ---")
+    print(f"Loading master data from {MASTER_FILE}...")
+    crime_tensor = CrimeTensor.from_master(pd.read_parquet(MASTER_FILE))
+
+    print("Computing correlations, regression lines and outliers for every year...")
+    store = compute_correlation_store(crime_tensor)
+
+    print(f"Saving {len(store)} factor/offence/year rows to {OUTPUT_FILE}...")
+    pq.write_table(pa.Table.from_pandas(store, preserve_index=False), OUTPUT_FILE, compression='zstd')
+
+    print(f"\n✅ Success! Correlation store saved to {OUTPUT_FILE}.")
+
+if __name__ == "__main__":
+    create_correlation_store()
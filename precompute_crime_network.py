@@ -0,0 +1,44 @@
+# precompute_crime_network.py
+
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.analytics import CrimeTensor
+from src.crime_network import compute_crime_network
+from src.regions import suburb_regions
+
+MASTER_FILE = 'master_analytics_data.parquet'
+GEOJSON_FILE = 'nsw_suburbs.json'
+EDGES_FILE = 'crime_network_edges.parquet'
+LAYOUTS_FILE = 'crime_network_layouts.parquet'
+
+def create_crime_network():
+    """
+    Precomputes the offence co-occurrence graph for all years and for each
+    year, across NSW and per region, as sparse edge lists. Layouts and
+    community clusters are computed once per graph and threshold, so the
+    Network Explorer never recomputes correlations or layouts.
+    """
+    print("--- Building Crime Co-occurrence Network ---")
+    print(f"Loading master data from {MASTER_FILE}...")
+    crime_tensor = CrimeTensor.from_master(pd.read_parquet(MASTER_FILE))
+
+    print(f"Assigning suburbs to regions from {GEOJSON_FILE}...")
+    regions = suburb_regions(GEOJSON_FILE, crime_tensor.suburbs)
+    print(f"{pd.notna(regions).sum()} of {len(regions)} suburbs matched to a region.")
+
+    print("Computing correlation edges, layouts and communities...")
+    start_time = time.perf_counter()
+    edges, layouts = compute_crime_network(crime_tensor, regions)
+    print(f"Built {layouts.groupby(['Year', 'Region', 'Threshold'], observed=True).ngroups} graph layouts in {time.perf_counter() - start_time:.1f}s.")
+
+    print(f"Saving {len(edges)} edges to {EDGES_FILE} and {len(layouts)} node positions to {LAYOUTS_FILE}...")
+    pq.write_table(pa.Table.from_pandas(edges, preserve_index=False), EDGES_FILE, compression='zstd')
+    pq.write_table(pa.Table.from_pandas(layouts, preserve_index=False), LAYOUTS_FILE, compression='zstd')
+
+    print("\n✅ Success! Crime network saved.")
+
+if __name__ == "__main__":
+    create_crime_network()
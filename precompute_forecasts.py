@@ -0,0 +1,108 @@
+# precompute_forecasts.py
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.analytics import CrimeTensor
+from src.forecasting import (FORECAST_COLUMNS, MONTHLY_FIT_MONTHS, MONTHLY_HORIZON, MONTHLY_MODELS,
+                             fit_monthly_model, linear_forecasts, monthly_series_is_fittable)
+from src.monthly_cube import MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE, MonthlyCube
+
+MASTER_FILE = 'master_analytics_data.parquet'
+OUTPUT_FILE = 'forecasts.parquet'
+DEFAULT_MODELS = ['linear', 'ets']
+SERIES_PER_TASK = 200
+ROW_GROUP_ROWS = 250_000
+
+# Opened once per worker process by _init_worker; the memmap pages are shared through the OS cache.
+_monthly_cube = None
+
+def _init_worker():
+    global _monthly_cube
+    _monthly_cube = MonthlyCube.open(MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE)
+
+def fit_monthly_batch(series_keys, models):
+    """Fits the monthly models to a batch of (suburb, offence) positions in the cube."""
+    cube = _monthly_cube
+    future_dates = pd.date_range(cube.months[-1] + pd.DateOffset(months=1), periods=MONTHLY_HORIZON, freq='MS')
+    frames = []
+    for suburb_pos, offence_pos in series_keys:
+        values = np.asarray(cube.counts[suburb_pos, offence_pos, -MONTHLY_FIT_MONTHS:])
+        if not monthly_series_is_fittable(values):
+            continue
+        for model in models:
+            try:
+                point, lower, upper = fit_monthly_model(model, values)
+            except Exception:
+                continue # A series the optimizer cannot fit is left out rather than failing the batch
+            frames.append(pd.DataFrame({
+                'Suburb': cube.suburbs[suburb_pos], 'Offence': cube.offences[offence_pos], 'Model': model, 'Kind': 'forecast',
+                'Date': future_dates, 'Value': point, 'Lower': lower, 'Upper': upper,
+            }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FORECAST_COLUMNS)
+
+def monthly_forecasts(models, workers):
+    """Runs the statsmodels models over every series of the monthly cube across a process pool."""
+    cube = MonthlyCube.open(MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE)
+    series_keys = [(s, o) for s in range(len(cube.suburbs)) for o in range(len(cube.offences))]
+    batches = [series_keys[i:i + SERIES_PER_TASK] for i in range(0, len(series_keys), SERIES_PER_TASK)]
+    print(f"Fitting {', '.join(models)} to {len(series_keys)} monthly series with {workers} worker(s)...")
+
+    start_time = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        for done, frame in enumerate(executor.map(fit_monthly_batch, batches, [models] * len(batches)), start=1):
+            results.append(frame)
+            series_done = min(done * SERIES_PER_TASK, len(series_keys))
+            elapsed = time.perf_counter() - start_time
+            print(f"  {series_done}/{len(series_keys)} series ({series_done / max(elapsed, 1e-9):,.1f} series/s)...")
+    return pd.concat(results, ignore_index=True)
+
+def create_forecast_store(models=DEFAULT_MODELS, workers=None):
+    """
+    Precomputes forecasts for every suburb and offence. The linear trend on the
+    annual master data is solved for all series in one batched closed-form fit;
+    the monthly statsmodels models are fitted across a process pool. The
+    Forecasting Lab then only looks up rows of this table.
+    """
+    print("--- Building Forecast Store ---")
+    frames = []
+
+    if 'linear' in models:
+        print(f"Loading master data from {MASTER_FILE}...")
+        crime_tensor = CrimeTensor.from_master(pd.read_parquet(MASTER_FILE))
+        start_time = time.perf_counter()
+        frames.append(linear_forecasts(crime_tensor))
+        print(f"Fitted linear trends to {crime_tensor.counts.shape[0] * crime_tensor.counts.shape[2]} annual series in {time.perf_counter() - start_time:.2f}s.")
+
+    monthly_models = [model for model in models if model in MONTHLY_MODELS]
+    if monthly_models:
+        if Path(MONTHLY_CUBE_FILE).exists():
+            frames.append(monthly_forecasts(monthly_models, workers or os.cpu_count() or 1))
+        else:
+            print(f"⚠️ {MONTHLY_CUBE_FILE} not found; run precompute_monthly_cube.py to add the monthly models.")
+
+    forecasts = pd.concat(frames, ignore_index=True)[FORECAST_COLUMNS]
+    forecasts = forecasts.astype({'Suburb': 'category', 'Offence': 'category', 'Model': 'category', 'Kind': 'category'})
+    forecasts[['Value', 'Lower', 'Upper']] = forecasts[['Value', 'Lower', 'Upper']].astype('float32')
+    # Sorted by series, so the rows of one suburb and offence are contiguous and row-group statistics prune reads.
+    forecasts = forecasts.sort_values(['Suburb', 'Offence', 'Model', 'Kind', 'Date'], key=lambda col: col.astype(str) if col.dtype == 'category' else col, ignore_index=True)
+
+    print(f"Saving {len(forecasts)} forecast rows to {OUTPUT_FILE}...")
+    pq.write_table(pa.Table.from_pandas(forecasts, preserve_index=False), OUTPUT_FILE, row_group_size=ROW_GROUP_ROWS, compression='zstd')
+    print(f"\n✅ Success! Forecast store saved to {OUTPUT_FILE}.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute forecasts for every suburb and offence.")
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS, choices=['linear'] + MONTHLY_MODELS)
+    parser.add_argument('--workers', type=int, help="Worker processes for the monthly models (default: all cores).")
+    args = parser.parse_args()
+
+    create_forecast_store(models=args.models, workers=args.workers)
@@ -0,0 +1,61 @@
+# precompute_monthly_cube.py
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from src.monthly_cube import MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE, MonthlyCube
+
+PROCESSED_CRIME_FILE = 'crime_data_processed.parquet'
+OUTPUT_FILE = MONTHLY_CUBE_FILE
+INDEX_FILE = MONTHLY_CUBE_INDEX_FILE
+BATCH_ROWS = 500_000
+
+def _batches(path, columns):
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=BATCH_ROWS, columns=columns):
+        yield batch.to_pandas()
+
+def create_monthly_cube():
+    """
+    Materializes the processed crime data as a suburb x offence x month cube
+    of incident counts (see src/monthly_cube.py). The long table is read in
+    record batches twice: once to collect the axis labels and once to add
+    the counts into the memory-mapped file, so memory stays bounded.
+    """
+    print("--- Building Monthly Crime Cube ---")
+    print(f"Collecting suburbs, offences and months from {PROCESSED_CRIME_FILE}...")
+    suburbs, offences = set(), set()
+    first_month, last_month = None, None
+    for batch in _batches(PROCESSED_CRIME_FILE, ['Suburb', 'OffenceCategory', 'Date']):
+        suburbs.update(batch['Suburb'].dropna().astype(str).unique())
+        offences.update(batch['OffenceCategory'].dropna().astype(str).unique())
+        batch_first, batch_last = batch['Date'].min(), batch['Date'].max()
+        first_month = batch_first if first_month is None else min(first_month, batch_first)
+        last_month = batch_last if last_month is None else max(last_month, batch_last)
+
+    months = pd.date_range(first_month.to_period('M').to_timestamp(), last_month.to_period('M').to_timestamp(), freq='MS')
+    # Written to a temporary file first, so a running app never maps a half-built cube.
+    tmp_path = OUTPUT_FILE + '.tmp'
+    cube = MonthlyCube.create(sorted(suburbs), sorted(offences), months, path=tmp_path)
+    print(f"Cube shape: {len(cube.suburbs)} suburbs x {len(cube.offences)} offences x {len(months)} months.")
+
+    print("Adding monthly incident counts...")
+    for batch in _batches(PROCESSED_CRIME_FILE, ['Suburb', 'OffenceCategory', 'Date', 'Incidents']):
+        batch = batch.dropna(subset=['Suburb', 'OffenceCategory'])
+        suburb_pos = batch['Suburb'].astype(str).map(cube.suburb_index).to_numpy()
+        offence_pos = batch['OffenceCategory'].astype(str).map(cube.offence_index).to_numpy()
+        month_pos = cube.month_positions(batch['Date']).to_numpy()
+        # Subcategories of the same offence land in the same cell and are summed.
+        np.add.at(cube.counts, (suburb_pos, offence_pos, month_pos), batch['Incidents'].to_numpy())
+
+    cube.counts.flush()
+    cube.save_index(INDEX_FILE + '.tmp')
+    del cube
+    os.replace(tmp_path, OUTPUT_FILE)
+    os.replace(INDEX_FILE + '.tmp', INDEX_FILE)
+
+    print(f"\n✅ Success! Monthly cube saved to {OUTPUT_FILE} (index: {INDEX_FILE}).")
+
+if __name__ == "__main__":
+    create_monthly_cube()
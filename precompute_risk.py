@@ -1,23 +1,20 @@
 import pandas as pd
-import geopandas as gpd
 import numpy as np
 import gc # Garbage Collector interface
+from src.geodata import BOUNDARIES_FILE, PREMISES_FILE, boundaries_extent, load_boundaries, load_premises
+from src.instrumentation import step
+from src.name_resolution import CROSSWALK_FILE, load_crosswalk, resolve_suburbs
+from src.regions import GREATER_SYDNEY_BOUNDS
+from src.risk_grid import GridSpec, build_coverage_matrix, risk_surface, save_coverage, save_risk_grid, scale_to_risk
 
 TARGET_AREA = 'Greater Sydney' # Options: 'Greater Sydney' or 'NSW'
 
-# Bounding box for Greater Sydney (approximate)
-GREATER_SYDNEY_BOUNDS = {
-    "min_lon": 150.5, 
-    "min_lat": -34.2, 
-    "max_lon": 151.4, 
-    "max_lat": -33.5
-}
-
 # File paths
-SHAPEFILE_PATH = "shapefile_source/SAL_2021_AUST_GDA2020.shp"
-PREMISES_FILE = 'premises-list-as-at-8-february-2021.csv'
+BOUNDARIES_PATH = BOUNDARIES_FILE
 PROCESSED_CRIME_FILE = 'crime_data_processed.parquet'
 OUTPUT_FILE = 'risk_grid.parquet'
+COVERAGE_FILE = 'risk_coverage.npz' # Sparse cell x suburb coverage fractions, saved alongside the grid
+CROSSWALK_PATH = CROSSWALK_FILE
 
 GRID_SIZE = 0.002 # The size of each grid square in degrees (~200m)
 
@@ -33,93 +30,77 @@ def create_risk_grid():
         print("Focusing analysis on Greater Sydney for performance.")
         min_lon, min_lat, max_lon, max_lat = GREATER_SYDNEY_BOUNDS.values()
     else:
-        print("Loading suburb shapefile to define NSW boundaries...")
-        suburbs_gdf = gpd.read_file(SHAPEFILE_PATH)
-        suburbs_gdf_nsw = suburbs_gdf[suburbs_gdf['STE_NAME21'] == 'New South Wales'].copy()
-        min_lon, min_lat, max_lon, max_lat = suburbs_gdf_nsw.total_bounds
-        del suburbs_gdf, suburbs_gdf_nsw # Free up memory
-        gc.collect()
-
-    # 2. Create the Grid
+        print("Reading the NSW extent from the boundary bounding boxes...")
+        min_lon, min_lat, max_lon, max_lat = boundaries_extent(BOUNDARIES_PATH)
+
+    # 2. Define the Grid
+    # The grid is regular, so it is described by its origin, cell size and shape;
+    # cell membership is arithmetic on lon/lat and no polygons are needed yet.
     print("Creating analysis grid...")
-    lons = np.arange(min_lon, max_lon, GRID_SIZE)
-    lats = np.arange(min_lat, max_lat, GRID_SIZE)
-    
-    grid_cells = []
-    from shapely.geometry import Polygon
-    for lon in lons:
-        for lat in lats:
-            grid_cells.append(Polygon([
-                (lon, lat), (lon + GRID_SIZE, lat),
-                (lon + GRID_SIZE, lat + GRID_SIZE), (lon, lat + GRID_SIZE)
-            ]))
-            
-    grid_gdf = gpd.GeoDataFrame(geometry=grid_cells, crs="EPSG:4326")
-    grid_gdf['grid_id'] = range(len(grid_gdf))
-    print(f"Created a grid with {len(grid_gdf)} cells.")
-
-    # 3. Calculate Venue Density (Optimized)
+    grid_spec = GridSpec.from_bounds(min_lon, min_lat, max_lon, max_lat, GRID_SIZE)
+    grid_df = pd.DataFrame({'grid_id': np.arange(grid_spec.n_cells)})
+    print(f"Created a grid with {grid_spec.n_cells} cells ({grid_spec.n_lon} x {grid_spec.n_lat}).")
+
+    # 3. Calculate Venue Density (binning venues straight into cell indices)
     print("Calculating venue density...")
-    premises_df = pd.read_csv(PREMISES_FILE, encoding='latin1', low_memory=False)
-    
-    premises_df.dropna(subset=['Postcode'], inplace=True)
-    premises_df = premises_df[premises_df['Postcode'].between(1000, 2999)]
-    print(f"Filtered to {len(premises_df)} venues within NSW postcodes.")
-    
-    premises_df.dropna(subset=['Latitude', 'Longitude'], inplace=True)
-    premises_df['Latitude'] = pd.to_numeric(premises_df['Latitude'].astype(str).str.replace(',', ''), errors='coerce')
-    premises_df['Longitude'] = pd.to_numeric(premises_df['Longitude'].astype(str).str.replace(',', ''), errors='coerce')
-    premises_df.dropna(subset=['Latitude', 'Longitude'], inplace=True)
-    
-    premises_gdf = gpd.GeoDataFrame(
-        premises_df, 
-        geometry=gpd.points_from_xy(premises_df.Longitude, premises_df.Latitude),
-        crs="EPSG:4326"
-    )
+    # Only the row groups of the premises file that overlap the grid are read.
+    with step('venue_density') as s:
+        premises_df = load_premises(PREMISES_FILE, columns=['Postcode', 'Latitude', 'Longitude'], bbox=(min_lon, min_lat, max_lon, max_lat))
+        s.rows_in = len(premises_df)
 
-    joined_venues = gpd.sjoin(grid_gdf, premises_gdf, how="left", predicate='contains')
-    venue_counts = joined_venues.groupby('grid_id').size().reset_index(name='VenueCount')
-    grid_gdf = pd.merge(grid_gdf, venue_counts, on='grid_id', how='left')
-    grid_gdf['VenueCount'] = grid_gdf['VenueCount'].fillna(0)
+        premises_df.dropna(subset=['Postcode'], inplace=True)
+        premises_df = premises_df[premises_df['Postcode'].between(1000, 2999)]
+        print(f"Filtered to {len(premises_df)} venues within NSW postcodes.")
 
+        grid_df['VenueCount'] = grid_spec.count_points(premises_df['Longitude'].values, premises_df['Latitude'].values)
+        s.rows_out = len(premises_df)
 
-    del premises_df, premises_gdf, joined_venues, venue_counts
+    del premises_df
     gc.collect()
 
-    # 4. Calculate Crime Density
-    print("Calculating crime density...")
-    crime_df = pd.read_parquet(PROCESSED_CRIME_FILE)
-    crime_summary = crime_df.groupby('Suburb')['Incidents'].sum().reset_index()
-    crime_summary['Suburb_Clean'] = crime_summary['Suburb'].str.upper().str.strip()
-
-    suburbs_gdf = gpd.read_file(SHAPEFILE_PATH)
-    suburbs_gdf_nsw = suburbs_gdf[suburbs_gdf['STE_NAME21'] == 'New South Wales'].copy()
-    suburbs_gdf_nsw.rename(columns={'SAL_NAME21': 'Suburb'}, inplace=True)
-    suburbs_gdf_nsw['Suburb_Clean'] = suburbs_gdf_nsw['Suburb'].str.upper().str.strip()
-    
-    suburbs_with_crime = pd.merge(suburbs_gdf_nsw, crime_summary, on='Suburb_Clean', how='left')
-    suburbs_with_crime['Incidents'] = suburbs_with_crime['Incidents'].fillna(0)
-    
-    joined_crime = gpd.sjoin(grid_gdf, suburbs_with_crime, how="left", predicate='intersects')
-    crime_density = joined_crime.groupby('grid_id')['Incidents'].mean().reset_index()
-    grid_gdf = pd.merge(grid_gdf, crime_density, on='grid_id', how='left')
-    grid_gdf['Incidents'] = grid_gdf['Incidents'].fillna(0)
+    # 4. Rasterize Suburbs and Calculate Crime Density
+    # Suburb polygons are rasterized once into a sparse cell x suburb coverage matrix.
+    # The default CrimeRisk layer (all offences, all years) is one matrix-vector
+    # product, and the Risk Insights Lab reuses the saved matrix for any other
+    # offence or year range.
+    print("Rasterizing suburb boundaries onto the grid...")
+    # Only the suburbs overlapping the grid are read.
+    with step('rasterize') as s:
+        suburbs_gdf_nsw = load_boundaries(BOUNDARIES_PATH, columns=['Suburb', 'Suburb_Clean'], bbox=(min_lon, min_lat, max_lon, max_lat), crs="EPSG:4326")
+        s.rows_in = len(suburbs_gdf_nsw)
+
+        coverage = build_coverage_matrix(grid_spec, suburbs_gdf_nsw.geometry.values)
+        save_coverage(COVERAGE_FILE, coverage, suburbs_gdf_nsw['Suburb_Clean'].tolist(), grid_spec)
+        s.rows_out = coverage.nnz
+    print(f"Saved {coverage.nnz} cell/suburb overlaps to {COVERAGE_FILE}.")
 
-    del crime_df, crime_summary, suburbs_gdf, suburbs_gdf_nsw, suburbs_with_crime, joined_crime, crime_density
+    print("Calculating crime density...")
+    with step('crime_density') as s:
+        crime_df = pd.read_parquet(PROCESSED_CRIME_FILE, columns=['Suburb', 'Incidents'])
+        s.rows_in = len(crime_df)
+        crime_summary = crime_df.groupby('Suburb', observed=True)['Incidents'].sum().reset_index()
+        suburb_crosswalk = load_crosswalk(CROSSWALK_PATH)
+        if suburb_crosswalk is None:
+            print(f"⚠️ {CROSSWALK_PATH} not found; joining on upper-cased names. Run build_suburb_crosswalk.py first.")
+        crime_summary['Suburb_Clean'] = resolve_suburbs(crime_summary['Suburb'], 'bocsar', suburb_crosswalk)
+        suburb_incidents = crime_summary.groupby('Suburb_Clean')['Incidents'].sum().reindex(suburbs_gdf_nsw['Suburb_Clean'], fill_value=0)
+
+        grid_df['Incidents'] = risk_surface(coverage, suburb_incidents.values)
+        s.rows_out = len(grid_df)
+
+    del crime_df, crime_summary, suburbs_gdf_nsw, suburb_incidents, coverage
     gc.collect()
 
     # 5. Normalize and Save
     print("Normalizing scores and saving final grid...")
-    grid_gdf['VenueRisk'] = (grid_gdf['VenueCount'] / grid_gdf['VenueCount'].max()) * 10
-    grid_gdf['CrimeRisk'] = (grid_gdf['Incidents'] / grid_gdf['Incidents'].max()) * 10
+    grid_df['VenueRisk'] = (grid_df['VenueCount'] / max(grid_df['VenueCount'].max(), 1)) * 10
+    grid_df['CrimeRisk'] = scale_to_risk(grid_df['Incidents'].values)
     
-    grid_gdf['min_lon'] = grid_gdf.geometry.bounds['minx']
-    grid_gdf['min_lat'] = grid_gdf.geometry.bounds['miny']
-    grid_gdf['max_lon'] = grid_gdf.geometry.bounds['maxx']
-    grid_gdf['max_lat'] = grid_gdf.geometry.bounds['maxy']
+    grid_df['min_lon'], grid_df['min_lat'], grid_df['max_lon'], grid_df['max_lat'] = grid_spec.cell_bounds(grid_df['grid_id'].values)
 
-    final_df = grid_gdf[['grid_id', 'VenueRisk', 'CrimeRisk', 'min_lon', 'min_lat', 'max_lon', 'max_lat']]
-    final_df.to_parquet(OUTPUT_FILE)
+    final_df = grid_df[['grid_id', 'VenueRisk', 'CrimeRisk', 'min_lon', 'min_lat', 'max_lon', 'max_lat']]
+    with step('write', rows_in=len(final_df)):
+        save_risk_grid(final_df, OUTPUT_FILE, grid_spec)
 
     print(f"\n✅ Success! Optimized risk grid created and saved to {OUTPUT_FILE}.")
 
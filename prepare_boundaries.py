@@ -0,0 +1,39 @@
+# prepare_boundaries.py
+
+import geopandas as gpd
+from src.geodata import BOUNDARIES_FILE, PROJECTED_CRS, write_spatial_parquet
+
+SHAPEFILE_PATH = "shapefile_source/SAL_2021_AUST_GDA2020.shp"
+OUTPUT_FILE = BOUNDARIES_FILE
+STATE_NAME = 'New South Wales'
+ROW_GROUP_SIZE = 128 # Polygons are larger than points, so bbox reads get finer row groups
+
+def create_boundaries_dataset():
+    """
+    Extracts the NSW suburbs from the national SAL shapefile once and saves
+    them as GeoParquet with the suburb join key, bounding boxes and centroids.
+    Later stages read this file, optionally limited to a bounding box,
+    instead of loading every state from the shapefile.
+    """
+    print("--- Preparing NSW Suburb Boundaries ---")
+    print(f"Reading {STATE_NAME} suburbs from {SHAPEFILE_PATH}...")
+    # The attribute filter runs in the reader, so other states are never materialised.
+    # The filtered column must be among those read, or the driver matches nothing.
+    suburbs_gdf = gpd.read_file(SHAPEFILE_PATH, columns=['SAL_NAME21', 'STE_NAME21'], where=f"STE_NAME21 = '{STATE_NAME}'")
+    suburbs_gdf = suburbs_gdf[suburbs_gdf.geometry.notna() & ~suburbs_gdf.geometry.is_empty].reset_index(drop=True)
+
+    suburbs_gdf = suburbs_gdf.drop(columns='STE_NAME21').rename(columns={'SAL_NAME21': 'Suburb'})
+    suburbs_gdf['Suburb_Clean'] = suburbs_gdf['Suburb'].str.upper().str.strip()
+    bounds = suburbs_gdf.geometry.bounds
+    suburbs_gdf['min_lon'], suburbs_gdf['min_lat'] = bounds['minx'].values, bounds['miny'].values
+    suburbs_gdf['max_lon'], suburbs_gdf['max_lat'] = bounds['maxx'].values, bounds['maxy'].values
+    # Centroids are taken in metres, then expressed back in lon/lat.
+    centroids = suburbs_gdf.geometry.to_crs(PROJECTED_CRS).centroid.to_crs(suburbs_gdf.crs)
+    suburbs_gdf['centroid_lon'], suburbs_gdf['centroid_lat'] = centroids.x.values, centroids.y.values
+
+    print(f"Saving {len(suburbs_gdf)} suburbs to {OUTPUT_FILE}...")
+    write_spatial_parquet(suburbs_gdf, OUTPUT_FILE, row_group_size=ROW_GROUP_SIZE)
+    print(f"\n✅ Success! NSW boundaries saved to {OUTPUT_FILE}.")
+
+if __name__ == "__main__":
+    create_boundaries_dataset()
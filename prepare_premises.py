@@ -0,0 +1,50 @@
+# prepare_premises.py
+
+import geopandas as gpd
+import pandas as pd
+from src.geodata import GEOGRAPHIC_CRS, PREMISES_FILE, PROJECTED_CRS, clean_coordinates, write_spatial_parquet
+
+PREMISES_CSV_FILE = 'premises-list-as-at-8-february-2021.csv'
+OUTPUT_FILE = PREMISES_FILE
+
+def create_premises_dataset():
+    """
+    Parses the licensed premises CSV once into a typed GeoParquet file:
+    numeric coordinates and postcodes, categorical text columns, WGS84 point
+    geometry plus projected X/Y metres, sorted along a Hilbert curve so
+    bbox reads skip most of the file.
+    """
+    print("--- Preparing Premises Dataset ---")
+    print(f"Loading premises from {PREMISES_CSV_FILE}...")
+    premises_df = pd.read_csv(PREMISES_CSV_FILE, encoding='latin1', low_memory=False)
+    n_rows = len(premises_df)
+
+    # --- Part 1: Coordinates and types ---
+    # Latitude/Longitude arrive as strings with thousands separators.
+    premises_df['Latitude'] = clean_coordinates(premises_df['Latitude']).values
+    premises_df['Longitude'] = clean_coordinates(premises_df['Longitude']).values
+    premises_df.dropna(subset=['Latitude', 'Longitude'], inplace=True)
+    if 'Postcode' in premises_df.columns:
+        premises_df['Postcode'] = pd.to_numeric(premises_df['Postcode'], errors='coerce').astype('Int16')
+    for column in premises_df.select_dtypes(include=['object', 'string']).columns:
+        values = premises_df[column].astype('string').str.strip()
+        # Repetitive text (suburbs, licence types) is stored as categories.
+        premises_df[column] = values.astype('category') if values.nunique() < len(values) / 2 else values
+    print(f"Kept {len(premises_df)} of {n_rows} premises with valid coordinates.")
+
+    # --- Part 2: Geometry ---
+    premises_gdf = gpd.GeoDataFrame(
+        premises_df.reset_index(drop=True),
+        geometry=gpd.points_from_xy(premises_df['Longitude'], premises_df['Latitude']),
+        crs=GEOGRAPHIC_CRS,
+    )
+    projected = premises_gdf.geometry.to_crs(PROJECTED_CRS)
+    premises_gdf['X'], premises_gdf['Y'] = projected.x.values, projected.y.values
+
+    # --- Part 3: Save with the spatial index ---
+    print(f"Saving Hilbert-sorted GeoParquet to {OUTPUT_FILE}...")
+    write_spatial_parquet(premises_gdf, OUTPUT_FILE)
+    print(f"\n✅ Success! {len(premises_gdf)} premises saved to {OUTPUT_FILE}.")
+
+if __name__ == "__main__":
+    create_premises_dataset()
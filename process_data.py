@@ -1,10 +1,142 @@
 # process_data.py
 
-import pandas as pd
+import argparse
 import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.crime_index import add_temporal_columns, row_index_path, write_row_index
+from src.instrumentation import peak_rss_mb, step
 
 INPUT_FILE = 'suburbdata25q1.csv'
 OUTPUT_FILE = 'crime_data_processed.parquet'
+ROW_INDEX_FILE = str(row_index_path(OUTPUT_FILE))
+
+ID_VARS = ['Suburb', 'Offence category', 'Subcategory']
+STREAM_CHUNK_ROWS = 2000 # Wide CSV rows melted per chunk in streaming mode
+FINGERPRINT_CHUNK_ROWS = 20_000 # Wide CSV rows hashed per chunk when fingerprinting months
+
+# --- Storage profile for crime_data_processed.parquet ---
+# Text columns are dictionary-encoded (read back as pandas categoricals), counts are
+# narrowed to int32 and rows are sorted so the per-row-group min/max statistics on
+# Suburb/OffenceCategory/Date are tight enough for filtered reads to skip row groups.
+CATEGORICAL_COLUMNS = ['Suburb', 'OffenceCategory', 'Subcategory', 'Month', 'DayOfWeek']
+SORT_COLUMNS = ['Suburb', 'OffenceCategory', 'Date']
+ROW_GROUP_ROWS = 250_000
+PARQUET_COMPRESSION = 'zstd'
+
+# Fixed output schema so every streamed chunk lands in the same Parquet file.
+OUTPUT_SCHEMA = pa.schema([
+    ('Suburb', pa.dictionary(pa.int32(), pa.string())),
+    ('OffenceCategory', pa.dictionary(pa.int32(), pa.string())),
+    ('Subcategory', pa.dictionary(pa.int32(), pa.string())),
+    ('Date', pa.timestamp('ns')),
+    ('Incidents', pa.int32()),
+    ('Year', pa.int16()),
+    ('Month', pa.dictionary(pa.int32(), pa.string())),
+    ('DayOfWeek', pa.dictionary(pa.int32(), pa.string())),
+])
+
+def _melt_and_clean(wide_df, date_lookup):
+    """
+    Melts a block of wide BOCSAR rows into long format, coerces the
+    incident counts and keeps only rows with at least one incident.
+    """
+    long_df = pd.melt(wide_df, id_vars=ID_VARS, value_vars=list(date_lookup.keys()), var_name='Date', value_name='Incidents')
+
+    # Convert 'Date' column from 'Jan 1995' format using the pre-parsed header lookup
+    long_df['Date'] = long_df['Date'].map(date_lookup)
+
+    # Convert 'Incidents' to numbers, turning any errors (like '-') into not-a-number (NaN)
+    long_df['Incidents'] = pd.to_numeric(long_df['Incidents'], errors='coerce')
+
+    # Clean up the data
+    long_df.dropna(subset=['Incidents'], inplace=True) # Drop rows where Incidents is NaN
+    long_df = long_df[long_df['Incidents'] > 0] # Keep only rows where at least one incident occurred
+    long_df['Incidents'] = long_df['Incidents'].astype(int) # Convert to a whole number
+
+    # Clean up column names for easier use in the app
+    long_df.rename(columns={'Offence category': 'OffenceCategory'}, inplace=True)
+    return long_df
+
+def _build_date_lookup(columns):
+    """Parses the monthly column headers ('Jan 1995') once, up front."""
+    date_cols = [col for col in columns if col not in ID_VARS]
+    parsed_dates = pd.to_datetime(pd.Index(date_cols), format='%b %Y')
+    return dict(zip(date_cols, parsed_dates))
+
+def apply_storage_layout(long_df):
+    """
+    Converts a long crime DataFrame to the compact storage profile:
+    categorical text columns, int32 counts, materialized Year/Month/DayOfWeek
+    fields and rows sorted by (Suburb, OffenceCategory, Date).
+    """
+    long_df = add_temporal_columns(long_df)
+    long_df = long_df.astype({col: 'category' for col in CATEGORICAL_COLUMNS})
+    long_df['Incidents'] = long_df['Incidents'].astype('int32')
+    # Sort on the string values rather than the category codes, which follow first appearance.
+    long_df = long_df.sort_values(SORT_COLUMNS, key=lambda col: col.astype(str) if col.dtype == 'category' else col)
+    return long_df.reset_index(drop=True)
+
+def write_processed_crime_data(long_df, output_path):
+    """Writes the long crime table with sized row groups and column statistics."""
+    table = pa.Table.from_pandas(apply_storage_layout(long_df), schema=OUTPUT_SCHEMA, preserve_index=False)
+    pq.write_table(table, output_path, row_group_size=ROW_GROUP_ROWS, compression=PARQUET_COMPRESSION, write_statistics=True)
+    write_row_index(output_path)
+
+def read_month_columns(input_path):
+    """Returns the monthly column headers of a BOCSAR wide CSV without reading any rows."""
+    header = pd.read_csv(input_path, header=0, nrows=0).columns
+    return [col for col in header if col not in ID_VARS]
+
+def month_fingerprints(input_path, month_cols, chunksize=FINGERPRINT_CHUNK_ROWS):
+    """
+    {month column: hex digest} of the counts a BOCSAR CSV holds for each
+    month. Each (Suburb, Offence category, Subcategory, count) row is hashed
+    and the hashes are summed per column, so the digest changes when BOCSAR
+    revises a count or drops a row but not when it reorders rows or
+    reformats numbers ('-' and blanks count as missing).
+    """
+    totals = np.zeros(len(month_cols), dtype='uint64')
+    with step('month_fingerprints') as s:
+        # Counts are parsed by the C reader ('-' as missing), which is several times faster than coercing text.
+        dtypes = {**dict.fromkeys(ID_VARS, str), **dict.fromkeys(month_cols, 'float64')}
+        reader = pd.read_csv(input_path, header=0, usecols=ID_VARS + list(month_cols), chunksize=chunksize, dtype=dtypes, na_values=['-'])
+        rows = 0
+        for wide_chunk in reader:
+            row_keys = pd.util.hash_pandas_object(wide_chunk[ID_VARS].fillna(''), index=False).to_numpy()
+            counts = wide_chunk[list(month_cols)].fillna(-1).to_numpy('float64')
+            count_hashes = pd.util.hash_array(counts.ravel()).reshape(counts.shape)
+            # uint64 arithmetic wraps around, which is what an order-independent checksum wants.
+            totals += (count_hashes ^ (row_keys[:, None] * np.uint64(0x9E3779B97F4A7C15))).sum(axis=0, dtype='uint64')
+            rows += len(wide_chunk)
+        s.rows_in = rows
+    return {col: format(int(total), '016x') for col, total in zip(month_cols, totals)}
+
+def append_new_months(input_path, output_path, new_month_cols):
+    """
+    Incremental refresh for a BOCSAR drop that only adds months. Only the new
+    monthly columns are parsed and melted; they are merged into the existing
+    processed file, which is rewritten in the standard sorted layout. Callers
+    check with month_fingerprints() that the earlier months were not revised.
+    """
+    print(f"Appending {len(new_month_cols)} new months from {input_path} to {output_path}...")
+    with step('melt_new_months') as s:
+        new_wide_df = pd.read_csv(input_path, header=0, usecols=ID_VARS + list(new_month_cols))
+        new_long_df = _melt_and_clean(new_wide_df, _build_date_lookup(new_wide_df.columns))
+        s.rows_in, s.rows_out = len(new_wide_df), len(new_long_df)
+
+    with step('merge_and_write') as s:
+        existing_df = pd.read_parquet(output_path)
+        combined_df = pd.concat([existing_df, new_long_df], ignore_index=True)
+        write_processed_crime_data(combined_df, output_path)
+        s.rows_in, s.rows_out = len(existing_df), len(combined_df)
+
+    print(f"✅ Added {len(new_long_df)} incident records ({len(combined_df)} in total).")
+    return len(new_long_df)
 
 def process_crime_data(input_path):
     """
@@ -12,43 +144,100 @@ def process_crime_data(input_path):
     then melts and cleans it for analysis.
     """
     print(f"Loading data from {input_path}...")
-    
+
     try:
         # Force pandas to use the very first row (index 0) as the header.
-        df = pd.read_csv(input_path, header=0) 
+        df = pd.read_csv(input_path, header=0)
     except Exception as e:
         print(f"❌ Failed to load CSV. Error: {e}")
         sys.exit()
 
     print("✅ Data loaded correctly! Reshaping data (melting)...")
-    
-    # Define the identifier columns based on the now-correct header
-    id_vars = ['Suburb', 'Offence category', 'Subcategory']
-    date_cols = [col for col in df.columns if col not in id_vars]
-
-    # Melt the dataframe to convert it to a 'long' format
-    long_df = pd.melt(df, id_vars=id_vars, value_vars=date_cols, var_name='Date', value_name='Incidents')
+    date_lookup = _build_date_lookup(df.columns)
 
     print("Cleaning and transforming data...")
-    # Convert 'Date' column from 'Jan 1995' format to proper datetime objects
-    long_df['Date'] = pd.to_datetime(long_df['Date'], format='%b %Y')
-    
-    # Convert 'Incidents' to numbers, turning any errors (like '-') into not-a-number (NaN)
-    long_df['Incidents'] = pd.to_numeric(long_df['Incidents'], errors='coerce')
-    
-    # Clean up the data
-    long_df.dropna(subset=['Incidents'], inplace=True) # Drop rows where Incidents is NaN
-    long_df = long_df[long_df['Incidents'] > 0] # Keep only rows where at least one incident occurred
-    long_df['Incidents'] = long_df['Incidents'].astype(int) # Convert to a whole number
+    long_df = _melt_and_clean(df, date_lookup)
 
-    # Clean up column names for easier use in the app
-    long_df.rename(columns={'Offence category': 'OffenceCategory'}, inplace=True)
-    
     print(f"Processing complete. Found {len(long_df)} incident records.")
     return long_df
 
+def stream_crime_data(input_path, output_path, chunksize=STREAM_CHUNK_ROWS):
+    """
+    Memory-bounded variant of process_crime_data. Reads the wide CSV in
+    row chunks, melts and cleans each chunk, and appends it to the output
+    Parquet file, so peak memory depends on the chunk size rather than on
+    the number of monthly columns in the file.
+
+    Melted chunks are buffered up to one row group and sorted before they are
+    written. The buffer's last suburb is held back until the next flush, as its
+    rows may continue in the next chunk, so every suburb is sorted in one piece.
+    BOCSAR files list suburbs in alphabetical order, so the file ends up in the
+    same (Suburb, OffenceCategory, Date) order as the in-memory path.
+    """
+    print(f"Streaming data from {input_path} in chunks of {chunksize} rows...")
+    start_time = time.perf_counter()
+    rows_read, rows_written = 0, 0
+
+    try:
+        # Every monthly column is read as text so a '-' in one chunk cannot change the dtype of the next.
+        header = pd.read_csv(input_path, header=0, nrows=0).columns
+        reader = pd.read_csv(input_path, header=0, chunksize=chunksize, dtype=str)
+    except Exception as e:
+        print(f"❌ Failed to load CSV. Error: {e}")
+        sys.exit()
+
+    date_lookup = _build_date_lookup(header)
+
+    pending_chunks, pending_rows = [], 0
+
+    def flush(writer, last_suburb=None):
+        block = pd.concat(pending_chunks, ignore_index=True)
+        pending_chunks.clear()
+        if last_suburb is not None:
+            # Melted rows are ordered by month, so the suburb that may continue is the last wide row's.
+            trailing = (block['Suburb'] == last_suburb).to_numpy()
+            pending_chunks.append(block[trailing])
+            block = block[~trailing]
+        if block.empty:
+            return 0
+        block = apply_storage_layout(block)
+        writer.write_table(pa.Table.from_pandas(block, schema=OUTPUT_SCHEMA, preserve_index=False), row_group_size=ROW_GROUP_ROWS)
+        return len(block)
+
+    with step('melt_chunks') as s, pq.ParquetWriter(output_path, OUTPUT_SCHEMA, compression=PARQUET_COMPRESSION, write_statistics=True) as writer:
+        for wide_chunk in reader:
+            rows_read += len(wide_chunk)
+            long_chunk = _melt_and_clean(wide_chunk, date_lookup)
+            if long_chunk.empty:
+                continue
+            pending_chunks.append(long_chunk)
+            pending_rows += len(long_chunk)
+            if pending_rows >= ROW_GROUP_ROWS:
+                rows_written += flush(writer, last_suburb=wide_chunk['Suburb'].iloc[-1])
+                pending_rows = len(pending_chunks[0])
+        if pending_chunks:
+            rows_written += flush(writer)
+        s.rows_in, s.rows_out = rows_read, rows_written
+    with step('row_index', rows_in=rows_written):
+        write_row_index(output_path)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Processing complete. Found {rows_written} incident records from {rows_read} wide rows.")
+    print(f"Throughput: {rows_written / max(elapsed, 1e-9):,.0f} rows/s over {elapsed:.1f}s, peak RSS {peak_rss_mb():,.0f} MB.")
+    return rows_written
+
 if __name__ == "__main__":
-    processed_df = process_crime_data(INPUT_FILE)
-    print(f"Saving processed data to {OUTPUT_FILE}...")
-    processed_df.to_parquet(OUTPUT_FILE)
-    print("✅ All Done! Your data is processed. You can now run the Streamlit app.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Melt the BOCSAR wide CSV into the long Parquet format used by the app.")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--stream', action='store_true', help="Process the CSV in row chunks to keep memory bounded.")
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if args.stream:
+        stream_crime_data(args.input, args.output, chunksize=args.chunksize)
+    else:
+        processed_df = process_crime_data(args.input)
+        print(f"Saving processed data to {args.output}...")
+        write_processed_crime_data(processed_df, args.output)
+    print("✅ All Done! Your data is processed. You can now run the Streamlit app.")
@@ -0,0 +1,331 @@
+# run_benchmarks.py
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from generate_synthetic_data import OUTPUT_DIR, SYNTHETIC_MANIFEST_FILE
+from run_pipeline import build_stages
+from src.analytics import CrimeTensor, get_crime_columns
+from src.anomalies import select_anomalies
+from src.correlations import strongest_correlation
+from src.crime_index import KeyedCrimeTable
+from src.crime_network import ALL_YEARS, CrimeNetworkStore
+from src.geocoder import OfflineGeocoder
+from src.geodata import PREMISES_FILE, load_premises
+from src.instrumentation import REGRESSION_FLOORS, REGRESSION_THRESHOLD, collect_steps, step
+from src.monthly_cube import MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE, MonthlyCube, rolling_totals
+from src.regions import GREATER_SYDNEY
+from src.risk_grid import RiskGrid, load_coverage, offence_risk_layer
+from src.suburb_topology import LOD_MANIFEST_FILE, SuburbTopology, view_bounds
+
+BASELINES_FILE = 'benchmark_baselines.json'
+PAGE_REPEATS = 5 # Each page computation is timed this many times and the median kept
+# Page computations take milliseconds, so their regressions need a smaller absolute floor than pipeline stages.
+PAGE_REGRESSION_FLOORS = {'wall_s': 0.005, 'cpu_s': 0.005}
+SYDNEY_VIEW = (-33.8688, 151.2093, 9) # Crime Map default view: (lat, lon, zoom)
+PAGES = ['Mission Control', 'Dossier Tool', 'Crime Map', 'Temporal Analysis', 'Forecasting Lab',
+         'Correlation Lab', 'Automated Anomaly', 'Network Explorer', 'Risk Insights Lab']
+
+# --- Part 1: Pipeline stages ---
+def benchmark_pipeline(stages=None, skip_stages=None):
+    """
+    Runs the pipeline stages one after another in this process, from scratch,
+    and returns a record per stage and per instrumented step inside it.
+    Stages run sequentially so each one's wall time, CPU time and peak RSS
+    are its own rather than shared with whatever ran beside it.
+    """
+    records = []
+    for stage in build_stages():
+        if (stages and stage.name not in stages) or (skip_stages and stage.name in skip_stages):
+            continue
+        print(f"\n▶️  {stage.name}...")
+        collect_steps()
+        with step(stage.name):
+            stage.run(None, True)
+        *inner_steps, stage_step = collect_steps()
+        for record in [stage_step, *inner_steps]:
+            records.append({'group': 'pipeline', 'name': stage.name, 'step': record['step'], 'depth': record['depth'],
+                            'wall_s': record['wall_s'], 'cpu_s': record['cpu_s'], 'peak_rss_mb': record['peak_rss_mb']})
+        print(f"✅ {stage.name}: {stage_step['wall_s']:.1f}s, {stage_step['peak_rss_mb']:,.0f} MB peak.")
+    return records
+
+# --- Part 2: Page computations ---
+def time_call(function, repeats):
+    """Median wall and CPU seconds of `repeats` calls."""
+    walls, cpus = [], []
+    for _ in range(repeats):
+        # process_time() resolves nanoseconds; os.times() ticks in 10 ms, too coarse for a page computation.
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        function()
+        walls.append(time.perf_counter() - start_wall)
+        cpus.append(time.process_time() - start_cpu)
+    return statistics.median(walls), statistics.median(cpus)
+
+def page_workloads():
+    """
+    {page: [(step, function), ...]}: what each page computes on a rerun, with
+    the selections a user starts from (busiest suburb, most common offence,
+    latest year). 'load' steps build what the st.cache_* loaders hold, so they
+    measure a cold start; the rest is the work repeated on every rerun.
+    """
+    state = {}
+
+    def load_master():
+        state['master_df'] = pd.read_parquet('master_analytics_data.parquet')
+        state['tensor'] = tensor = CrimeTensor.from_master(state['master_df'])
+        state['year'] = max(tensor.available_years())
+        state['offence'] = tensor.offence_totals().idxmax()
+        state['suburb'] = state['master_df'].groupby('Suburb')[state['offence']].sum().idxmax()
+
+    def load_mission_control():
+        load_master()
+        state['anomaly_scores'] = pd.read_parquet('anomaly_scores.parquet')
+        state['correlations'] = pd.read_parquet('correlations.parquet')
+
+    def load_cube():
+        state['cube'] = MonthlyCube.open(MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE)
+
+    def mission_control():
+        tensor, year = state['tensor'], state['year']
+        select_anomalies(state['anomaly_scores'], year, 3, std_dev_threshold=2.5, min_incidents=5)
+        most_common = tensor.offence_totals(year).idxmax()
+        tensor.year_frame(year).nlargest(5, most_common)
+        tensor.year_totals(tensor.offence_totals().nlargest(3).index.tolist())
+        strongest_correlation(state['correlations'], year, ['Index of Economic Resources', 'VenueCount'])
+
+    def dossier():
+        offences = state['tensor'].offences
+        state['tensor'].suburb_frame(state['suburb'], offences)
+        state['cube'].suburb_frame(state['suburb'], offences)
+        pd.DataFrame({offence: state['cube'].seasonal_profile(state['suburb'], offence) for offence in offences})
+
+    def temporal():
+        filtered_df = state['crime_table'].select(state['suburb'], state['offence'])
+        filtered_df.groupby('DayOfWeek', observed=True)['Incidents'].sum()
+        filtered_df.groupby('Month', observed=True)['Incidents'].sum()
+        filtered_df.groupby('Year')['Incidents'].sum()
+        compare_df = state['cube'].offence_frame(state['offence'], [state['suburb'], *state['cube'].suburbs[:5]])
+        rolling_totals(compare_df[compare_df.columns[1:]].to_numpy().T, 12)
+
+    def forecasting():
+        forecasts, key = state['forecasts'], (state['suburb'], state['offence'])
+        series_df = forecasts.loc[[key]] if key in forecasts.index else forecasts.iloc[0:0]
+        series_df[series_df['Model'] == 'linear']
+        state['cube'].series(state['suburb'], state['offence'])
+
+    def correlation_lab():
+        store = state['correlations']
+        store[(store['Year'] == state['year']) & (store['Offence'] == state['offence'])]
+        state['tensor'].year_frame(state['year'], [state['offence']], include_side_data=True)
+
+    def network():
+        network_store = state['network']
+        threshold = 0.3 if 0.3 in network_store.thresholds else network_store.thresholds[0]
+        graph = network_store.graph(ALL_YEARS, GREATER_SYDNEY if GREATER_SYDNEY in network_store.regions else network_store.regions[0], threshold)
+        if state['offence'] in graph:
+            nx.ego_graph(graph, state['offence'], radius=2)
+
+    def load_risk():
+        state['risk_grid'] = RiskGrid.from_parquet('risk_grid.parquet')
+        state['coverage'] = load_coverage('risk_coverage.npz')
+        premises = load_premises(PREMISES_FILE, columns=['Address', 'Suburb']).dropna()
+        venue = premises.iloc[len(premises) // 2]
+        # A misspelt address exercises the fuzzy path; the cache is off so every call resolves locally.
+        state['address'] = f"{venue['Address'][:-1]}, {venue['Suburb']} NSW"
+        state['geocoder'] = OfflineGeocoder.from_sources('nsw_suburbs.json', PREMISES_FILE, cache_path=None)
+
+    def risk_lab():
+        coverage, suburb_keys, _ = state['coverage']
+        years = (int(state['master_df']['Year'].min()), int(state['master_df']['Year'].max()))
+        crime_layer = offence_risk_layer(state['master_df'], coverage, suburb_keys, get_crime_columns(state['master_df']), years)
+        location = state['geocoder'].geocode(state['address'])
+        if location is not None:
+            state['risk_grid'].score_points(location.longitude, location.latitude, crime_layer=crime_layer)
+
+    return {
+        'Mission Control': [('load', load_mission_control), ('compute', mission_control)],
+        'Dossier Tool': [('load', load_cube), ('compute', dossier)],
+        'Crime Map': [
+            ('load', lambda: state.update(topology=SuburbTopology.from_manifest(LOD_MANIFEST_FILE))),
+            ('compute', lambda: state['tensor'].year_frame(state['year'], [state['offence']])),
+            ('view_geojson', lambda: state['topology'].level_for_zoom(SYDNEY_VIEW[2]).to_geojson(view_bounds(*SYDNEY_VIEW))),
+        ],
+        'Temporal Analysis': [
+            ('load', lambda: state.update(crime_table=KeyedCrimeTable.from_parquet('crime_data_processed.parquet'))),
+            ('compute', temporal),
+        ],
+        'Forecasting Lab': [
+            ('load', lambda: state.update(forecasts=pd.read_parquet('forecasts.parquet').set_index(['Suburb', 'Offence']).sort_index())),
+            ('compute', forecasting),
+        ],
+        'Correlation Lab': [('compute', correlation_lab)],
+        'Automated Anomaly': [('compute', lambda: select_anomalies(state['anomaly_scores'], state['year'], 3, 2.0))],
+        'Network Explorer': [
+            ('load', lambda: state.update(network=CrimeNetworkStore.from_parquet('crime_network_edges.parquet', 'crime_network_layouts.parquet'))),
+            ('compute', network),
+        ],
+        'Risk Insights Lab': [('load', load_risk), ('compute', risk_lab)],
+    }
+
+def benchmark_pages(pages=None, repeats=PAGE_REPEATS):
+    """
+    Times every page step as the median of `repeats` calls. A page whose
+    artifacts are missing is skipped, and so is any later page that needs
+    what it failed to load.
+    """
+    records = []
+    for page, workloads in page_workloads().items():
+        # Loaders run even for unselected pages, since later pages share what they load.
+        selected = not pages or page in pages
+        for step_name, function in workloads:
+            if step_name != 'load' and not selected:
+                continue
+            try:
+                wall_s, cpu_s = time_call(function, repeats)
+            except (FileNotFoundError, KeyError) as e:
+                print(f"⚠️ {page} / {step_name}: skipped ({type(e).__name__}: {e}).")
+                break
+            if selected:
+                records.append({'group': 'page', 'name': page, 'step': step_name, 'depth': 0,
+                                'wall_s': round(wall_s, 5), 'cpu_s': round(cpu_s, 5), 'peak_rss_mb': None})
+                print(f"✅ {page} / {step_name}: {wall_s * 1000:,.1f} ms")
+    return records
+
+# --- Part 3: Baselines ---
+def scale_key(data_dir):
+    """Baselines are kept per data scale, read from the generator's manifest."""
+    with open(Path(data_dir) / SYNTHETIC_MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    return f"{manifest['suburbs']}x{manifest['offences']}x{manifest['months']}x{manifest['premises']}-seed{manifest['seed']}"
+
+def load_baselines(path=BASELINES_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(results, key, path=BASELINES_FILE):
+    """
+    Stores these results as the baseline for one scale, with the machine they
+    were measured on. Benchmarks left out of a partial run (--stages, --pages)
+    keep their previous baseline.
+    """
+    baselines = load_baselines(path)
+    previous = pd.DataFrame(baselines.get(key, {}).get('results', []), columns=results.columns)
+    measured = previous.set_index(['group', 'name', 'step']).index.isin(results.set_index(['group', 'name', 'step']).index)
+    merged = pd.concat([previous[~measured], results], ignore_index=True)
+    baselines[key] = {
+        'recorded': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'results': json.loads(merged.to_json(orient='records')),
+    }
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2)
+
+def compare_to_baseline(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Joins the results onto the stored baseline by (group, name, step) and
+    flags metrics that grew by more than `threshold` and by more than the
+    absolute floor for their group.
+    """
+    baseline_df = pd.DataFrame(baseline['results'])
+    report = results.merge(baseline_df[['group', 'name', 'step', 'wall_s', 'cpu_s', 'peak_rss_mb']],
+                           on=['group', 'name', 'step'], how='left', suffixes=('', '_baseline'))
+    report['regressed'] = False
+    for metric in ['wall_s', 'cpu_s', 'peak_rss_mb']:
+        current, base = report[metric].astype('float64'), report[f'{metric}_baseline'].astype('float64')
+        floors = report['group'].map({'pipeline': REGRESSION_FLOORS[metric], 'page': PAGE_REGRESSION_FLOORS.get(metric, np.inf)})
+        report[f'{metric}_change'] = current / base.where(base > 0) - 1
+        report[f'{metric}_regressed'] = (current > base * (1 + threshold)) & (current - base >= floors)
+        report['regressed'] |= report[f'{metric}_regressed']
+    return report
+
+def format_change(value):
+    return '' if pd.isna(value) else f"{value:+.0%}"
+
+def print_report(report):
+    has_baseline = 'regressed' in report
+    table = pd.DataFrame({
+        'group': report['group'],
+        'name': report['name'],
+        'step': ['  ' * int(depth) + name for depth, name in zip(report['depth'], report['step'])],
+        'wall_ms': (report['wall_s'] * 1000).round(1),
+        'cpu_ms': (report['cpu_s'] * 1000).round(1),
+        'peak_mb': report['peak_rss_mb'].astype('float64').round(0),
+    })
+    if has_baseline:
+        table['Δwall'] = report['wall_s_change'].map(format_change)
+        table['Δcpu'] = report['cpu_s_change'].map(format_change)
+        table['Δpeak'] = report['peak_rss_mb_change'].map(format_change)
+        table[''] = report['regressed'].map({True: '⚠️', False: ''})
+    print(table.to_string(index=False))
+
+def run_benchmarks(data_dir=OUTPUT_DIR, stages=None, skip_stages=None, pages=None, skip_pipeline=False, repeats=PAGE_REPEATS,
+                   baselines_path=BASELINES_FILE, save=False, threshold=REGRESSION_THRESHOLD):
+    """
+    Builds every artifact from the synthetic data in `data_dir`, times the
+    pipeline stages and the page computations, and compares them with the
+    stored baseline for the same scale. Returns the number of regressions,
+    or None if the data directory was not generated by generate_synthetic_data.py.
+    """
+    data_dir, baselines_path = Path(data_dir).resolve(), Path(baselines_path).resolve()
+    # Stages write their artifacts into the working directory, so only a generated data directory is accepted.
+    if not (data_dir / SYNTHETIC_MANIFEST_FILE).exists():
+        print(f"❌ {data_dir} has no {SYNTHETIC_MANIFEST_FILE}. Run `python generate_synthetic_data.py --output-dir {data_dir}` first.")
+        return None
+    key = scale_key(data_dir)
+    print(f"--- Benchmarking {key} in {data_dir} ---")
+    os.chdir(data_dir)
+
+    records = [] if skip_pipeline else benchmark_pipeline(stages, skip_stages)
+    print("\n--- Page computations ---")
+    records += benchmark_pages(pages, repeats)
+    results = pd.DataFrame(records, columns=['group', 'name', 'step', 'depth', 'wall_s', 'cpu_s', 'peak_rss_mb'])
+
+    baseline = load_baselines(baselines_path).get(key)
+    report = compare_to_baseline(results, baseline, threshold) if baseline else results
+    print(f"\n--- Results vs. baseline from {baseline['recorded']} ---" if baseline else f"\n--- Results (no baseline stored for {key}) ---")
+    print_report(report)
+
+    n_regressed = int(report['regressed'].sum()) if baseline else 0
+    if baseline:
+        if n_regressed:
+            print(f"\n⚠️ {n_regressed} benchmark(s) regressed by more than {threshold:.0%}.")
+        else:
+            print(f"\n✅ No regressions beyond {threshold:.0%} of the baseline.")
+        if baseline['machine'].get('platform') != platform.platform() or baseline['machine'].get('cpus') != os.cpu_count():
+            print(f"⚠️ The baseline was recorded on another machine ({baseline['machine']['platform']}, {baseline['machine']['cpus']} CPUs).")
+    if save:
+        save_baseline(results, key, baselines_path)
+        print(f"Baseline for {key} saved to {baselines_path}.")
+    return n_regressed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the pipeline stages and page computations on synthetic data against stored baselines.")
+    parser.add_argument('--data-dir', default=OUTPUT_DIR, help="Directory written by generate_synthetic_data.py.")
+    parser.add_argument('--stages', nargs='+', help="Only run these pipeline stages (their inputs must already exist).")
+    parser.add_argument('--skip-stages', nargs='+', help="Leave out these stages, e.g. the slow forecasts at full scale; pages read their previous outputs.")
+    parser.add_argument('--pages', nargs='+', choices=PAGES, help="Only time these pages.")
+    parser.add_argument('--skip-pipeline', action='store_true', help="Time the pages against artifacts already built in the data directory.")
+    parser.add_argument('--repeats', type=int, default=PAGE_REPEATS, help="Calls per page computation; the median is kept.")
+    parser.add_argument('--baselines', default=BASELINES_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the baseline for the data scale.")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help="Relative increase that counts as a regression.")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 if any benchmark regressed.")
+    args = parser.parse_args()
+
+    n_regressed = run_benchmarks(args.data_dir, args.stages, args.skip_stages, args.pages, args.skip_pipeline, args.repeats,
+                                 args.baselines, args.save_baseline, args.threshold)
+    if n_regressed is None or (args.fail_on_regression and n_regressed):
+        sys.exit(1)
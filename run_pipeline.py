@@ -0,0 +1,309 @@
+# run_pipeline.py
+
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import build_suburb_crosswalk
+import build_tiles
+import convert_shapefile
+import fuse_data
+import precompute_anomalies
+import precompute_correlations
+import precompute_crime_network
+import precompute_forecasts
+import precompute_monthly_cube
+import precompute_risk
+import prepare_boundaries
+import prepare_premises
+import process_data
+from src.build_manifest import load_manifest, record_stage, save_manifest, stage_is_current
+from src.instrumentation import HISTORY_FILE, append_run, artifact_stats, collect_steps, new_run_id, step
+
+# Each stage lists the artifacts it reads and writes. Its own script is treated as an
+# input too, so editing a stage's code invalidates its outputs just like new data would.
+# A stage that reads another stage's output depends on it; these edges form the DAG.
+@dataclass
+class Stage:
+    name: str
+    inputs: list
+    outputs: list
+    run: Callable = field(repr=False)
+
+class StageFailed(RuntimeError):
+    """Raised when a stage fails; `stage_name` names the stage that broke the run."""
+
+    def __init__(self, stage_name, error):
+        super().__init__(f"Stage '{stage_name}' failed: {type(error).__name__}: {error}")
+        self.stage_name = stage_name
+
+def run_process_crime(record, full):
+    """
+    Melts the BOCSAR CSV. When the new drop only adds months after the ones
+    recorded for the previous build, and the counts of those earlier months
+    still match their recorded fingerprints, just the new months are appended.
+    BOCSAR revises published months, so a drop with revised history is
+    rebuilt in full instead.
+    """
+    month_cols = process_data.read_month_columns(process_data.INPUT_FILE)
+    previous = (record or {}).get('extra', {})
+    previous_months = previous.get('months', [])
+    previous_fingerprints = previous.get('month_fingerprints', {})
+    new_months = [col for col in month_cols if col not in set(previous_months)]
+    fingerprints = process_data.month_fingerprints(process_data.INPUT_FILE, month_cols)
+
+    can_append = (
+        not full and previous_months and new_months
+        and Path(process_data.OUTPUT_FILE).exists()
+        and month_cols[:len(previous_months)] == previous_months
+    )
+    if can_append:
+        revised = [col for col in previous_months if previous_fingerprints.get(col) != fingerprints[col]]
+        if not previous_fingerprints:
+            print("⚠️ The previous build recorded no month fingerprints to check for revisions; rebuilding in full.")
+            can_append = False
+        elif revised:
+            print(f"⚠️ {len(revised)} previously processed month(s) differ in this drop ({', '.join(revised[:3])}{', ...' if len(revised) > 3 else ''}); rebuilding in full.")
+            can_append = False
+    if can_append:
+        process_data.append_new_months(process_data.INPUT_FILE, process_data.OUTPUT_FILE, new_months)
+    else:
+        process_data.stream_crime_data(process_data.INPUT_FILE, process_data.OUTPUT_FILE)
+    return {'months': month_cols, 'month_fingerprints': fingerprints}
+
+def build_stages():
+    """The data-preparation stages, in dependency order."""
+    return [
+        Stage(
+            name='process_crime',
+            inputs=[process_data.INPUT_FILE, 'process_data.py', 'src/crime_index.py'],
+            outputs=[process_data.OUTPUT_FILE, process_data.ROW_INDEX_FILE],
+            run=run_process_crime,
+        ),
+        Stage(
+            name='boundaries',
+            inputs=[prepare_boundaries.SHAPEFILE_PATH, 'prepare_boundaries.py', 'src/geodata.py'],
+            outputs=[prepare_boundaries.OUTPUT_FILE],
+            run=lambda record, full: prepare_boundaries.create_boundaries_dataset(),
+        ),
+        Stage(
+            name='suburb_geojson',
+            inputs=[convert_shapefile.BOUNDARIES_PATH, 'convert_shapefile.py', 'src/geodata.py', 'src/suburb_topology.py'],
+            outputs=[convert_shapefile.OUTPUT_GEOJSON_PATH, *convert_shapefile.LOD_OUTPUT_PATHS],
+            run=lambda record, full: convert_shapefile.create_geojson_with_centroids(),
+        ),
+        Stage(
+            name='premises',
+            inputs=[prepare_premises.PREMISES_CSV_FILE, 'prepare_premises.py', 'src/geodata.py'],
+            outputs=[prepare_premises.OUTPUT_FILE],
+            run=lambda record, full: prepare_premises.create_premises_dataset(),
+        ),
+        Stage(
+            name='suburb_crosswalk',
+            inputs=[build_suburb_crosswalk.PROCESSED_CRIME_FILE, build_suburb_crosswalk.PREMISES_FILE, build_suburb_crosswalk.BOUNDARIES_PATH, 'build_suburb_crosswalk.py', 'src/name_resolution.py'],
+            outputs=[build_suburb_crosswalk.OUTPUT_FILE],
+            run=lambda record, full: build_suburb_crosswalk.create_suburb_crosswalk(),
+        ),
+        Stage(
+            name='master_dataset',
+            inputs=[fuse_data.PROCESSED_CRIME_FILE, fuse_data.PREMISES_FILE, fuse_data.BOUNDARIES_PATH, fuse_data.CROSSWALK_PATH, 'fuse_data.py', 'src/geodata.py', 'src/name_resolution.py'],
+            outputs=[fuse_data.OUTPUT_FILE],
+            run=lambda record, full: fuse_data.create_master_dataset(),
+        ),
+        Stage(
+            name='risk_grid',
+            inputs=[precompute_risk.PROCESSED_CRIME_FILE, precompute_risk.PREMISES_FILE, precompute_risk.BOUNDARIES_PATH, precompute_risk.CROSSWALK_PATH, 'precompute_risk.py', 'src/geodata.py', 'src/risk_grid.py', 'src/regions.py', 'src/name_resolution.py'],
+            outputs=[precompute_risk.OUTPUT_FILE, precompute_risk.COVERAGE_FILE],
+            run=lambda record, full: precompute_risk.create_risk_grid(),
+        ),
+        Stage(
+            name='vector_tiles',
+            inputs=[build_tiles.GEOJSON_FILE, build_tiles.RISK_GRID_FILE, 'build_tiles.py', 'src/vector_tiles.py', 'src/risk_grid.py'],
+            outputs=[build_tiles.SUBURB_TILES_FILE, build_tiles.RISK_GRID_TILES_FILE],
+            run=lambda record, full: build_tiles.create_vector_tiles(),
+        ),
+        Stage(
+            name='anomaly_scores',
+            inputs=[precompute_anomalies.MASTER_FILE, 'precompute_anomalies.py', 'src/anomalies.py', 'src/analytics.py'],
+            outputs=[precompute_anomalies.OUTPUT_FILE],
+            run=lambda record, full: precompute_anomalies.create_anomaly_store(),
+        ),
+        Stage(
+            name='correlations',
+            inputs=[precompute_correlations.MASTER_FILE, 'precompute_correlations.py', 'src/correlations.py', 'src/analytics.py'],
+            outputs=[precompute_correlations.OUTPUT_FILE],
+            run=lambda record, full: precompute_correlations.create_correlation_store(),
+        ),
+        Stage(
+            name='crime_network',
+            inputs=[precompute_crime_network.MASTER_FILE, precompute_crime_network.GEOJSON_FILE, 'precompute_crime_network.py', 'src/crime_network.py', 'src/regions.py', 'src/analytics.py'],
+            outputs=[precompute_crime_network.EDGES_FILE, precompute_crime_network.LAYOUTS_FILE],
+            run=lambda record, full: precompute_crime_network.create_crime_network(),
+        ),
+        Stage(
+            name='monthly_cube',
+            inputs=[precompute_monthly_cube.PROCESSED_CRIME_FILE, 'precompute_monthly_cube.py', 'src/monthly_cube.py'],
+            outputs=[precompute_monthly_cube.OUTPUT_FILE, precompute_monthly_cube.INDEX_FILE],
+            run=lambda record, full: precompute_monthly_cube.create_monthly_cube(),
+        ),
+        Stage(
+            name='forecasts',
+            inputs=[precompute_forecasts.MASTER_FILE, precompute_monthly_cube.OUTPUT_FILE, precompute_monthly_cube.INDEX_FILE, 'precompute_forecasts.py', 'src/forecasting.py', 'src/analytics.py', 'src/monthly_cube.py'],
+            outputs=[precompute_forecasts.OUTPUT_FILE],
+            run=lambda record, full: precompute_forecasts.create_forecast_store(),
+        ),
+    ]
+
+def stage_dependencies(stages):
+    """
+    Maps each stage name to the names of the stages producing its inputs.
+    Raises ValueError if two stages write the same artifact or the stages
+    form a cycle.
+    """
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            if str(path) in producers:
+                raise ValueError(f"'{path}' is written by both '{producers[str(path)]}' and '{stage.name}'.")
+            producers[str(path)] = stage.name
+    dependencies = {stage.name: {producers[str(path)] for path in stage.inputs if str(path) in producers} for stage in stages}
+
+    resolved, remaining = set(), dict(dependencies)
+    while remaining:
+        ready = [name for name, upstream in remaining.items() if upstream <= resolved]
+        if not ready:
+            raise ValueError(f"Stages form a dependency cycle: {', '.join(sorted(remaining))}")
+        resolved.update(ready)
+        for name in ready:
+            del remaining[name]
+    return dependencies
+
+def _init_worker(crime_csv):
+    # Workers re-import the stage modules, so the --crime-csv override is applied again here.
+    process_data.INPUT_FILE = crime_csv
+
+def run_stage(stage_name, record, full):
+    """
+    Runs one stage in a worker process and returns its (extra, steps): a
+    record for the stage itself followed by those of its instrumented blocks.
+    """
+    stage = next(stage for stage in build_stages() if stage.name == stage_name)
+    collect_steps() # Drop anything left over from a previous stage in this worker
+    with step(stage_name):
+        extra = stage.run(record, full)
+    *inner_steps, stage_step = collect_steps()
+    return extra, [stage_step, *inner_steps]
+
+def stage_history(stage, status, steps):
+    """History entry for one stage: its steps plus the sizes and row counts of what it read and wrote."""
+    # A failed stage's outputs are whatever an earlier build left behind, so they are not recorded.
+    inputs, outputs = artifact_stats(stage.inputs), artifact_stats(stage.outputs) if status == 'ok' else {}
+    # The stage-level step counts rows across the Parquet artifacts it read and wrote.
+    steps[0]['rows_in'] = sum(stats['rows'] or 0 for stats in inputs.values())
+    steps[0]['rows_out'] = sum(stats['rows'] or 0 for stats in outputs.values())
+    return {'stage': stage.name, 'status': status, 'steps': steps, 'inputs': inputs, 'outputs': outputs}
+
+def run_pipeline(full=False, only=None, dry_run=False, workers=None):
+    """
+    Runs every stage whose inputs or outputs changed since it last completed.
+    Stages start as soon as the stages producing their inputs have finished,
+    so independent ones run side by side in a process pool and a full
+    refresh takes about as long as the critical path. The first failure
+    stops new stages from starting and is raised as StageFailed. Every run
+    that executes stages is appended to the history file read by
+    pipeline_report.py.
+    """
+    manifest = load_manifest()
+    stages = build_stages()
+    if only:
+        stages = [stage for stage in stages if stage.name in only]
+    # Dependencies outside an --only selection are taken as already built.
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    workers = workers or os.cpu_count() or 1
+
+    pending, running, done = [stage.name for stage in stages], {}, set()
+    rerun, stage_times, failure = set(), {}, None
+    history = {'run_id': new_run_id(), 'full': full, 'only': only, 'workers': workers, 'stages': [], 'skipped': []}
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(process_data.INPUT_FILE,)) as executor:
+        while pending or running:
+            # --- Part 1: Start every stage whose upstream stages are done ---
+            for name in [name for name in pending if failure is None and dependencies[name] <= done]:
+                pending.remove(name)
+                stage = by_name[name]
+                # In a dry run nothing is rebuilt, so anything downstream of a stale stage is reported as stale too.
+                stale_upstream = dry_run and dependencies[name] & rerun
+                if not full and not stale_upstream and stage_is_current(name, stage.inputs, stage.outputs, manifest):
+                    print(f"⏭️  {name}: up to date, skipping.")
+                    history['skipped'].append(name)
+                    done.add(name)
+                    continue
+                if dry_run:
+                    print(f"🔁 {name}: would run.")
+                    rerun.add(name)
+                    done.add(name)
+                    continue
+
+                missing_inputs = [path for path in stage.inputs if not Path(path).exists()]
+                if missing_inputs:
+                    failure = StageFailed(name, FileNotFoundError(f"missing inputs: {', '.join(map(str, missing_inputs))}"))
+                    break
+                print(f"\n▶️  {name}: running...")
+                running[executor.submit(run_stage, name, manifest['stages'].get(name), full)] = (name, time.perf_counter())
+            if failure is not None:
+                pending.clear()
+            if not running:
+                continue
+
+            # --- Part 2: Record finished stages as they complete ---
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, submitted_at = running.pop(future)
+                stage = by_name[name]
+                try:
+                    extra, steps = future.result()
+                except Exception as e:
+                    print(f"❌ {name}: failed with {type(e).__name__}: {e}")
+                    # The worker's step records are lost with the exception; the parent's timing stands in.
+                    failed_step = {'step': name, 'depth': 0, 'status': 'failed', 'wall_s': round(time.perf_counter() - submitted_at, 3)}
+                    history['stages'].append(stage_history(stage, 'failed', [failed_step]))
+                    if failure is None:
+                        failure = StageFailed(name, e)
+                        failure.__cause__ = e
+                    continue
+                record_stage(name, stage.inputs, stage.outputs, manifest, extra=extra)
+                save_manifest(manifest)
+                history['stages'].append(stage_history(stage, 'ok', steps))
+                stage_times[name] = seconds = steps[0]['wall_s']
+                done.add(name)
+                print(f"✅ {name}: finished in {seconds:.1f}s.")
+
+    save_manifest(manifest)
+    if history['stages']:
+        history.update(wall_s=round(time.perf_counter() - start_time, 3), status='failed' if failure else 'ok',
+                       failed_stage=failure.stage_name if failure else None)
+        append_run(history)
+        print(f"Run recorded in {HISTORY_FILE}; `python pipeline_report.py` compares it with earlier runs.")
+    if failure is not None:
+        print(f"\n❌ Pipeline stopped: {failure}")
+        raise failure
+    if stage_times:
+        print(f"\n✅ Ran {len(stage_times)} stage(s) in {time.perf_counter() - start_time:.1f}s "
+              f"({sum(stage_times.values()):.1f}s of stage time across {workers} worker(s)).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally rebuild the data artifacts used by the app.")
+    parser.add_argument('--crime-csv', default=process_data.INPUT_FILE, help="BOCSAR wide CSV for this refresh.")
+    parser.add_argument('--full', action='store_true', help="Ignore the build manifest and rebuild every stage from scratch.")
+    parser.add_argument('--only', nargs='+', help="Restrict the run to these stage names.")
+    parser.add_argument('--dry-run', action='store_true', help="Report which stages are stale without running them.")
+    parser.add_argument('--workers', type=int, help="Stages run at the same time (default: all cores).")
+    args = parser.parse_args()
+
+    process_data.INPUT_FILE = args.crime_csv
+    run_pipeline(full=args.full, only=args.only, dry_run=args.dry_run, workers=args.workers)
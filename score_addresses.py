@@ -0,0 +1,168 @@
+# score_addresses.py
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.geocoder import GEOCODE_CACHE_FILE, OfflineGeocoder
+from src.geodata import PREMISES_FILE
+from src.risk_grid import RiskGrid, apply_temporal_bonus, risk_band, temporal_risk_factors
+
+RISK_GRID_FILE = 'risk_grid.parquet'
+GEOJSON_FILE = 'nsw_suburbs.json'
+LOCAL_TIMEZONE = 'Australia/Sydney'
+CHUNK_ROWS = 100_000 # Rows handed to a worker at a time
+# A clock time followed by 'Z' or a UTC offset such as +11:00 or +1000.
+UTC_OFFSET_SUFFIX = r'\d:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}:?\d{2})$'
+
+# Loaded once per worker process by _init_worker.
+_risk_grid = None
+_geocoder = None
+_allow_remote = False
+
+def _init_worker(needs_geocoder, allow_remote):
+    global _risk_grid, _geocoder, _allow_remote
+    _risk_grid = RiskGrid.from_parquet(RISK_GRID_FILE)
+    if needs_geocoder:
+        _geocoder = OfflineGeocoder.from_sources(GEOJSON_FILE, PREMISES_FILE, cache_path=GEOCODE_CACHE_FILE)
+    _allow_remote = allow_remote
+
+def _local_times(timestamps):
+    """
+    Parses timestamps as Australia/Sydney local time. Values carrying a UTC
+    offset are converted (their offsets may differ across a DST change);
+    naive values are assumed to already be local and are localized.
+    """
+    if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+        return timestamps.dt.tz_convert(LOCAL_TIMEZONE)
+    if pd.api.types.is_datetime64_dtype(timestamps):
+        return timestamps.dt.tz_localize(LOCAL_TIMEZONE, ambiguous='NaT', nonexistent='shift_forward')
+    text = timestamps.astype('string').str.strip()
+    has_offset = text.str.contains(UTC_OFFSET_SUFFIX, regex=True).fillna(False).astype(bool)
+    aware = pd.to_datetime(text.where(has_offset), errors='coerce', utc=True, format='ISO8601').dt.tz_convert(LOCAL_TIMEZONE)
+    naive = pd.to_datetime(text.where(~has_offset), errors='coerce')
+    naive = naive.dt.tz_localize(LOCAL_TIMEZONE, ambiguous='NaT', nonexistent='shift_forward')
+    return aware.where(has_offset, naive)
+
+def score_chunk(chunk, lat_col, lon_col, address_col, time_col):
+    """
+    Scores one block of rows with array operations: grid lookup, base risk and
+    the same temporal bonus the Risk Insights Lab applies to a single address.
+    """
+    chunk = chunk.reset_index(drop=True)
+
+    if address_col is not None:
+        # Each distinct address is geocoded once per chunk (and cached on disk across runs).
+        resolved = {address: _geocoder.geocode(address, allow_remote=_allow_remote) for address in chunk[address_col].dropna().unique()}
+        locations = chunk[address_col].map(resolved)
+        chunk['Latitude'] = locations.map(lambda loc: loc.latitude if loc else np.nan)
+        chunk['Longitude'] = locations.map(lambda loc: loc.longitude if loc else np.nan)
+        chunk['GeocodeSource'] = locations.map(lambda loc: loc.source if loc else 'unresolved')
+        lat_col, lon_col = 'Latitude', 'Longitude'
+
+    lat = pd.to_numeric(chunk[lat_col], errors='coerce').to_numpy(dtype='float64')
+    lon = pd.to_numeric(chunk[lon_col], errors='coerce').to_numpy(dtype='float64')
+    chunk[lat_col], chunk[lon_col] = lat, lon
+    scores = _risk_grid.score_points(np.nan_to_num(lon, nan=-999.0), np.nan_to_num(lat, nan=-999.0))
+
+    if time_col is not None:
+        local_times = _local_times(chunk[time_col])
+    else:
+        local_times = pd.Series(pd.Timestamp.now(tz=LOCAL_TIMEZONE), index=chunk.index)
+    factors = temporal_risk_factors(local_times.dt.weekday.to_numpy(), local_times.dt.hour.to_numpy())
+    # Rows with an unparseable timestamp get no temporal bonus rather than a guessed one.
+    temporal_bonus = np.where(local_times.isna().to_numpy(), 0.0, factors['bonus'])
+
+    chunk['grid_id'] = scores['grid_id'].to_numpy()
+    chunk['CrimeRisk'] = scores['CrimeRisk'].to_numpy()
+    chunk['VenueRisk'] = scores['VenueRisk'].to_numpy()
+    chunk['BaseRisk'] = scores['BaseRisk'].to_numpy()
+    chunk['TemporalBonus'] = temporal_bonus
+    chunk['RiskScore'] = apply_temporal_bonus(chunk['BaseRisk'].to_numpy(), temporal_bonus)
+    chunk['RiskBand'] = np.where(chunk['grid_id'] >= 0, risk_band(chunk['RiskScore'].to_numpy()), 'Outside grid')
+    return chunk
+
+def read_in_chunks(input_path, chunk_rows):
+    """
+    Yields DataFrames of at most `chunk_rows` rows from a CSV or Parquet file.
+    CSV columns are read as text, so a column that is empty in one chunk has
+    the same type as in the others; score_chunk parses coordinates and
+    timestamps itself.
+    """
+    if Path(input_path).suffix.lower() == '.parquet':
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_rows, dtype=str)
+
+def score_file(input_path, output_path, lat_col='Latitude', lon_col='Longitude', address_col=None, time_col=None,
+               workers=None, chunk_rows=CHUNK_ROWS, allow_remote=False):
+    """
+    Scores every row of the input and streams the results to a Parquet file.
+    Chunks are sharded across worker processes. At most two chunks per worker
+    are in flight, and results are written in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    print(f"--- Scoring {input_path} with {workers} worker(s) ---")
+    start_time = time.perf_counter()
+    rows_scored = 0
+    writer = None
+
+    def write(scored_chunk):
+        nonlocal writer, rows_scored
+        table = pa.Table.from_pandas(scored_chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        rows_scored += len(scored_chunk)
+        elapsed = time.perf_counter() - start_time
+        print(f"Scored {rows_scored:,} rows ({rows_scored / max(elapsed, 1e-9):,.0f} rows/s)...")
+
+    chunks = read_in_chunks(input_path, chunk_rows)
+    try:
+        if workers == 1:
+            _init_worker(address_col is not None, allow_remote)
+            for chunk in chunks:
+                write(score_chunk(chunk, lat_col, lon_col, address_col, time_col))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(address_col is not None, allow_remote)) as executor:
+                in_flight = []
+                for chunk in chunks:
+                    in_flight.append(executor.submit(score_chunk, chunk, lat_col, lon_col, address_col, time_col))
+                    if len(in_flight) >= workers * 2:
+                        write(in_flight.pop(0).result())
+                for future in in_flight:
+                    write(future.result())
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n✅ Scored {rows_scored:,} rows in {elapsed:.1f}s ({rows_scored / max(elapsed, 1e-9):,.0f} rows/s). Results saved to {output_path}.")
+    return rows_scored
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch risk scoring for a CSV or Parquet file of sites.")
+    parser.add_argument('input', help="CSV or Parquet file with coordinates or addresses.")
+    parser.add_argument('--output', default='risk_scores.parquet')
+    parser.add_argument('--lat-col', default='Latitude')
+    parser.add_argument('--lon-col', default='Longitude')
+    parser.add_argument('--address-col', help="Geocode this column instead of reading coordinates.")
+    parser.add_argument('--time-col', help="Timestamp column for the temporal bonus (default: the current time).")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores).")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--allow-remote', action='store_true', help="Fall back to Nominatim for addresses not found locally.")
+    args = parser.parse_args()
+
+    score_file(
+        args.input, args.output,
+        lat_col=args.lat_col, lon_col=args.lon_col, address_col=args.address_col, time_col=args.time_col,
+        workers=args.workers, chunk_rows=args.chunk_rows, allow_remote=args.allow_remote,
+    )
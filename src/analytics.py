@@ -0,0 +1,135 @@
+# src/analytics.py
+
+import numpy as np
+import pandas as pd
+
+SOCIO_ECONOMIC_COLUMNS = ['Index of Relative Socio-economic Advantage and Disadvantage', 'Index of Economic Resources', 'Index of Education and Occupation']
+NON_CRIME_COLUMNS = ['Suburb', 'Year', 'Suburb_Clean', 'Suburb_For_Join', 'geometry', 'VenueCount'] + SOCIO_ECONOMIC_COLUMNS
+
+def get_crime_columns(master_df):
+    """Offence columns of the master dataset, in file order."""
+    return [col for col in master_df.columns if col not in NON_CRIME_COLUMNS]
+
+class CrimeTensor:
+    """
+    The master dataset as a dense suburb x year x offence array of incident
+    counts, with index maps for each axis. Socio-economic indices sit in a
+    matching suburb x year x index array and venue counts in a per-suburb
+    array. Selecting a suburb, a year or an offence is an array index, not a
+    boolean scan over every row of the DataFrame. `suburb_keys` holds each
+    suburb's Suburb_Clean join key for matching against the boundary names.
+
+    Years span the full range between the first and last year in the data.
+    `present` marks the (suburb, year) pairs that have a row in the master
+    dataset, so the frames returned here match what filtering the DataFrame
+    would have produced.
+    """
+
+    def __init__(self, suburbs, suburb_keys, years, offences, counts, present, socio_columns, socio, venue_counts):
+        self.suburbs = suburbs
+        self.suburb_keys = suburb_keys
+        self.years = years
+        self.offences = offences
+        self.counts = counts
+        self.present = present
+        self.socio_columns = socio_columns
+        self.socio = socio
+        self.venue_counts = venue_counts
+
+        self.suburb_index = {suburb: i for i, suburb in enumerate(suburbs)}
+        self.year_index = {int(year): i for i, year in enumerate(years)}
+        self.offence_index = {offence: i for i, offence in enumerate(offences)}
+
+    @classmethod
+    def from_master(cls, master_df):
+        offences = get_crime_columns(master_df)
+        socio_columns = [col for col in SOCIO_ECONOMIC_COLUMNS if col in master_df.columns]
+        suburbs = np.sort(master_df['Suburb'].astype(str).unique())
+        years = np.arange(master_df['Year'].min(), master_df['Year'].max() + 1)
+
+        suburb_pos = np.searchsorted(suburbs, master_df['Suburb'].astype(str).to_numpy())
+        year_pos = (master_df['Year'] - years[0]).to_numpy()
+
+        # Masters written before the crosswalk have no Suburb_Clean; fall back to the old upper-cased key.
+        suburb_keys = np.char.upper(np.char.strip(suburbs.astype(str))).astype(object)
+        if 'Suburb_Clean' in master_df.columns:
+            suburb_keys[suburb_pos] = master_df['Suburb_Clean'].astype(str).to_numpy()
+
+        counts = np.zeros((len(suburbs), len(years), len(offences)))
+        counts[suburb_pos, year_pos] = master_df[offences].to_numpy(dtype='float64')
+        present = np.zeros((len(suburbs), len(years)), dtype=bool)
+        present[suburb_pos, year_pos] = True
+
+        socio = np.full((len(suburbs), len(years), len(socio_columns)), np.nan)
+        if socio_columns:
+            socio[suburb_pos, year_pos] = master_df[socio_columns].to_numpy(dtype='float64')
+
+        venue_counts = np.zeros(len(suburbs))
+        if 'VenueCount' in master_df.columns:
+            venue_counts[suburb_pos] = master_df['VenueCount'].to_numpy(dtype='float64')
+
+        return cls(suburbs, suburb_keys, years, offences, counts, present, socio_columns, socio, venue_counts)
+
+    # --- Index helpers ---
+    def available_years(self):
+        """Years that have at least one suburb row."""
+        return [int(year) for year in self.years[self.present.any(axis=0)]]
+
+    def _offence_positions(self, offences):
+        offences = self.offences if offences is None else offences
+        return list(offences), [self.offence_index[offence] for offence in offences]
+
+    # --- Slices ---
+    def suburb_frame(self, suburb, offences=None):
+        """One suburb's annual counts: Year, Suburb and one column per offence."""
+        offences, offence_pos = self._offence_positions(offences)
+        s = self.suburb_index.get(suburb)
+        if s is None:
+            return pd.DataFrame(columns=['Year', 'Suburb'] + offences)
+        year_mask = self.present[s]
+        frame = pd.DataFrame(self.counts[s][year_mask][:, offence_pos], columns=offences)
+        frame.insert(0, 'Suburb', suburb)
+        frame.insert(0, 'Year', self.years[year_mask])
+        return frame
+
+    def year_frame(self, year, offences=None, include_side_data=False):
+        """
+        Every suburb's counts for one year: Suburb, its Suburb_Clean join key
+        and one column per offence, optionally with the socio-economic indices
+        and VenueCount.
+        """
+        offences, offence_pos = self._offence_positions(offences)
+        y = self.year_index.get(int(year))
+        if y is None:
+            return pd.DataFrame(columns=['Suburb', 'Suburb_Clean'] + offences)
+        suburb_mask = self.present[:, y]
+        frame = pd.DataFrame(self.counts[suburb_mask, y][:, offence_pos], columns=offences)
+        frame.insert(0, 'Suburb', self.suburbs[suburb_mask])
+        frame.insert(1, 'Suburb_Clean', self.suburb_keys[suburb_mask])
+        if include_side_data:
+            for k, column in enumerate(self.socio_columns):
+                frame[column] = self.socio[suburb_mask, y, k]
+            frame['VenueCount'] = self.venue_counts[suburb_mask]
+        return frame
+
+    # --- Aggregates ---
+    def year_totals(self, offences=None):
+        """State-wide totals per year: Year plus one column per offence."""
+        offences, offence_pos = self._offence_positions(offences)
+        year_mask = self.present.any(axis=0)
+        frame = pd.DataFrame(self.counts[:, year_mask][:, :, offence_pos].sum(axis=0), columns=offences)
+        frame.insert(0, 'Year', self.years[year_mask])
+        return frame
+
+    def offence_totals(self, year=None):
+        """Total incidents per offence, for one year or across all years."""
+        if year is None:
+            totals = self.counts.sum(axis=(0, 1))
+        else:
+            totals = self.counts[:, self.year_index[int(year)]].sum(axis=0)
+        return pd.Series(totals, index=self.offences)
+
+    def observation_matrix(self):
+        """(suburb-year rows x offences) matrix of every row present in the master data."""
+        return self.counts[self.present]
+
@@ -0,0 +1,78 @@
+# src/anomalies.py
+
+import numpy as np
+import pandas as pd
+from src.analytics import CrimeTensor
+
+MAX_BASELINE_YEARS = 10
+MIN_STORED_Z_SCORE = 1.0 # Lowest sensitivity offered by the Automated Anomaly page
+
+
+def compute_anomaly_scores(master_df, max_baseline_years=MAX_BASELINE_YEARS, min_z_score=MIN_STORED_Z_SCORE):
+    """
+    Baseline mean, standard deviation and z-score of every (suburb, offence,
+    target year, baseline length) in one vectorized pass.
+
+    The master data is laid out as a dense suburb x year x offence array
+    (see CrimeTensor). Running sums, sums of squares and row counts along the year axis give the
+    statistics of any trailing window by subtraction. As with the original
+    per-request groupby, only years in which a suburb has a row count towards
+    its baseline, and std uses ddof=1. Only rows that could ever be flagged
+    (above the baseline mean with z > min_z_score) are returned.
+    """
+    tensor = CrimeTensor.from_master(master_df)
+    crime_cols, suburbs, years = tensor.offences, tensor.suburbs, tensor.years
+    values, present = tensor.counts, tensor.present
+
+    # Prefix sums with a leading zero, so the window [a, b) is cumsum[b] - cumsum[a].
+    def prefix(array):
+        return np.concatenate([np.zeros_like(array[:, :1]), np.cumsum(array, axis=1)], axis=1)
+    cum_sum, cum_sq, cum_count = prefix(values), prefix(values ** 2), prefix(present[..., None].astype('float64'))
+
+    target_index = np.arange(len(years))
+    results = []
+    for baseline_years in range(1, max_baseline_years + 1):
+        window_start = np.maximum(target_index - baseline_years, 0)
+        count = cum_count[:, target_index] - cum_count[:, window_start]
+        total = cum_sum[:, target_index] - cum_sum[:, window_start]
+        total_sq = cum_sq[:, target_index] - cum_sq[:, window_start]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            variance = (total_sq - total * mean) / (count - 1)
+            # Sums of squares leave rounding noise where the baseline is flat; treat that as zero spread.
+            variance = np.where(variance > 1e-9 * (total_sq / count + 1), variance, 0.0)
+            std = np.where(count >= 2, np.sqrt(variance), 0.0)
+            z_score = np.where(std > 0, (values - mean) / std, 0.0)
+
+        flagged = present[..., None] & (z_score > min_z_score) & (values > mean)
+        suburb_pos, year_pos, crime_pos = np.nonzero(flagged)
+        results.append(pd.DataFrame({
+            'Year': years[year_pos].astype('int16'),
+            'Baseline': np.full(len(suburb_pos), baseline_years, dtype='int8'),
+            'Suburb': suburbs[suburb_pos],
+            'Offence': np.asarray(crime_cols)[crime_pos],
+            'Incidents': values[suburb_pos, year_pos, crime_pos].astype('float32'),
+            'BaselineMean': mean[suburb_pos, year_pos, crime_pos].astype('float32'),
+            'BaselineStd': std[suburb_pos, year_pos, crime_pos].astype('float32'),
+            'ZScore': z_score[suburb_pos, year_pos, crime_pos].astype('float32'),
+        }))
+
+    scores = pd.concat(results, ignore_index=True)
+    scores['Suburb'] = scores['Suburb'].astype('category')
+    scores['Offence'] = pd.Categorical(scores['Offence'], categories=crime_cols)
+    return scores.sort_values(['Year', 'Baseline', 'ZScore'], ascending=[True, True, False], ignore_index=True)
+
+def select_anomalies(scores, target_year, baseline_years, std_dev_threshold, min_incidents=0):
+    """
+    Anomalies for one year and baseline length above a z-score threshold,
+    strongest first. The store is sorted by (Year, Baseline), so the matching
+    block is found by binary search instead of a scan.
+    """
+    year_values = scores['Year'].to_numpy()
+    year_start, year_stop = np.searchsorted(year_values, target_year, side='left'), np.searchsorted(year_values, target_year, side='right')
+    baseline_values = scores['Baseline'].to_numpy()[year_start:year_stop]
+    start = year_start + np.searchsorted(baseline_values, baseline_years, side='left')
+    stop = year_start + np.searchsorted(baseline_values, baseline_years, side='right')
+    block = scores.iloc[start:stop]
+    return block[(block['ZScore'] > std_dev_threshold) & (block['Incidents'] > min_incidents)]
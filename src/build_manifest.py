@@ -0,0 +1,91 @@
+# src/build_manifest.py
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+MANIFEST_FILE = 'build_manifest.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# A shapefile is only usable together with its sidecar files, so they are hashed as one artifact.
+SHAPEFILE_SIDECARS = ['.shp', '.shx', '.dbf', '.prj', '.cpg']
+
+def expand_artifact(path):
+    """Returns every file that makes up an artifact (a shapefile expands to its sidecars)."""
+    path = Path(path)
+    if path.suffix.lower() == '.shp':
+        return [path.with_suffix(ext) for ext in SHAPEFILE_SIDECARS if path.with_suffix(ext).exists()]
+    return [path]
+
+def load_manifest(manifest_path=MANIFEST_FILE):
+    """Loads the build manifest, or an empty one if no build has been recorded yet."""
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'files': {}, 'stages': {}}
+
+def save_manifest(manifest, manifest_path=MANIFEST_FILE):
+    """Writes the manifest atomically so an interrupted run never leaves a truncated file."""
+    tmp_path = Path(f"{manifest_path}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(manifest_path)
+
+def file_hash(path, manifest):
+    """
+    SHA-256 of a single file. The digest is cached in the manifest against the
+    file's size and mtime, so unchanged multi-GB inputs are not re-read.
+    """
+    path = Path(path)
+    stat = path.stat()
+    cached = manifest['files'].get(str(path))
+    if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+        return cached['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    manifest['files'][str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+def artifact_hash(path, manifest):
+    """Content hash of an artifact, or None if any of its files is missing."""
+    files = expand_artifact(path)
+    if not files or not all(f.exists() for f in files):
+        return None
+    if len(files) == 1:
+        return file_hash(files[0], manifest)
+    combined = hashlib.sha256()
+    for f in files:
+        combined.update(f.name.encode())
+        combined.update(file_hash(f, manifest).encode())
+    return combined.hexdigest()
+
+def hash_artifacts(paths, manifest):
+    """Maps each artifact path to its current content hash."""
+    return {str(path): artifact_hash(path, manifest) for path in paths}
+
+def stage_is_current(stage_name, inputs, outputs, manifest):
+    """
+    A stage is current when its recorded input hashes match the inputs on disk
+    and its outputs still exist with the hashes it last wrote.
+    """
+    record = manifest['stages'].get(stage_name)
+    if record is None:
+        return False
+    current_outputs = hash_artifacts(outputs, manifest)
+    if any(digest is None for digest in current_outputs.values()):
+        return False
+    return record['inputs'] == hash_artifacts(inputs, manifest) and record['outputs'] == current_outputs
+
+def record_stage(stage_name, inputs, outputs, manifest, extra=None):
+    """Stores the input and output hashes of a stage that has just completed."""
+    manifest['stages'][stage_name] = {
+        'inputs': hash_artifacts(inputs, manifest),
+        'outputs': hash_artifacts(outputs, manifest),
+        'completed_at': datetime.now().isoformat(timespec='seconds'),
+        'extra': extra or {},
+    }
@@ -0,0 +1,97 @@
+# src/correlations.py
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+TOP_OUTLIERS = 2 # High-residual suburbs kept per (year, factor, offence)
+
+def correlation_factors(crime_tensor):
+    """Socio-economic factors offered by the Correlation Lab: the ABS indices plus VenueCount."""
+    return list(crime_tensor.socio_columns) + ['VenueCount']
+
+def compute_correlation_store(crime_tensor, top_outliers=TOP_OUTLIERS):
+    """
+    Pearson correlation, OLS slope and intercept of every offence on every
+    socio-economic factor, for every year, plus the suburbs with the largest
+    positive residuals.
+
+    Within a year the factors form an (S x K) matrix X and the offences an
+    (S x O) matrix Y. Each factor column is centred, and a mask drops suburbs
+    where that factor is missing (pairwise deletion, as pandas .corr does). All
+    K x O sums of products are then a few matrix multiplications, and the
+    residuals of all K x O fits are one broadcast.
+    """
+    factors = correlation_factors(crime_tensor)
+    offences = np.asarray(crime_tensor.offences, dtype=object)
+    frames = []
+
+    for y, year in enumerate(crime_tensor.years):
+        suburb_mask = crime_tensor.present[:, y]
+        if suburb_mask.sum() < 2:
+            continue
+        suburbs = crime_tensor.suburbs[suburb_mask]
+        x = np.column_stack([crime_tensor.socio[suburb_mask, y], crime_tensor.venue_counts[suburb_mask]])
+        y_values = crime_tensor.counts[suburb_mask, y]
+
+        valid = ~np.isnan(x)
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning) # Factors with no values in a year give all-NaN columns
+            x_centered = np.where(valid, x - np.nanmean(x, axis=0), 0.0)
+            y_centered = y_values - y_values.mean(axis=0)
+            weights = valid.astype('float64')
+
+            n = weights.sum(axis=0)[:, None] # (K, 1)
+            sum_x = x_centered.sum(axis=0)[:, None]
+            sum_xx = (x_centered ** 2).sum(axis=0)[:, None]
+            sum_y = weights.T @ y_centered # (K, O): sums over the suburbs valid for each factor
+            sum_yy = weights.T @ y_centered ** 2
+            sum_xy = x_centered.T @ y_centered
+
+            covariance = sum_xy - sum_x * sum_y / n
+            variance_x = sum_xx - sum_x ** 2 / n
+            variance_y = sum_yy - sum_y ** 2 / n
+            correlation = covariance / np.sqrt(variance_x * variance_y)
+            slope = covariance / variance_x
+            # Back to the original units: intercept = mean(y) - slope * mean(x) over the valid suburbs.
+            mean_x = (sum_x / n) + np.nanmean(x, axis=0)[:, None]
+            mean_y = (sum_y / n) + y_values.mean(axis=0)[None, :]
+            intercept = mean_y - slope * mean_x
+
+            residuals = y_values[:, None, :] - (intercept[None] + slope[None] * x[:, :, None]) # (S, K, O)
+        residuals = np.where(valid[:, :, None] & np.isfinite(residuals), residuals, -np.inf)
+
+        k = min(top_outliers, len(suburbs))
+        top = np.argsort(-residuals, axis=0, kind='stable')[:k] # (k, K, O); ties keep suburb order, like nlargest
+        top_residuals = np.take_along_axis(residuals, top, axis=0)
+
+        factor_pos, offence_pos = np.meshgrid(np.arange(len(factors)), np.arange(len(offences)), indexing='ij')
+        factor_pos, offence_pos = factor_pos.ravel(), offence_pos.ravel()
+        frames.append(pd.DataFrame({
+            'Year': np.full(len(factor_pos), year, dtype='int16'),
+            'Factor': np.asarray(factors, dtype=object)[factor_pos],
+            'Offence': offences[offence_pos],
+            'N': n[factor_pos, 0].astype('int32'),
+            'Correlation': correlation[factor_pos, offence_pos],
+            'Slope': slope[factor_pos, offence_pos],
+            'Intercept': intercept[factor_pos, offence_pos],
+            'TopOutliers': [list(suburbs[top[:, f, o][np.isfinite(top_residuals[:, f, o])]]) for f, o in zip(factor_pos, offence_pos)],
+            'TopResiduals': [list(top_residuals[:, f, o][np.isfinite(top_residuals[:, f, o])]) for f, o in zip(factor_pos, offence_pos)],
+        }))
+
+    store = pd.concat(frames, ignore_index=True)
+    store['Factor'] = pd.Categorical(store['Factor'], categories=factors)
+    store['Offence'] = pd.Categorical(store['Offence'], categories=list(offences))
+    return store
+
+def strongest_correlation(store, year, factors=None):
+    """The (factor, offence, r) with the largest |r| in a year, or None if there is none."""
+    rows = store[store['Year'] == year]
+    if factors is not None:
+        rows = rows[rows['Factor'].isin(factors)]
+    strength = rows['Correlation'].abs()
+    if strength.isna().all():
+        return None
+    best = rows.loc[strength.idxmax()]
+    return best['Factor'], best['Offence'], best['Correlation']
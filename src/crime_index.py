@@ -0,0 +1,88 @@
+# src/crime_index.py
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ['Suburb', 'OffenceCategory']
+
+def row_index_path(data_path):
+    """Where the row index of a processed crime file lives: next to it, as '<name>.index.parquet'."""
+    return Path(data_path).with_suffix('.index.parquet')
+
+def add_temporal_columns(long_df):
+    """Adds the Year, Month and DayOfWeek fields derived from Date."""
+    long_df['Year'] = long_df['Date'].dt.year.astype('int16')
+    long_df['Month'] = long_df['Date'].dt.month_name().astype('category')
+    long_df['DayOfWeek'] = long_df['Date'].dt.day_name().astype('category')
+    return long_df
+
+def build_row_index(long_df):
+    """
+    Run-length encodes the (Suburb, OffenceCategory) keys of a sorted long
+    table: one row per run with its Start/Stop row offsets. A key normally has
+    a single run; a file written in several sorted blocks can split a key
+    across blocks, which simply shows up as more than one run.
+    """
+    if long_df.empty:
+        return pd.DataFrame({'Suburb': [], 'OffenceCategory': [], 'Start': [], 'Stop': []})
+    key_codes = [long_df[col].astype('category').cat.codes.to_numpy() for col in KEY_COLUMNS]
+    changed = np.zeros(len(long_df) - 1, dtype=bool)
+    for codes in key_codes:
+        changed |= codes[1:] != codes[:-1]
+    starts = np.concatenate([[0], np.flatnonzero(changed) + 1])
+    stops = np.append(starts[1:], len(long_df))
+    return pd.DataFrame({
+        'Suburb': long_df['Suburb'].to_numpy()[starts].astype(str),
+        'OffenceCategory': long_df['OffenceCategory'].to_numpy()[starts].astype(str),
+        'Start': starts.astype('int64'),
+        'Stop': stops.astype('int64'),
+    })
+
+def write_row_index(data_path):
+    """Builds the row index of a processed crime Parquet file from its key columns and saves it."""
+    keys = pd.read_parquet(data_path, columns=KEY_COLUMNS)
+    index_df = build_row_index(keys)
+    index_df.to_parquet(row_index_path(data_path), index=False)
+    return index_df
+
+class KeyedCrimeTable:
+    """
+    The long crime table plus its (Suburb, OffenceCategory) -> row-range
+    index. A selection is one or a few contiguous iloc slices, so its cost
+    depends on the size of the selected series, not on the table.
+    """
+
+    def __init__(self, long_df, index_df):
+        self.long_df = long_df
+        self.ranges = {}
+        for row in index_df.itertuples(index=False):
+            self.ranges.setdefault((row.Suburb, row.OffenceCategory), []).append((row.Start, row.Stop))
+        self.suburbs = sorted({suburb for suburb, _ in self.ranges})
+        self.offence_categories = sorted({offence for _, offence in self.ranges})
+
+    @classmethod
+    def from_parquet(cls, data_path):
+        """
+        Loads the table in file order with its persisted index. A missing index,
+        or one written for a different version of the file, is rebuilt in memory.
+        """
+        long_df = pd.read_parquet(data_path)
+        if 'DayOfWeek' not in long_df.columns:
+            # Files written before the temporal columns were materialized.
+            long_df = add_temporal_columns(long_df)
+        index_path = row_index_path(data_path)
+        index_df = pd.read_parquet(index_path) if index_path.exists() else None
+        if index_df is None or index_df['Stop'].max() != len(long_df):
+            index_df = build_row_index(long_df)
+        return cls(long_df, index_df)
+
+    def select(self, suburb, offence_category):
+        """Rows of one (Suburb, OffenceCategory) series; empty if the key is unknown."""
+        runs = self.ranges.get((suburb, offence_category))
+        if not runs:
+            return self.long_df.iloc[0:0]
+        if len(runs) == 1:
+            return self.long_df.iloc[runs[0][0]:runs[0][1]]
+        return pd.concat([self.long_df.iloc[start:stop] for start, stop in runs])
@@ -0,0 +1,108 @@
+# src/crime_network.py
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from src.regions import ALL_NSW, REGIONS
+
+ALL_YEARS = 0 # Year value of the graphs built from every year of data
+MIN_EDGE_CORRELATION = 0.1 # Weakest |r| kept in the edge list (the lowest threshold the page offers)
+LAYOUT_THRESHOLDS = [round(value, 2) for value in np.arange(0.1, 1.0, 0.05)]
+LAYOUT_SEED = 42
+
+def scope_correlations(crime_tensor, suburb_mask, year=ALL_YEARS):
+    """
+    Offence x offence Pearson correlation over the suburb-year rows of one
+    scope: the given suburbs, in one year or across all years.
+    """
+    rows = crime_tensor.present & suburb_mask[:, None]
+    if year != ALL_YEARS:
+        year_mask = crime_tensor.years == year
+        rows = rows & year_mask[None, :]
+    observations = crime_tensor.counts[rows]
+    if len(observations) < 3:
+        return None
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.corrcoef(observations, rowvar=False)
+
+def correlation_edges(correlation, offences, min_correlation=MIN_EDGE_CORRELATION):
+    """Sparse edge list (upper triangle) of the offence pairs with |r| >= min_correlation."""
+    source, target = np.triu_indices(len(offences), k=1)
+    values = correlation[source, target]
+    keep = np.abs(np.nan_to_num(values)) >= min_correlation
+    offences = np.asarray(offences, dtype=object)
+    return pd.DataFrame({'Source': offences[source[keep]], 'Target': offences[target[keep]], 'Correlation': values[keep]})
+
+def build_graph(edges, threshold):
+    """Offences as nodes, joined where |r| is above the threshold; edge weight is |r|."""
+    strong = edges[edges['Correlation'].abs() > threshold]
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(zip(strong['Source'], strong['Target'], strong['Correlation'].abs()))
+    nx.set_edge_attributes(graph, dict(zip(zip(strong['Source'], strong['Target']), strong['Correlation'])), 'correlation')
+    return graph
+
+def layout_graph(graph):
+    """Force-directed positions and modularity communities, computed once per graph."""
+    if graph.number_of_nodes() == 0:
+        return pd.DataFrame(columns=['Offence', 'X', 'Y', 'Community'])
+    positions = nx.spring_layout(graph, k=0.8, iterations=50, seed=LAYOUT_SEED)
+    communities = nx.community.louvain_communities(graph, weight='weight', seed=LAYOUT_SEED)
+    community_of = {node: i for i, members in enumerate(sorted(communities, key=len, reverse=True)) for node in members}
+    nodes = list(graph.nodes())
+    return pd.DataFrame({
+        'Offence': nodes,
+        'X': [positions[node][0] for node in nodes],
+        'Y': [positions[node][1] for node in nodes],
+        'Community': [community_of[node] for node in nodes],
+    })
+
+def compute_crime_network(crime_tensor, regions, thresholds=LAYOUT_THRESHOLDS):
+    """
+    Edge lists for every (year, region) scope and cached layouts for every
+    (scope, threshold) graph. `regions` gives each tensor suburb's region
+    (None if unknown); 'All NSW' always covers every suburb.
+    """
+    edge_frames, layout_frames = [], []
+    region_masks = {ALL_NSW: np.ones(len(crime_tensor.suburbs), dtype=bool)}
+    for region in REGIONS[1:]:
+        region_masks[region] = regions == region
+
+    for year in [ALL_YEARS] + crime_tensor.available_years():
+        for region, suburb_mask in region_masks.items():
+            correlation = scope_correlations(crime_tensor, suburb_mask, year)
+            if correlation is None:
+                continue
+            edges = correlation_edges(correlation, crime_tensor.offences)
+            edge_frames.append(edges.assign(Year=year, Region=region))
+            for threshold in thresholds:
+                layout = layout_graph(build_graph(edges, threshold))
+                layout_frames.append(layout.assign(Year=year, Region=region, Threshold=threshold))
+
+    edges = pd.concat(edge_frames, ignore_index=True)[['Year', 'Region', 'Source', 'Target', 'Correlation']]
+    layouts = pd.concat(layout_frames, ignore_index=True)[['Year', 'Region', 'Threshold', 'Offence', 'X', 'Y', 'Community']]
+    for frame in (edges, layouts):
+        frame['Year'] = frame['Year'].astype('int16')
+        frame['Region'] = pd.Categorical(frame['Region'], categories=REGIONS)
+    return edges, layouts
+
+class CrimeNetworkStore:
+    """Precomputed edges and layouts, grouped by scope so each lookup is a dictionary access."""
+
+    def __init__(self, edges, layouts):
+        self.edges_by_scope = {key: frame for key, frame in edges.groupby(['Year', 'Region'], observed=True)}
+        self.layouts_by_graph = {key: frame.set_index('Offence') for key, frame in layouts.groupby(['Year', 'Region', 'Threshold'], observed=True)}
+        self.years = sorted({year for year, _ in self.edges_by_scope if year != ALL_YEARS}, reverse=True)
+        self.regions = [region for region in REGIONS if any(key[1] == region for key in self.edges_by_scope)]
+        self.thresholds = sorted({key[2] for key in self.layouts_by_graph})
+
+    @classmethod
+    def from_parquet(cls, edges_path, layouts_path):
+        return cls(pd.read_parquet(edges_path), pd.read_parquet(layouts_path))
+
+    def graph(self, year, region, threshold):
+        edges = self.edges_by_scope.get((year, region))
+        return build_graph(edges, threshold) if edges is not None else nx.Graph()
+
+    def layout(self, year, region, threshold):
+        return self.layouts_by_graph.get((year, region, threshold))
@@ -0,0 +1,138 @@
+# src/forecasting.py
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+ANNUAL_HORIZON = 3 # Years forecast by the linear trend
+MONTHLY_HORIZON = 24 # Months forecast by the statsmodels models
+INTERVAL_LEVEL = 0.95
+MIN_ANNUAL_POINTS = 3 # Same minimum the Forecasting Lab has always required
+MIN_MONTHLY_POINTS = 36
+MONTHLY_FIT_MONTHS = 120 # Monthly models are fitted on the trailing ten years
+SEASONAL_PERIODS = 12
+MONTHLY_MODELS = ['ets', 'arima']
+MODEL_LABELS = {'linear': 'Linear trend (annual)', 'ets': 'Exponential smoothing (monthly)', 'arima': 'ARIMA (monthly)'}
+
+FORECAST_COLUMNS = ['Suburb', 'Offence', 'Model', 'Kind', 'Date', 'Value', 'Lower', 'Upper']
+
+# --- Linear trends, solved in closed form for many series at once ---
+def annual_dates(years):
+    """Year-end dates used as the time axis of annual series."""
+    return pd.to_datetime([f"{int(year)}-12-31" for year in years])
+
+def time_index_days(dates, origin):
+    """Days since `origin`, the regressor the Forecasting Lab has always used."""
+    return (pd.DatetimeIndex(dates) - pd.Timestamp(origin)).days.to_numpy(dtype='float64')
+
+class LinearTrends:
+    """
+    Ordinary least-squares lines y = intercept + slope * x fitted to N series
+    at once. `values` and `weights` are (N, T) arrays over a shared time axis
+    `x`; a weight of 0 leaves that point out of a series' fit, which is how
+    missing years are handled. Every statistic is a weighted sum along the
+    time axis, so the whole batch is a handful of array operations.
+    """
+
+    def __init__(self, x, values, weights):
+        x = np.asarray(x, dtype='float64')
+        values = np.asarray(values, dtype='float64')
+        weights = np.asarray(weights, dtype='float64')
+
+        self.n = weights.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.x_mean = (weights * x).sum(axis=1) / self.n
+            y_mean = (weights * values).sum(axis=1) / self.n
+            x_centered = x[None, :] - self.x_mean[:, None]
+            self.sxx = (weights * x_centered ** 2).sum(axis=1)
+            self.slope = (weights * x_centered * (values - y_mean[:, None])).sum(axis=1) / self.sxx
+            self.intercept = y_mean - self.slope * self.x_mean
+
+            residuals = weights * (values - self.predict(x)) ** 2
+            self.sigma = np.sqrt(residuals.sum(axis=1) / (self.n - 2))
+
+    def predict(self, x):
+        """Point predictions, shape (N, len(x))."""
+        return self.intercept[:, None] + self.slope[:, None] * np.asarray(x, dtype='float64')[None, :]
+
+    def prediction_interval(self, x, level=INTERVAL_LEVEL):
+        """Lower and upper bounds of the OLS prediction interval at each x."""
+        x = np.asarray(x, dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_value = stats.t.ppf(0.5 + level / 2, self.n - 2)
+            spread = self.sigma[:, None] * np.sqrt(1 + 1 / self.n[:, None] + (x[None, :] - self.x_mean[:, None]) ** 2 / self.sxx[:, None])
+        point = self.predict(x)
+        return point - t_value[:, None] * spread, point + t_value[:, None] * spread
+
+def linear_forecasts(crime_tensor, horizon=ANNUAL_HORIZON, level=INTERVAL_LEVEL):
+    """
+    Linear trend of every suburb x offence annual series in the CrimeTensor.
+    Returns a long frame of in-sample fitted values and `horizon` future years
+    with prediction intervals. Forecasts are floored at zero incidents.
+    """
+    n_suburbs, n_years, n_offences = crime_tensor.counts.shape
+    # Series are laid out as (suburb, offence) rows over the year axis.
+    values = crime_tensor.counts.transpose(0, 2, 1).reshape(-1, n_years)
+    weights = np.repeat(crime_tensor.present, n_offences, axis=0).astype('float64')
+
+    years = crime_tensor.years
+    history_dates = annual_dates(years)
+    future_dates = annual_dates(np.arange(years[-1] + 1, years[-1] + 1 + horizon))
+    x_history = time_index_days(history_dates, history_dates[0])
+    x_future = time_index_days(future_dates, history_dates[0])
+
+    trends = LinearTrends(x_history, values, weights)
+    valid = trends.n >= MIN_ANNUAL_POINTS
+    suburbs = np.repeat(crime_tensor.suburbs, n_offences)
+    offences = np.tile(np.asarray(crime_tensor.offences, dtype=object), n_suburbs)
+
+    fitted = trends.predict(x_history)
+    series_pos, year_pos = np.nonzero((weights > 0) & valid[:, None])
+    fitted_df = pd.DataFrame({
+        'Suburb': suburbs[series_pos], 'Offence': offences[series_pos], 'Model': 'linear', 'Kind': 'fitted',
+        'Date': history_dates[year_pos], 'Value': fitted[series_pos, year_pos], 'Lower': np.nan, 'Upper': np.nan,
+    })
+
+    point = np.maximum(trends.predict(x_future), 0)
+    lower, upper = trends.prediction_interval(x_future, level)
+    series_pos, step = np.nonzero(np.broadcast_to(valid[:, None], point.shape))
+    forecast_df = pd.DataFrame({
+        'Suburb': suburbs[series_pos], 'Offence': offences[series_pos], 'Model': 'linear', 'Kind': 'forecast',
+        'Date': future_dates[step], 'Value': point[series_pos, step],
+        'Lower': np.maximum(lower[series_pos, step], 0), 'Upper': np.maximum(upper[series_pos, step], 0),
+    })
+    return pd.concat([fitted_df, forecast_df], ignore_index=True)
+
+# --- Monthly statsmodels models ---
+def fit_monthly_model(model, values, horizon=MONTHLY_HORIZON, level=INTERVAL_LEVEL):
+    """
+    Fits one statsmodels model to a monthly series and returns (point, lower,
+    upper) arrays for the next `horizon` months, floored at zero.
+    'ets' is additive-trend Holt-Winters with additive seasonality; 'arima' is
+    a seasonal ARIMA(1,1,1)(0,1,1)12.
+    """
+    values = np.asarray(values, dtype='float64')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if model == 'ets':
+            from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+            # ETS prediction summaries need a pandas index on the input series.
+            result = ETSModel(pd.Series(values), error='add', trend='add', damped_trend=True, seasonal='add', seasonal_periods=SEASONAL_PERIODS).fit(disp=False)
+            frame = result.get_prediction(start=len(values), end=len(values) + horizon - 1).summary_frame(alpha=1 - level)
+            point, lower, upper = frame['mean'].to_numpy(), frame['pi_lower'].to_numpy(), frame['pi_upper'].to_numpy()
+        elif model == 'arima':
+            from statsmodels.tsa.statespace.sarimax import SARIMAX
+            result = SARIMAX(values, order=(1, 1, 1), seasonal_order=(0, 1, 1, SEASONAL_PERIODS)).fit(disp=False)
+            prediction = result.get_forecast(horizon)
+            interval = prediction.conf_int(alpha=1 - level)
+            point, lower, upper = prediction.predicted_mean, interval[:, 0], interval[:, 1]
+        else:
+            raise ValueError(f"Unknown monthly model: {model}")
+    return np.maximum(point, 0), np.maximum(lower, 0), np.maximum(upper, 0)
+
+def monthly_series_is_fittable(values):
+    """Skips series too short or too sparse for a seasonal model to mean anything."""
+    values = np.asarray(values)
+    return len(values) >= MIN_MONTHLY_POINTS and np.count_nonzero(values) >= SEASONAL_PERIODS
@@ -0,0 +1,240 @@
+# src/geocoder.py
+
+import bisect
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import NamedTuple
+
+import pandas as pd
+from fuzzywuzzy import fuzz, process
+from src.geodata import load_premises
+
+GEOCODE_CACHE_FILE = 'geocode_cache.sqlite'
+# Versioned so results cached before fuzzy matching was limited to the same house number are not reused.
+GEOCODE_CACHE_TABLE = 'geocode_cache_v2'
+GEOCODE_CACHE_META_TABLE = 'geocode_cache_meta' # Fingerprint of the reference data the cached results came from
+PREMISES_ADDRESS_COLUMN = 'Address'
+FUZZY_SCORE_CUTOFF = 85
+MAX_SUBURB_TOKENS = 4 # Longest suburb name, in words, tried when splitting a query
+
+# Street types are reduced to one spelling so '44 Bridge Street' and '44 Bridge St' share a key.
+STREET_TYPE_ABBREVIATIONS = {
+    'STREET': 'ST', 'ROAD': 'RD', 'AVENUE': 'AVE', 'AV': 'AVE', 'PARADE': 'PDE', 'HIGHWAY': 'HWY',
+    'DRIVE': 'DR', 'PLACE': 'PL', 'LANE': 'LN', 'COURT': 'CT', 'CRESCENT': 'CRES', 'BOULEVARD': 'BLVD',
+    'TERRACE': 'TCE', 'CIRCUIT': 'CCT', 'ESPLANADE': 'ESP', 'SQUARE': 'SQ', 'CLOSE': 'CL',
+}
+IGNORED_TOKENS = {'NSW', 'AUSTRALIA'}
+
+class GeocodeResult(NamedTuple):
+    latitude: float
+    longitude: float
+    address: str
+    source: str # 'address', 'street', 'suburb' or 'remote'; cache hits keep the source they were resolved with
+
+def normalize_place_name(text):
+    """Upper-cases, strips punctuation, state/postcode noise and '(NSW)' style qualifiers."""
+    text = re.sub(r'\(.*?\)|\bNEW SOUTH WALES\b', ' ', str(text).upper())
+    tokens = [token for token in re.sub(r'[^A-Z0-9 ]', ' ', text).split() if token not in IGNORED_TOKENS]
+    # A trailing NSW postcode carries no extra location information once the suburb is known.
+    if tokens and re.fullmatch(r'[12]\d{3}', tokens[-1]):
+        tokens = tokens[:-1]
+    return ' '.join(STREET_TYPE_ABBREVIATIONS.get(token, token) for token in tokens)
+
+def reference_fingerprint(suburb_centroids, addresses):
+    """Content hash of the suburb centroids and premises addresses a geocoder resolves against."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sorted((key, [float(value) for value in point]) for key, point in suburb_centroids.items())).encode())
+    digest.update(pd.util.hash_pandas_object(addresses, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+class OfflineGeocoder:
+    """
+    Resolves NSW addresses from data already in the project: suburb centroids
+    from nsw_suburbs.json and street addresses of licensed premises. Addresses
+    are kept in a sorted key list per suburb, so exact and prefix lookups are
+    binary searches. Fuzzy matching only runs within the query's suburb.
+    Resolved queries are stored in an on-disk SQLite cache, which is cleared
+    when the centroids or premises it was filled from change. The remote
+    Nominatim geocoder is only used as an opt-in fallback.
+    """
+
+    def __init__(self, suburb_centroids, addresses, cache_path=GEOCODE_CACHE_FILE):
+        # suburb_centroids: {suburb key: (lat, lon)}; addresses: DataFrame of StreetKey, SuburbKey, Label, Latitude, Longitude
+        self.suburb_centroids = suburb_centroids
+        self.address_points = {}
+        self.suburb_address_keys = defaultdict(list)
+        for row in addresses.itertuples(index=False):
+            if not row.StreetKey or not row.SuburbKey:
+                continue
+            self.address_points.setdefault(f"{row.StreetKey} {row.SuburbKey}", (row.Latitude, row.Longitude, row.Label))
+            self.suburb_address_keys[row.SuburbKey].append(row.StreetKey)
+        for suburb_key, street_keys in self.suburb_address_keys.items():
+            self.suburb_address_keys[suburb_key] = sorted(set(street_keys))
+
+        self._cache_lock = threading.Lock()
+        self._cache = sqlite3.connect(cache_path, check_same_thread=False, timeout=30) if cache_path else None
+        if self._cache is not None:
+            self._cache.execute(f"CREATE TABLE IF NOT EXISTS {GEOCODE_CACHE_TABLE} (query TEXT PRIMARY KEY, latitude REAL, longitude REAL, address TEXT, source TEXT)")
+            self._cache.execute(f"CREATE TABLE IF NOT EXISTS {GEOCODE_CACHE_META_TABLE} (name TEXT PRIMARY KEY, value TEXT)")
+            self._cache.commit()
+            self._clear_stale_cache(reference_fingerprint(suburb_centroids, addresses))
+
+    @classmethod
+    def from_sources(cls, geojson_path, premises_path, cache_path=GEOCODE_CACHE_FILE):
+        """Builds the index from the suburb GeoJSON and the prepared premises file."""
+        with open(geojson_path) as f:
+            features = json.load(f)['features']
+        suburb_centroids = {
+            normalize_place_name(feature['properties']['suburb_name']): (feature['properties']['centroid_lat'], feature['properties']['centroid_lon'])
+            for feature in features
+        }
+
+        premises_df = load_premises(premises_path, columns=[PREMISES_ADDRESS_COLUMN, 'Suburb', 'Latitude', 'Longitude']).drop(columns='geometry')
+        premises_df.dropna(inplace=True)
+        premises_df = premises_df.astype({PREMISES_ADDRESS_COLUMN: str, 'Suburb': str})
+
+        addresses = pd.DataFrame({
+            'StreetKey': premises_df[PREMISES_ADDRESS_COLUMN].map(normalize_place_name),
+            'SuburbKey': premises_df['Suburb'].map(normalize_place_name),
+            'Label': premises_df[PREMISES_ADDRESS_COLUMN].str.strip() + ', ' + premises_df['Suburb'].str.strip().str.title() + ' NSW',
+            'Latitude': premises_df['Latitude'],
+            'Longitude': premises_df['Longitude'],
+        })
+        return cls(suburb_centroids, addresses, cache_path=cache_path)
+
+    def _split_suburb(self, query_key):
+        """Splits a normalized query into (street part, suburb key) using the longest trailing suburb name."""
+        tokens = query_key.split()
+        for n_tokens in range(min(MAX_SUBURB_TOKENS, len(tokens)), 0, -1):
+            candidate = ' '.join(tokens[-n_tokens:])
+            if candidate in self.suburb_centroids or candidate in self.suburb_address_keys:
+                return ' '.join(tokens[:-n_tokens]), candidate
+        return query_key, None
+
+    def _street_level(self, suburb_key, street_part):
+        """Centre of all known addresses on a street, for queries whose house number is unknown."""
+        street_name = re.sub(r'^\S*\d\S* ', '', street_part)
+        matches = [key for key in self.suburb_address_keys.get(suburb_key, []) if key == street_name or key.endswith(' ' + street_name)]
+        if not matches:
+            return None
+        points = [self.address_points[f"{key} {suburb_key}"] for key in matches]
+        lat = sum(point[0] for point in points) / len(points)
+        lon = sum(point[1] for point in points) / len(points)
+        return GeocodeResult(lat, lon, f"{street_name.title()}, {suburb_key.title()} NSW", 'street')
+
+    def _fuzzy_address(self, street_keys, street_part):
+        """Closest street key with the query's house number, or None if the query has none or nothing scores high enough."""
+        house_number, _, street_name = street_part.partition(' ')
+        if not street_name or not re.search(r'\d', house_number):
+            return None
+        # Keys sharing a house number are contiguous in the sorted list ('!' sorts just after the space).
+        start, stop = bisect.bisect_left(street_keys, house_number + ' '), bisect.bisect_left(street_keys, house_number + '!')
+        candidates = {key.partition(' ')[2]: key for key in street_keys[start:stop]}
+        best = process.extractOne(street_name, list(candidates), scorer=fuzz.ratio, score_cutoff=FUZZY_SCORE_CUTOFF)
+        return candidates[best[0]] if best is not None else None
+
+    def _resolve_locally(self, query_key):
+        if query_key in self.address_points:
+            lat, lon, label = self.address_points[query_key]
+            return GeocodeResult(lat, lon, label, 'address')
+
+        street_part, suburb_key = self._split_suburb(query_key)
+        if suburb_key is None:
+            return None
+        street_keys = self.suburb_address_keys.get(suburb_key, [])
+
+        if street_part and street_keys and not re.match(r'\S*\d', street_part):
+            # No house number given: answer at street level rather than with an arbitrary venue.
+            street_result = self._street_level(suburb_key, street_part)
+            if street_result is not None:
+                return street_result
+
+        if street_part and street_keys:
+            # Prefix match on the sorted street keys ('44 BRIDGE' finds '44 BRIDGE ST').
+            start = bisect.bisect_left(street_keys, street_part)
+            if start < len(street_keys) and street_keys[start].startswith(street_part):
+                lat, lon, label = self.address_points[f"{street_keys[start]} {suburb_key}"]
+                return GeocodeResult(lat, lon, label, 'address')
+
+            # Fuzzy match on the street name, blocked to the addresses in this suburb with the same house number.
+            # Scoring whole keys would let '1 GEORGE ST' match '771 GEORGE ST', kilometres away.
+            best = self._fuzzy_address(street_keys, street_part)
+            if best is not None:
+                lat, lon, label = self.address_points[f"{best} {suburb_key}"]
+                return GeocodeResult(lat, lon, label, 'address')
+
+            street_result = self._street_level(suburb_key, street_part)
+            if street_result is not None:
+                return street_result
+
+        if suburb_key in self.suburb_centroids:
+            lat, lon = self.suburb_centroids[suburb_key]
+            return GeocodeResult(lat, lon, f"{suburb_key.title()} NSW (suburb centre)", 'suburb')
+        return None
+
+    def _clear_stale_cache(self, fingerprint):
+        """
+        Empties the cache if it was filled from different reference data, so a
+        query that fell back to a suburb centre (or a remote result) is resolved
+        again once premises.parquet has the exact address.
+        """
+        with self._cache_lock:
+            # IMMEDIATE takes the write lock up front, so scoring workers starting together clear it once.
+            self._cache.execute("BEGIN IMMEDIATE")
+            row = self._cache.execute(f"SELECT value FROM {GEOCODE_CACHE_META_TABLE} WHERE name = 'reference'").fetchone()
+            if row is None or row[0] != fingerprint:
+                self._cache.execute(f"DELETE FROM {GEOCODE_CACHE_TABLE}")
+                self._cache.execute(f"INSERT OR REPLACE INTO {GEOCODE_CACHE_META_TABLE} VALUES ('reference', ?)", (fingerprint,))
+            self._cache.commit()
+
+    def _cached(self, query_key):
+        if self._cache is None:
+            return None
+        with self._cache_lock:
+            row = self._cache.execute(f"SELECT latitude, longitude, address, source FROM {GEOCODE_CACHE_TABLE} WHERE query = ?", (query_key,)).fetchone()
+        # The stored source keeps street- and suburb-level fallbacks flagged as approximate on later lookups.
+        return GeocodeResult(*row) if row else None
+
+    def _store(self, query_key, result):
+        if self._cache is None:
+            return
+        with self._cache_lock:
+            self._cache.execute(f"INSERT OR REPLACE INTO {GEOCODE_CACHE_TABLE} VALUES (?, ?, ?, ?, ?)", (query_key, result.latitude, result.longitude, result.address, result.source))
+            self._cache.commit()
+
+    def geocode(self, query, allow_remote=False):
+        """
+        Resolves a free-text NSW address. Returns a GeocodeResult or None.
+        Order: on-disk cache, exact/prefix address match, fuzzy match among
+        addresses with the same house number, street, suburb centroid, then
+        (only if allowed) the remote Nominatim service.
+        """
+        query_key = normalize_place_name(query)
+        if not query_key:
+            return None
+
+        result = self._cached(query_key)
+        if result is not None:
+            return result
+
+        result = self._resolve_locally(query_key)
+        if result is None and allow_remote:
+            result = geocode_remotely(query)
+        if result is not None:
+            self._store(query_key, result)
+        return result
+
+def geocode_remotely(query):
+    """Optional online fallback. Returns None when geopy or the network is unavailable."""
+    try:
+        from geopy.geocoders import Nominatim
+        location = Nominatim(user_agent="nsw_crime_risk_app", timeout=10).geocode(query)
+    except Exception:
+        return None
+    if location is None:
+        return None
+    return GeocodeResult(location.latitude, location.longitude, location.address, 'remote')
@@ -0,0 +1,62 @@
+# src/geodata.py
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+PREMISES_FILE = 'premises.parquet'
+BOUNDARIES_FILE = 'nsw_boundaries.parquet'
+BOUNDS_COLUMNS = ['min_lon', 'min_lat', 'max_lon', 'max_lat']
+GEOGRAPHIC_CRS = 'EPSG:4326'
+PROJECTED_CRS = 'EPSG:8058' # GDA2020 / NSW Lambert, in metres
+ROW_GROUP_SIZE = 2048 # Rows per Parquet row group; each group's bbox statistics act as the spatial index
+
+def clean_coordinates(values):
+    """Parses coordinate strings such as '-33,868.8' or ' 151.2 ' to floats; anything else becomes NaN."""
+    return pd.to_numeric(pd.Series(values).astype(str).str.replace(',', '').str.strip(), errors='coerce')
+
+def write_spatial_parquet(gdf, path, row_group_size=ROW_GROUP_SIZE):
+    """
+    Writes a GeoParquet file sorted along a Hilbert curve, with a bbox
+    covering column. Nearby features then share row groups, and the row-group
+    bbox statistics form a persisted spatial index: a bbox read only decodes
+    the groups that can overlap the box.
+    """
+    if len(gdf):
+        gdf = gdf.iloc[np.argsort(gdf.geometry.hilbert_distance(), kind='stable')].reset_index(drop=True)
+    gdf.to_parquet(path, compression='zstd', write_covering_bbox=True, row_group_size=row_group_size, schema_version='1.1.0')
+
+def read_spatial_parquet(path, columns=None, bbox=None, crs=None):
+    """
+    Reads a file written by write_spatial_parquet. `bbox` is (min_lon,
+    min_lat, max_lon, max_lat) in the file's CRS. Only row groups that can
+    overlap it are read, and the rows are then filtered exactly. `crs`
+    optionally reprojects the result.
+    """
+    if columns is not None and 'geometry' not in columns:
+        columns = list(columns) + ['geometry']
+    gdf = gpd.read_parquet(path, columns=columns, bbox=bbox)
+    if 'bbox' in gdf.columns:
+        gdf = gdf.drop(columns='bbox')
+    return gdf.to_crs(crs) if crs is not None and gdf.crs != crs else gdf
+
+def load_premises(path=PREMISES_FILE, columns=None, bbox=None, crs=None):
+    """
+    The typed premises points written by prepare_premises.py: WGS84 point
+    geometry, numeric Latitude/Longitude/Postcode and projected X/Y metres.
+    """
+    return read_spatial_parquet(path, columns=columns, bbox=bbox, crs=crs)
+
+def load_boundaries(path=BOUNDARIES_FILE, columns=None, bbox=None, crs=None):
+    """
+    The NSW suburb polygons written by prepare_boundaries.py: Suburb (SAL
+    name), Suburb_Clean join key, bounding box and centroid columns, in the
+    shapefile's GDA2020 lon/lat. With `bbox`, only suburbs overlapping it
+    are read.
+    """
+    return read_spatial_parquet(path, columns=columns, bbox=bbox, crs=crs)
+
+def boundaries_extent(path=BOUNDARIES_FILE):
+    """(min_lon, min_lat, max_lon, max_lat) of all suburbs, from the bbox columns alone."""
+    bounds = pd.read_parquet(path, columns=BOUNDS_COLUMNS)
+    return bounds['min_lon'].min(), bounds['min_lat'].min(), bounds['max_lon'].max(), bounds['max_lat'].max()
@@ -0,0 +1,176 @@
+# src/instrumentation.py
+
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+from src.build_manifest import expand_artifact
+
+HISTORY_FILE = 'pipeline_history.jsonl'
+METRICS = ['wall_s', 'cpu_s', 'peak_rss_mb']
+# A metric regresses when it exceeds the baseline median by this share and by at least the absolute floor,
+# so sub-second stages do not flag on scheduling noise.
+REGRESSION_THRESHOLD = 0.25
+REGRESSION_FLOORS = {'wall_s': 1.0, 'cpu_s': 1.0, 'peak_rss_mb': 50.0}
+
+# Steps of the current process, in the order they finished, until collect_steps() hands them over.
+_finished_steps = []
+_active_steps = []
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB since the last
+    reset_peak_rss(). Falls back to the lifetime peak where /proc is not
+    available (ru_maxrss is KB on Linux, bytes on macOS).
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def reset_peak_rss():
+    """Restarts the peak RSS measurement (Linux only; elsewhere peaks stay cumulative)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def cpu_seconds():
+    """User plus system CPU time of this process and of its finished child processes."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+class Step:
+    """Measurements of one instrumented block; set `rows_out` inside the block."""
+
+    def __init__(self, name, rows_in=None, depth=0):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.depth = depth
+        self.status = 'ok'
+        self.wall_s = self.cpu_s = self.peak_rss_mb = 0.0
+
+    def record(self):
+        return {'step': self.name, 'depth': self.depth, 'status': self.status,
+                'wall_s': round(self.wall_s, 3), 'cpu_s': round(self.cpu_s, 3), 'peak_rss_mb': round(self.peak_rss_mb, 1),
+                'rows_in': self.rows_in, 'rows_out': self.rows_out}
+
+@contextmanager
+def step(name, rows_in=None):
+    """
+    Times a block of pipeline work:
+
+        with step('sjoin', rows_in=len(points)) as s:
+            joined = gpd.sjoin(points, polygons)
+            s.rows_out = len(joined)
+
+    Steps nest; an enclosing step's peak RSS includes its inner steps.
+    """
+    parent = _active_steps[-1] if _active_steps else None
+    if parent is not None:
+        parent.peak_rss_mb = max(parent.peak_rss_mb, peak_rss_mb())
+    reset_peak_rss()
+    current = Step(name, rows_in, depth=len(_active_steps))
+    _active_steps.append(current)
+    start_wall, start_cpu = time.perf_counter(), cpu_seconds()
+    try:
+        yield current
+    except BaseException:
+        current.status = 'failed'
+        raise
+    finally:
+        current.wall_s = time.perf_counter() - start_wall
+        current.cpu_s = cpu_seconds() - start_cpu
+        current.peak_rss_mb = max(current.peak_rss_mb, peak_rss_mb())
+        _active_steps.pop()
+        if parent is not None:
+            parent.peak_rss_mb = max(parent.peak_rss_mb, current.peak_rss_mb)
+        _finished_steps.append(current.record())
+
+def collect_steps():
+    """Returns the step records finished in this process since the last call."""
+    steps = list(_finished_steps)
+    _finished_steps.clear()
+    return steps
+
+def artifact_stats(paths):
+    """{path: {'bytes', 'rows'}} for each existing artifact; rows come from Parquet metadata, else None."""
+    stats = {}
+    for path in paths:
+        files = [f for f in expand_artifact(path) if f.exists()]
+        if not files:
+            continue
+        rows = pq.ParquetFile(files[0]).metadata.num_rows if Path(path).suffix == '.parquet' else None
+        stats[str(path)] = {'bytes': sum(f.stat().st_size for f in files), 'rows': rows}
+    return stats
+
+def append_run(run, path=HISTORY_FILE):
+    """Appends one pipeline run to the JSON-lines history."""
+    with open(path, 'a') as f:
+        f.write(json.dumps(run, default=str) + '\n')
+
+def load_history(path=HISTORY_FILE):
+    """Every recorded run, oldest first. A truncated last line (interrupted write) is ignored."""
+    runs = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return runs
+
+def new_run_id():
+    return datetime.now().isoformat(timespec='milliseconds')
+
+def history_frame(runs):
+    """One row per (run, stage, step) with the step metrics; the stage itself is the first, depth-0 step."""
+    rows = []
+    for run in runs:
+        for stage in run.get('stages', []):
+            for record in stage.get('steps', []):
+                rows.append({'run_id': run['run_id'], 'stage': stage['stage'], **record})
+    return pd.DataFrame(rows, columns=['run_id', 'stage', 'step', 'depth', 'status', *METRICS, 'rows_in', 'rows_out'])
+
+def compare_runs(runs, baseline_runs=5, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares each step of the latest run with the median of the same step
+    over up to `baseline_runs` earlier runs in which it succeeded. Returns
+    one row per step with the latest value, the baseline, the relative
+    change and regression flag of each metric, and an overall `regressed` flag.
+    """
+    frame = history_frame(runs)
+    if frame.empty:
+        return frame
+    latest_id = runs[-1]['run_id']
+    latest = frame[frame['run_id'] == latest_id]
+    earlier = frame[(frame['run_id'] != latest_id) & (frame['status'] == 'ok')]
+    # History is chronological, so tail() keeps the most recent successful runs of each step.
+    earlier = earlier.groupby(['stage', 'step']).tail(baseline_runs)
+    baseline = earlier.groupby(['stage', 'step'])[[*METRICS, 'rows_in', 'rows_out']].median()
+
+    report = latest.set_index(['stage', 'step']).join(baseline, rsuffix='_baseline')
+    report['regressed'] = False
+    for metric in METRICS:
+        base = report[f'{metric}_baseline']
+        report[f'{metric}_change'] = report[metric] / base.where(base > 0) - 1
+        report[f'{metric}_regressed'] = (report[metric] > base * (1 + threshold)) & (report[metric] - base >= REGRESSION_FLOORS[metric])
+        report['regressed'] |= report[f'{metric}_regressed']
+    return report.reset_index()
@@ -0,0 +1,106 @@
+# src/monthly_cube.py
+
+import json
+
+import numpy as np
+import pandas as pd
+
+MONTHLY_CUBE_FILE = 'monthly_cube.bin'
+MONTHLY_CUBE_INDEX_FILE = 'monthly_cube.json'
+CUBE_DTYPE = 'int32'
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+def rolling_totals(values, window):
+    """Trailing sums over the last axis via a running sum; the first window-1 entries are NaN."""
+    values = np.asarray(values, dtype='float64')
+    cumulative = np.cumsum(values, axis=-1)
+    totals = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        totals[..., window - 1] = cumulative[..., window - 1]
+        totals[..., window:] = cumulative[..., window:] - cumulative[..., :-window]
+    return totals
+
+class MonthlyCube:
+    """
+    Incident counts as a suburb x offence x month array stored in a raw binary
+    file and opened with np.memmap. The axis labels live in a small JSON index
+    next to it. Each (suburb, offence) series is one contiguous run of the file,
+    and every Streamlit session or worker process that opens the cube shares
+    the same pages of the OS cache instead of holding its own copy.
+
+    The month axis covers every calendar month between the first and last
+    month in the processed data, so months without incidents are zeros.
+    """
+
+    def __init__(self, suburbs, offences, months, counts):
+        self.suburbs = list(suburbs)
+        self.offences = list(offences)
+        self.months = pd.DatetimeIndex(months)
+        self.counts = counts
+
+        self.suburb_index = {suburb: i for i, suburb in enumerate(self.suburbs)}
+        self.offence_index = {offence: i for i, offence in enumerate(self.offences)}
+
+    # --- Storage ---
+    @classmethod
+    def create(cls, suburbs, offences, months, path=MONTHLY_CUBE_FILE):
+        """A writable, zero-filled cube backed by `path`."""
+        shape = (len(suburbs), len(offences), len(months))
+        counts = np.memmap(path, dtype=CUBE_DTYPE, mode='w+', shape=shape)
+        return cls(suburbs, offences, months, counts)
+
+    @classmethod
+    def open(cls, path=MONTHLY_CUBE_FILE, index_path=MONTHLY_CUBE_INDEX_FILE):
+        """Maps an existing cube read-only; nothing is read until a slice is touched."""
+        with open(index_path) as f:
+            index = json.load(f)
+        months = pd.date_range(index['first_month'], periods=index['n_months'], freq='MS')
+        counts = np.memmap(path, dtype=index['dtype'], mode='r', shape=tuple(index['shape']))
+        return cls(index['suburbs'], index['offences'], months, counts)
+
+    def save_index(self, index_path=MONTHLY_CUBE_INDEX_FILE):
+        index = {
+            'shape': list(self.counts.shape),
+            'dtype': str(self.counts.dtype),
+            'first_month': self.months[0].strftime('%Y-%m') if len(self.months) else None,
+            'n_months': len(self.months),
+            'suburbs': self.suburbs,
+            'offences': self.offences,
+        }
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+
+    def month_positions(self, dates):
+        """Month-axis positions of an array of timestamps."""
+        dates = pd.DatetimeIndex(dates)
+        first = self.months[0]
+        return (dates.year - first.year) * 12 + (dates.month - first.month)
+
+    # --- Slices ---
+    def series(self, suburb, offence):
+        """Monthly incidents for one suburb and offence, indexed by month."""
+        values = self.counts[self.suburb_index[suburb], self.offence_index[offence]]
+        return pd.Series(np.asarray(values), index=self.months, name=offence)
+
+    def suburb_frame(self, suburb, offences=None):
+        """One suburb's monthly counts: Date plus one column per offence."""
+        offences = self.offences if offences is None else list(offences)
+        offence_pos = [self.offence_index[offence] for offence in offences]
+        frame = pd.DataFrame(self.counts[self.suburb_index[suburb]][offence_pos].T, columns=offences)
+        frame.insert(0, 'Date', self.months)
+        return frame
+
+    def offence_frame(self, offence, suburbs):
+        """Monthly counts of one offence across several suburbs: Date plus one column per suburb."""
+        suburbs = [suburb for suburb in suburbs if suburb in self.suburb_index]
+        suburb_pos = [self.suburb_index[suburb] for suburb in suburbs]
+        frame = pd.DataFrame(self.counts[suburb_pos, self.offence_index[offence]].T, columns=suburbs)
+        frame.insert(0, 'Date', self.months)
+        return frame
+
+    def seasonal_profile(self, suburb, offence):
+        """Average incidents per calendar month across all years."""
+        values = np.asarray(self.counts[self.suburb_index[suburb], self.offence_index[offence]], dtype='float64')
+        month_of_year = self.months.month.to_numpy() - 1
+        totals = np.bincount(month_of_year, weights=values, minlength=12)
+        return pd.Series(totals / np.maximum(np.bincount(month_of_year, minlength=12), 1), index=MONTH_NAMES)
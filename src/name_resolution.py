@@ -0,0 +1,144 @@
+# src/name_resolution.py
+
+import re
+from collections import Counter, defaultdict
+
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+CROSSWALK_FILE = 'suburb_crosswalk.parquet'
+FUZZY_SCORE_CUTOFF = 88 # fuzz.ratio needed to accept a fuzzy match
+MIN_SHARED_TRIGRAMS = 0.5 # Share of a name's trigrams a candidate must also contain
+NGRAM_SIZE = 3
+
+# Spelling variants reduced to one form before any comparison.
+NAME_TOKEN_VARIANTS = {'MT': 'MOUNT', 'ST': 'SAINT', 'PT': 'PORT', 'NTH': 'NORTH', 'STH': 'SOUTH', 'CK': 'CREEK'}
+SOUNDEX_CODES = {**dict.fromkeys('BFPV', '1'), **dict.fromkeys('CGJKQSXZ', '2'), **dict.fromkeys('DT', '3'),
+                 'L': '4', **dict.fromkeys('MN', '5'), 'R': '6'}
+
+def suburb_key(name):
+    """
+    Comparison key for a suburb name: upper case, without '(NSW)'-style
+    qualifiers, punctuation or a trailing postcode, with common abbreviations
+    spelled out.
+    """
+    text = re.sub(r'\(.*?\)', ' ', str(name).upper())
+    tokens = re.sub(r'[^A-Z0-9 ]', ' ', text).split()
+    if tokens and re.fullmatch(r'\d{4}', tokens[-1]):
+        tokens = tokens[:-1]
+    return ' '.join(NAME_TOKEN_VARIANTS.get(token, token) for token in tokens)
+
+def soundex(word):
+    """American Soundex code of one word, e.g. 'ROBERT' -> 'R163'."""
+    word = re.sub(r'[^A-Z]', '', word.upper())
+    if not word:
+        return ''
+    code, previous = word[0], SOUNDEX_CODES.get(word[0], '')
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+        if letter not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+class SuburbResolver:
+    """
+    Maps free-text suburb names onto a canonical list (the SAL boundary names).
+    Exact key matches are a dictionary lookup. Everything else is only scored
+    against candidates from two blocks: canonical names sharing the Soundex
+    code of the first word, and names sharing at least half of the query's
+    character trigrams. fuzz.ratio then picks the best candidate, so the cost
+    grows with block size rather than with the full canonical list.
+    """
+
+    def __init__(self, canonical_names):
+        self.canonical_names = sorted(set(canonical_names))
+        self.keys = [suburb_key(name) for name in self.canonical_names]
+        self.exact = {}
+        for name, key in zip(self.canonical_names, self.keys):
+            # '(NSW)'-qualified SAL names share a key with the plain name; the plain one wins.
+            if key not in self.exact or name == key:
+                self.exact[key] = name
+        self.soundex_blocks = defaultdict(set)
+        self.trigram_blocks = defaultdict(set)
+        for position, key in enumerate(self.keys):
+            if key:
+                self.soundex_blocks[soundex(key.split()[0])].add(position)
+            for gram in trigrams(key):
+                self.trigram_blocks[gram].add(position)
+        self.comparisons = 0
+
+    def candidates(self, key):
+        """Positions of the canonical names in the same blocks as `key`."""
+        if not key:
+            return set()
+        query_grams = trigrams(key)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.trigram_blocks.get(gram, ()))
+        needed = MIN_SHARED_TRIGRAMS * len(query_grams)
+        return {position for position, count in shared.items() if count >= needed} | self.soundex_blocks.get(soundex(key.split()[0]), set())
+
+    def resolve(self, name):
+        """(canonical name or None, match type, score) for one name."""
+        key = suburb_key(name)
+        if key in self.exact:
+            return self.exact[key], 'exact', 100
+        best_position, best_score = None, 0
+        for position in self.candidates(key):
+            self.comparisons += 1
+            score = fuzz.ratio(key, self.keys[position])
+            if score > best_score:
+                best_position, best_score = position, score
+        if best_position is not None and best_score >= FUZZY_SCORE_CUTOFF:
+            return self.canonical_names[best_position], 'fuzzy', best_score
+        return None, 'unmatched', best_score
+
+def build_crosswalk(sources, canonical_names):
+    """
+    One row per distinct (Source, SourceName) from `sources` ({source: names})
+    with the canonical Suburb it resolves to, the match type and the score.
+    """
+    resolver = SuburbResolver(canonical_names)
+    rows = []
+    for source, names in sources.items():
+        for name in sorted({str(name).strip() for name in names if pd.notna(name) and str(name).strip()}):
+            suburb, match_type, score = resolver.resolve(name)
+            rows.append((source, name, suburb, match_type, score))
+    crosswalk = pd.DataFrame(rows, columns=['Source', 'SourceName', 'Suburb', 'MatchType', 'Score'])
+    crosswalk['Score'] = crosswalk['Score'].astype('int16')
+    return crosswalk, resolver
+
+def match_report(crosswalk):
+    """Names, exact, fuzzy and unmatched counts plus the match rate per source."""
+    report = crosswalk.groupby('Source')['MatchType'].value_counts().unstack(fill_value=0)
+    report = report.reindex(columns=['exact', 'fuzzy', 'unmatched'], fill_value=0)
+    report.insert(0, 'names', report.sum(axis=1))
+    report['match_rate'] = (report['exact'] + report['fuzzy']) / report['names']
+    return report
+
+def load_crosswalk(path=CROSSWALK_FILE):
+    """The persisted crosswalk, or None if build_suburb_crosswalk.py has not been run."""
+    try:
+        return pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+
+def resolve_suburbs(names, source, crosswalk):
+    """
+    Canonical join key for each name of one source. Names the crosswalk
+    could not resolve (or every name, without a crosswalk) fall back to the
+    upper-cased, stripped name used before the crosswalk existed.
+    """
+    names = pd.Series(names, copy=False).astype(str)
+    fallback = names.str.upper().str.strip()
+    if crosswalk is None:
+        return fallback
+    mapping = crosswalk[(crosswalk['Source'] == source) & crosswalk['Suburb'].notna()]
+    mapping = pd.Series(mapping['Suburb'].str.upper().str.strip().values, index=mapping['SourceName'].values)
+    return names.str.strip().map(mapping).fillna(fallback)
@@ -0,0 +1,140 @@
+# src/profiling.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import pandas as pd
+import plotly.io
+
+PROFILE_BUFFER_SIZE = 5000 # Phase records kept in memory per server process
+PROFILE_LOG_FILE = os.environ.get('PAGE_PROFILE_LOG') # Optional JSON-lines file every record is also appended to
+PHASES = ['load', 'compute', 'geocode', 'figure', 'render', 'total'] # Display order; pages may add other phases
+
+_local = threading.local()
+
+class ProfileBuffer:
+    """Fixed-size, thread-safe ring buffer of phase records shared by every session of the server."""
+
+    def __init__(self, size=PROFILE_BUFFER_SIZE, log_path=PROFILE_LOG_FILE):
+        self.records = deque(maxlen=size)
+        self.log_path = log_path
+        self.lock = threading.Lock()
+
+    def extend(self, records):
+        with self.lock:
+            self.records.extend(records)
+            if self.log_path:
+                with open(self.log_path, 'a') as f:
+                    f.writelines(json.dumps(record) + '\n' for record in records)
+
+    def frame(self):
+        with self.lock:
+            return pd.DataFrame(list(self.records), columns=['ts', 'rerun', 'page', 'phase', 'ms', 'bytes'])
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+BUFFER = ProfileBuffer()
+
+def _install_plotly_spec_hook():
+    """
+    Counts the bytes of every Plotly spec serialized on a profiled rerun.
+    st.plotly_chart serializes through plotly.io.to_json, so wrapping it
+    measures the payload without serializing the figure a second time.
+    """
+    if getattr(plotly.io.to_json, 'counts_payload', False):
+        return
+    to_json = plotly.io.to_json
+
+    def counted_to_json(*args, **kwargs):
+        spec = to_json(*args, **kwargs)
+        if getattr(_local, 'profiler', None) is not None and isinstance(spec, str):
+            _local.profiler.pending_bytes += len(spec)
+        return spec
+
+    counted_to_json.counts_payload = True
+    plotly.io.to_json = counted_to_json
+
+_install_plotly_spec_hook()
+
+def payload_bytes(payload):
+    """In-memory size of a DataFrame (or list of them) handed to st.dataframe and similar elements."""
+    if payload is None:
+        return 0
+    if isinstance(payload, (list, tuple)):
+        return sum(payload_bytes(item) for item in payload)
+    if isinstance(payload, (pd.DataFrame, pd.Series)):
+        return int(payload.memory_usage(deep=False).sum())
+    return len(payload) if isinstance(payload, (str, bytes)) else 0
+
+class PageProfiler:
+    """
+    Per-rerun phase timer for a page script. Each lap() attributes the time
+    since the previous lap to a phase; repeated phases add up, so a page that
+    alternates computing and rendering still yields one total per phase:
+
+        profiler = PageProfiler("Trend Analysis")
+        df = load_keyed_crime_data()
+        profiler.lap('load')
+        ...
+        fig = px.line(...)
+        profiler.lap('figure')
+        st.plotly_chart(fig)
+        profiler.lap('render')
+        ...
+        profiler.finish()
+
+    Plotly specs serialized during a lap count towards its payload bytes.
+    finish() writes one record per phase plus 'total' to the buffer.
+    """
+
+    def __init__(self, page, buffer=None):
+        self.page = page
+        self.buffer = buffer or BUFFER
+        self.rerun = uuid.uuid4().hex[:12]
+        self.phase_ms, self.phase_bytes = {}, {}
+        self.pending_bytes = 0
+        self.start = self.last_lap = time.perf_counter()
+        _local.profiler = self
+
+    def lap(self, phase, payload=None):
+        now = time.perf_counter()
+        self.phase_ms[phase] = self.phase_ms.get(phase, 0.0) + (now - self.last_lap) * 1000
+        self.phase_bytes[phase] = self.phase_bytes.get(phase, 0) + self.pending_bytes + payload_bytes(payload)
+        self.pending_bytes = 0
+        self.last_lap = now
+
+    def finish(self):
+        if getattr(_local, 'profiler', None) is self:
+            _local.profiler = None
+        total_ms = (time.perf_counter() - self.start) * 1000
+        timestamp = time.time()
+        records = [{'ts': timestamp, 'rerun': self.rerun, 'page': self.page, 'phase': phase, 'ms': round(ms, 3), 'bytes': self.phase_bytes[phase]}
+                   for phase, ms in self.phase_ms.items()]
+        records.append({'ts': timestamp, 'rerun': self.rerun, 'page': self.page, 'phase': 'total', 'ms': round(total_ms, 3),
+                        'bytes': sum(self.phase_bytes.values())})
+        self.buffer.extend(records)
+
+def load_profile_log(path=PROFILE_LOG_FILE):
+    """Records persisted to the PAGE_PROFILE_LOG file; None when logging is off or nothing was written."""
+    if not path:
+        return None
+    try:
+        return pd.read_json(path, lines=True)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def latency_summary(records):
+    """p50/p95/max latency and median payload per page and phase."""
+    grouped = records.groupby(['page', 'phase'])
+    summary = grouped['ms'].describe(percentiles=[0.5, 0.95])[['count', '50%', '95%', 'max']]
+    summary.columns = ['reruns', 'p50_ms', 'p95_ms', 'max_ms']
+    summary['p50_kb'] = grouped['bytes'].median() / 1024
+    summary['reruns'] = summary['reruns'].astype(int)
+    order = {phase: position for position, phase in enumerate(PHASES)}
+    return summary.reset_index().sort_values(['page', 'phase'], key=lambda col: col.map(order).fillna(len(PHASES)) if col.name == 'phase' else col)
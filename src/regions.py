@@ -0,0 +1,49 @@
+# src/regions.py
+
+import json
+import re
+
+import numpy as np
+
+# Bounding box for Greater Sydney (approximate)
+GREATER_SYDNEY_BOUNDS = {
+    "min_lon": 150.5, 
+    "min_lat": -34.2, 
+    "max_lon": 151.4, 
+    "max_lat": -33.5
+}
+
+ALL_NSW = 'All NSW'
+GREATER_SYDNEY = 'Greater Sydney'
+REGIONAL_NSW = 'Regional NSW'
+REGIONS = [ALL_NSW, GREATER_SYDNEY, REGIONAL_NSW]
+
+def in_greater_sydney(lon, lat):
+    """True for points inside the Greater Sydney bounding box."""
+    lon, lat = np.asarray(lon, dtype='float64'), np.asarray(lat, dtype='float64')
+    return (
+        (lon >= GREATER_SYDNEY_BOUNDS['min_lon']) & (lon <= GREATER_SYDNEY_BOUNDS['max_lon']) &
+        (lat >= GREATER_SYDNEY_BOUNDS['min_lat']) & (lat <= GREATER_SYDNEY_BOUNDS['max_lat'])
+    )
+
+def suburb_regions(geojson_path, suburbs):
+    """
+    Greater Sydney / Regional NSW for each suburb name, from its centroid in
+    the suburb GeoJSON. Names are matched upper-cased with '(NSW)' style
+    qualifiers removed; suburbs without a boundary get None.
+    """
+    with open(geojson_path) as f:
+        features = json.load(f)['features']
+
+    def key(name):
+        return re.sub(r'\s*\(.*?\)', '', str(name)).upper().strip()
+
+    centroids = {key(feature['properties']['suburb_name']): (feature['properties']['centroid_lon'], feature['properties']['centroid_lat']) for feature in features}
+    regions = []
+    for suburb in suburbs:
+        centroid = centroids.get(key(suburb))
+        if centroid is None:
+            regions.append(None)
+        else:
+            regions.append(GREATER_SYDNEY if in_greater_sydney(*centroid) else REGIONAL_NSW)
+    return np.array(regions, dtype=object)
@@ -0,0 +1,268 @@
+# src/risk_grid.py
+
+import json
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from scipy import sparse
+
+GRID_METADATA_KEY = b'risk_grid_spec'
+RISK_LAYERS = ['CrimeRisk', 'VenueRisk']
+
+# Weights of the historical crime and venue layers in the base risk score.
+CRIME_RISK_WEIGHT = 0.7
+VENUE_RISK_WEIGHT = 0.3
+
+# Temporal bonuses added on top of the base risk, and the cap on the final score.
+PEAK_WEEKEND_NIGHT_BONUS = 2.5 # Fri/Sat 10pm-3am
+LATE_NIGHT_BONUS = 1.0 # 8pm-4am outside the weekend peak
+EVENING_RUSH_BONUS = 0.5 # 4pm-7pm
+MAX_RISK_SCORE = 10.0
+HIGH_RISK_THRESHOLD = 6.5
+MODERATE_RISK_THRESHOLD = 4.0
+
+# Regular lon/lat grid used by the risk engine. Cells are numbered the way the
+# original nested loop produced them: longitude-major, so
+#     grid_id = lon_index * n_lat + lat_index
+# and every question about cell membership is integer arithmetic on coordinates.
+@dataclass(frozen=True)
+class GridSpec:
+    min_lon: float
+    min_lat: float
+    cell_size: float
+    n_lon: int
+    n_lat: int
+
+    @classmethod
+    def from_bounds(cls, min_lon, min_lat, max_lon, max_lat, cell_size):
+        """Covers the bounding box with cells of `cell_size` degrees starting at its south-west corner."""
+        n_lon = len(np.arange(min_lon, max_lon, cell_size))
+        n_lat = len(np.arange(min_lat, max_lat, cell_size))
+        return cls(float(min_lon), float(min_lat), float(cell_size), n_lon, n_lat)
+
+    @property
+    def n_cells(self):
+        return self.n_lon * self.n_lat
+
+    def lon_lat_indices(self, lon, lat):
+        """Column and row index of each coordinate; values outside the grid are -1."""
+        lon = np.asarray(lon, dtype='float64')
+        lat = np.asarray(lat, dtype='float64')
+        lon_index = np.floor((lon - self.min_lon) / self.cell_size)
+        lat_index = np.floor((lat - self.min_lat) / self.cell_size)
+        inside = (lon_index >= 0) & (lon_index < self.n_lon) & (lat_index >= 0) & (lat_index < self.n_lat)
+        lon_index = np.where(inside, lon_index, -1).astype('int64')
+        lat_index = np.where(inside, lat_index, -1).astype('int64')
+        return lon_index, lat_index
+
+    def cell_index(self, lon, lat):
+        """Flat grid_id of each coordinate; coordinates outside the grid map to -1."""
+        lon_index, lat_index = self.lon_lat_indices(lon, lat)
+        return np.where(lon_index >= 0, lon_index * self.n_lat + lat_index, -1)
+
+    def count_points(self, lon, lat):
+        """Number of points falling in each cell, indexed by grid_id."""
+        cell_ids = self.cell_index(lon, lat)
+        return np.bincount(cell_ids[cell_ids >= 0], minlength=self.n_cells)
+
+    def cell_bounds(self, grid_ids=None):
+        """(min_lon, min_lat, max_lon, max_lat) arrays for the given cells (all cells by default)."""
+        grid_ids = np.arange(self.n_cells) if grid_ids is None else np.asarray(grid_ids)
+        min_lon = self.min_lon + (grid_ids // self.n_lat) * self.cell_size
+        min_lat = self.min_lat + (grid_ids % self.n_lat) * self.cell_size
+        return min_lon, min_lat, min_lon + self.cell_size, min_lat + self.cell_size
+
+    def cell_polygons(self, grid_ids=None):
+        """Shapely boxes for the given cells. Only needed when geometry is exported."""
+        return shapely.box(*self.cell_bounds(grid_ids))
+
+def build_coverage_matrix(grid_spec, geometries):
+    """
+    Rasterizes polygons onto the grid as a sparse (n_cells x n_polygons) matrix
+    whose entries are the fraction of each cell's area covered by each polygon.
+
+    Each polygon only looks at the cells under its bounding box. Cells entirely
+    inside it get a fraction of 1 without any overlay; only boundary cells pay
+    for an intersection.
+    """
+    cell_area = grid_spec.cell_size ** 2
+    rows, cols, fractions = [], [], []
+
+    for polygon_index, geometry in enumerate(geometries):
+        if geometry is None or geometry.is_empty:
+            continue
+        minx, miny, maxx, maxy = geometry.bounds
+        lon_start = max(int(np.floor((minx - grid_spec.min_lon) / grid_spec.cell_size)), 0)
+        lat_start = max(int(np.floor((miny - grid_spec.min_lat) / grid_spec.cell_size)), 0)
+        lon_stop = min(int(np.floor((maxx - grid_spec.min_lon) / grid_spec.cell_size)), grid_spec.n_lon - 1)
+        lat_stop = min(int(np.floor((maxy - grid_spec.min_lat) / grid_spec.cell_size)), grid_spec.n_lat - 1)
+        if lon_stop < lon_start or lat_stop < lat_start:
+            continue # Polygon lies outside the grid
+
+        lon_range = np.arange(lon_start, lon_stop + 1)
+        lat_range = np.arange(lat_start, lat_stop + 1)
+        candidate_ids = (lon_range[:, None] * grid_spec.n_lat + lat_range[None, :]).ravel()
+        boxes = grid_spec.cell_polygons(candidate_ids)
+
+        shapely.prepare(geometry)
+        inside = shapely.contains(geometry, boxes)
+        on_boundary = ~inside & shapely.intersects(geometry, boxes)
+
+        cell_fractions = inside.astype('float64')
+        cell_fractions[on_boundary] = shapely.area(shapely.intersection(boxes[on_boundary], geometry)) / cell_area
+
+        keep = cell_fractions > 0
+        rows.append(candidate_ids[keep])
+        cols.append(np.full(keep.sum(), polygon_index))
+        fractions.append(cell_fractions[keep])
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype='int64')
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype='int64')
+    fractions = np.concatenate(fractions) if fractions else np.empty(0)
+    return sparse.csr_matrix((fractions.astype('float32'), (rows, cols)), shape=(grid_spec.n_cells, len(geometries)))
+
+def save_coverage(path, coverage, suburb_keys, grid_spec):
+    """Persists the coverage matrix together with its suburb column order and grid spec."""
+    coverage = coverage.tocsr()
+    np.savez_compressed(
+        path,
+        data=coverage.data, indices=coverage.indices, indptr=coverage.indptr, shape=np.array(coverage.shape),
+        suburb_keys=np.array(suburb_keys, dtype=str),
+        grid_spec=np.array([grid_spec.min_lon, grid_spec.min_lat, grid_spec.cell_size, grid_spec.n_lon, grid_spec.n_lat]),
+    )
+
+def load_coverage(path):
+    """Loads a saved coverage matrix. Returns (coverage, suburb_keys, grid_spec)."""
+    with np.load(path) as saved:
+        coverage = sparse.csr_matrix((saved['data'], saved['indices'], saved['indptr']), shape=tuple(saved['shape']))
+        min_lon, min_lat, cell_size, n_lon, n_lat = saved['grid_spec']
+        return coverage, saved['suburb_keys'].tolist(), GridSpec(min_lon, min_lat, cell_size, int(n_lon), int(n_lat))
+
+def risk_surface(coverage, suburb_values):
+    """
+    Area-weighted mean of a per-suburb value in every cell: one sparse
+    matrix-vector product. Cells not covered by any suburb are 0.
+    """
+    covered_area = np.asarray(coverage.sum(axis=1)).ravel()
+    weighted_sum = coverage @ np.asarray(suburb_values, dtype='float64')
+    return np.divide(weighted_sum, covered_area, out=np.zeros_like(weighted_sum), where=covered_area > 0)
+
+def offence_risk_layer(master_df, coverage, suburb_keys, offence_cols, year_range):
+    """
+    CrimeRisk (0-10) for every grid cell from the incidents of the given offence
+    columns over a range of years: a single sparse matrix-vector product over
+    suburb totals.
+    """
+    period_df = master_df[master_df['Year'].between(*year_range)]
+    suburb_totals = period_df.groupby('Suburb_Clean')[offence_cols].sum().sum(axis=1)
+    return scale_to_risk(risk_surface(coverage, suburb_totals.reindex(suburb_keys, fill_value=0).values))
+
+def scale_to_risk(values):
+    """Rescales a surface to the 0-10 risk scale used across the engine."""
+    peak = np.max(values) if len(values) else 0
+    return values / peak * 10 if peak > 0 else np.zeros_like(values, dtype='float64')
+
+def save_risk_grid(grid_df, path, grid_spec):
+    """Writes the risk grid with its origin, cell size and shape in the Parquet metadata."""
+    table = pa.Table.from_pandas(grid_df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[GRID_METADATA_KEY] = json.dumps(asdict(grid_spec)).encode()
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+
+def _infer_grid_spec(grid_df):
+    """Recovers the grid spec from the cell bounds of a grid written without metadata."""
+    cell_size = round(float(np.median(grid_df['max_lon'] - grid_df['min_lon'])), 9)
+    min_lon, min_lat = float(grid_df['min_lon'].min()), float(grid_df['min_lat'].min())
+    n_lon = int(round((grid_df['min_lon'].max() - min_lon) / cell_size)) + 1
+    n_lat = int(round((grid_df['min_lat'].max() - min_lat) / cell_size)) + 1
+    return GridSpec(min_lon, min_lat, cell_size, n_lon, n_lat)
+
+class RiskGrid:
+    """
+    The risk grid held as dense (n_lon, n_lat) arrays, one per layer. Finding
+    the cell of a coordinate is index arithmetic, so lookups cost the same for
+    a Greater Sydney grid and a statewide one, and whole batches of points
+    are scored in a single vectorized call.
+    """
+
+    def __init__(self, grid_spec, layers):
+        self.grid_spec = grid_spec
+        self.layers = layers
+
+    @classmethod
+    def from_parquet(cls, path):
+        table = pq.read_table(path)
+        grid_df = table.to_pandas()
+        metadata = table.schema.metadata or {}
+        if GRID_METADATA_KEY in metadata:
+            grid_spec = GridSpec(**json.loads(metadata[GRID_METADATA_KEY]))
+        else:
+            grid_spec = _infer_grid_spec(grid_df)
+
+        grid_ids = grid_df['grid_id'].to_numpy()
+        layers = {}
+        for layer in RISK_LAYERS:
+            dense = np.zeros(grid_spec.n_cells, dtype='float32')
+            dense[grid_ids] = grid_df[layer].to_numpy()
+            layers[layer] = dense.reshape(grid_spec.n_lon, grid_spec.n_lat)
+        return cls(grid_spec, layers)
+
+    def lookup(self, lon, lat):
+        """grid_id of each coordinate, -1 where it falls outside the grid."""
+        return self.grid_spec.cell_index(lon, lat)
+
+    def layer_values(self, layer, grid_ids):
+        """Values of a layer for the given cells; NaN for cells outside the grid."""
+        grid_ids = np.asarray(grid_ids)
+        flat = self.layers[layer].ravel() if isinstance(layer, str) else np.asarray(layer).ravel()
+        return np.where(grid_ids >= 0, flat[np.clip(grid_ids, 0, None)], np.nan)
+
+    def score_points(self, lon, lat, crime_layer=None):
+        """
+        Scores any number of points at once. `crime_layer` optionally replaces the
+        stored CrimeRisk with an offence- or year-specific surface indexed by grid_id.
+        Returns a DataFrame with grid_id, CrimeRisk, VenueRisk and BaseRisk columns.
+        """
+        grid_ids = np.atleast_1d(self.lookup(lon, lat))
+        crime_risk = self.layer_values('CrimeRisk' if crime_layer is None else crime_layer, grid_ids)
+        venue_risk = self.layer_values('VenueRisk', grid_ids)
+        return pd.DataFrame({
+            'grid_id': grid_ids,
+            'CrimeRisk': crime_risk,
+            'VenueRisk': venue_risk,
+            'BaseRisk': crime_risk * CRIME_RISK_WEIGHT + venue_risk * VENUE_RISK_WEIGHT,
+        })
+
+def temporal_risk_factors(weekday, hour):
+    """
+    Time-of-week risk periods for any number of local (Australia/Sydney) times.
+    `weekday` follows datetime.weekday() (Monday = 0). Returns boolean arrays for
+    each period plus the total temporal bonus.
+    """
+    weekday = np.asarray(weekday)
+    hour = np.asarray(hour)
+    is_peak_weekend_night = np.isin(weekday, [4, 5]) & ((hour >= 22) | (hour <= 3))
+    is_standard_night = ((hour >= 20) | (hour <= 4)) & ~is_peak_weekend_night
+    is_evening_rush = (hour >= 16) & (hour < 19)
+
+    bonus = np.where(is_peak_weekend_night, PEAK_WEEKEND_NIGHT_BONUS, np.where(is_standard_night, LATE_NIGHT_BONUS, 0.0))
+    bonus = bonus + np.where(is_evening_rush, EVENING_RUSH_BONUS, 0.0)
+    return {
+        'is_peak_weekend_night': is_peak_weekend_night,
+        'is_standard_night': is_standard_night,
+        'is_evening_rush': is_evening_rush,
+        'bonus': bonus,
+    }
+
+def apply_temporal_bonus(base_risk, temporal_bonus):
+    """Final risk score: base risk plus temporal bonus, capped at 10."""
+    return np.minimum(np.asarray(base_risk) + temporal_bonus, MAX_RISK_SCORE)
+
+def risk_band(risk_score):
+    """'High', 'Moderate' or 'Low' for each score."""
+    risk_score = np.asarray(risk_score)
+    return np.select([risk_score > HIGH_RISK_THRESHOLD, risk_score > MODERATE_RISK_THRESHOLD], ['High', 'Moderate'], 'Low')
@@ -0,0 +1,101 @@
+# src/suburb_topology.py
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+LOD_MANIFEST_FILE = 'nsw_suburbs_lod.json'
+TILE_SIZE = 256 # Web-map tile size in pixels, used to turn a zoom level into a ground extent
+
+def view_bounds(center_lat, center_lon, zoom, width_px=1200, height_px=700, padding=0.25):
+    """Approximate (min_lon, min_lat, max_lon, max_lat) visible on a Web Mercator map, padded on each side."""
+    degrees_per_px = 360 / (TILE_SIZE * 2 ** zoom)
+    half_width = width_px / 2 * degrees_per_px * (1 + padding)
+    half_height = height_px / 2 * degrees_per_px * math.cos(math.radians(center_lat)) * (1 + padding)
+    return (center_lon - half_width, center_lat - half_height, center_lon + half_width, center_lat + half_height)
+
+class TopologyLevel:
+    """
+    One simplification level of the suburb boundaries in TopoJSON form.
+    Arcs are delta-decoded and de-quantized once when the level is loaded;
+    features are only assembled into GeoJSON when asked for.
+    """
+
+    def __init__(self, topology, min_zoom):
+        self.min_zoom = min_zoom
+        transform = topology.get('transform')
+        self.arcs = []
+        for arc in topology['arcs']:
+            points = np.asarray(arc, dtype='float64')
+            if transform is not None:
+                points = np.cumsum(points, axis=0) * transform['scale'] + transform['translate']
+            self.arcs.append(points)
+
+        self.geometries = next(iter(topology['objects'].values()))['geometries']
+        self.properties = [geometry.get('properties', {}) for geometry in self.geometries]
+        self.bounds = np.array([[p['min_lon'], p['min_lat'], p['max_lon'], p['max_lat']] for p in self.properties]).reshape(-1, 4)
+
+    def _ring(self, arc_indices):
+        parts = []
+        for i, index in enumerate(arc_indices):
+            points = self.arcs[index] if index >= 0 else self.arcs[~index][::-1]
+            # Consecutive arcs share their joining point.
+            parts.append(points if i == 0 else points[1:])
+        return np.concatenate(parts).tolist()
+
+    def _geometry(self, geometry):
+        if geometry['type'] == 'Polygon':
+            return {'type': 'Polygon', 'coordinates': [self._ring(ring) for ring in geometry['arcs']]}
+        if geometry['type'] == 'MultiPolygon':
+            return {'type': 'MultiPolygon', 'coordinates': [[self._ring(ring) for ring in polygon] for polygon in geometry['arcs']]}
+        return None
+
+    def intersecting(self, bounds):
+        """Positions of the features whose bounding box overlaps (min_lon, min_lat, max_lon, max_lat)."""
+        min_lon, min_lat, max_lon, max_lat = bounds
+        overlaps = (
+            (self.bounds[:, 0] <= max_lon) & (self.bounds[:, 2] >= min_lon) &
+            (self.bounds[:, 1] <= max_lat) & (self.bounds[:, 3] >= min_lat)
+        )
+        return np.flatnonzero(overlaps)
+
+    def to_geojson(self, bounds=None):
+        """A GeoJSON FeatureCollection of the features in view (all features if bounds is None)."""
+        positions = range(len(self.geometries)) if bounds is None else self.intersecting(bounds)
+        features = []
+        for i in positions:
+            geometry = self._geometry(self.geometries[i])
+            if geometry is not None:
+                features.append({'type': 'Feature', 'properties': self.properties[i], 'geometry': geometry})
+        return {'type': 'FeatureCollection', 'features': features}
+
+class SuburbTopology:
+    """The level-of-detail set written by convert_shapefile.py, described by its JSON manifest."""
+
+    def __init__(self, levels):
+        self.levels = sorted(levels, key=lambda level: level.min_zoom)
+
+    @classmethod
+    def from_manifest(cls, manifest_path=LOD_MANIFEST_FILE):
+        manifest_path = Path(manifest_path)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        levels = []
+        for level in manifest['levels']:
+            with open(manifest_path.parent / level['file']) as f:
+                levels.append(TopologyLevel(json.load(f), level['min_zoom']))
+        return cls(levels)
+
+    def level_for_zoom(self, zoom):
+        """The most detailed level whose minimum zoom is at or below `zoom`."""
+        eligible = [level for level in self.levels if level.min_zoom <= zoom]
+        return eligible[-1] if eligible else self.levels[0]
+
+    def centroid(self, suburb_name):
+        """(lat, lon) of a suburb from the feature properties, or None."""
+        for properties in self.levels[0].properties:
+            if properties['suburb_name'] == suburb_name:
+                return properties['centroid_lat'], properties['centroid_lon']
+        return None
@@ -4,6 +4,13 @@ import pandas as pd
 import streamlit as st
 from pathlib import Path
 import json
+import urllib.request
+from src.analytics import CrimeTensor
+from src.crime_index import KeyedCrimeTable
+from src.crime_network import CrimeNetworkStore
+from src.monthly_cube import MONTHLY_CUBE_FILE, MONTHLY_CUBE_INDEX_FILE, MonthlyCube
+from src.suburb_topology import LOD_MANIFEST_FILE, SuburbTopology
+from src.vector_tiles import TILE_SERVER_URL
 
 @st.cache_data
 def load_master_data():
@@ -16,6 +23,17 @@ def load_master_data():
         st.exception(e)
         return pd.DataFrame()
 
+@st.cache_resource
+def load_crime_tensor():
+    """
+    The master dataset as a shared CrimeTensor. Cached as a resource, so every
+    session and page reads the same arrays instead of a per-call copy.
+    """
+    master_df = load_master_data()
+    if master_df.empty:
+        return None
+    return CrimeTensor.from_master(master_df)
+
 @st.cache_data
 def load_geojson_data():
     """Loads the GeoJSON file as a standard dictionary."""
@@ -28,13 +46,139 @@ def load_geojson_data():
         st.exception(e)
         return None
 
+@st.cache_resource
+def load_suburb_topology():
+    """
+    Loads the level-of-detail TopoJSON boundaries (see convert_shapefile.py).
+    Returns None if they have not been generated yet.
+    """
+    project_root = Path(__file__).parent.parent
+    try:
+        return SuburbTopology.from_manifest(project_root / LOD_MANIFEST_FILE)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.exception(e)
+        return None
+
 @st.cache_data
-def load_processed_crime_data():
-    """Loads the processed crime Parquet file (monthly data)."""
+def load_processed_crime_data(suburbs=None, offence_categories=None, start_date=None, end_date=None):
+    """
+    Loads the processed crime Parquet file (monthly data).
+
+    Any of the optional filters are pushed down to the Parquet reader, which
+    uses the row-group min/max statistics to skip groups that cannot match.
+    """
     project_root = Path(__file__).parent.parent
     data_file_path = project_root / "crime_data_processed.parquet"
+
+    filters = []
+    if suburbs is not None:
+        filters.append(('Suburb', 'in', list(suburbs)))
+    if offence_categories is not None:
+        filters.append(('OffenceCategory', 'in', list(offence_categories)))
+    if start_date is not None:
+        filters.append(('Date', '>=', pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append(('Date', '<=', pd.Timestamp(end_date)))
+
+    try:
+        return pd.read_parquet(data_file_path, filters=filters or None)
+    except Exception as e:
+        st.exception(e)
+        return pd.DataFrame()
+
+@st.cache_resource
+def load_keyed_crime_data():
+    """
+    The processed crime data with its (Suburb, OffenceCategory) row-range index.
+    Shared across sessions, so selecting one series slices the cached table
+    instead of copying and scanning it on every rerun.
+    """
+    project_root = Path(__file__).parent.parent
+    try:
+        return KeyedCrimeTable.from_parquet(project_root / "crime_data_processed.parquet")
+    except Exception as e:
+        st.exception(e)
+        return None
+
+@st.cache_resource
+def load_monthly_cube():
+    """
+    Opens the memory-mapped monthly cube (see precompute_monthly_cube.py).
+    Every session shares the one mapping; returns None if it has not been built.
+    """
+    project_root = Path(__file__).parent.parent
+    try:
+        return MonthlyCube.open(project_root / MONTHLY_CUBE_FILE, project_root / MONTHLY_CUBE_INDEX_FILE)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.exception(e)
+        return None
+
+@st.cache_resource
+def load_forecasts():
+    """
+    Loads the precomputed forecast store (see precompute_forecasts.py), indexed
+    by (Suburb, Offence) so one series is a sorted-index lookup.
+    """
+    project_root = Path(__file__).parent.parent
+    data_file_path = project_root / "forecasts.parquet"
+    try:
+        return pd.read_parquet(data_file_path).set_index(['Suburb', 'Offence']).sort_index()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.exception(e)
+        return None
+
+@st.cache_data
+def load_correlation_store():
+    """Loads the precomputed correlation store (see precompute_correlations.py)."""
+    project_root = Path(__file__).parent.parent
+    data_file_path = project_root / "correlations.parquet"
+    try:
+        return pd.read_parquet(data_file_path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.exception(e)
+        return None
+
+@st.cache_resource
+def load_crime_network():
+    """Loads the precomputed co-occurrence edges and layouts (see precompute_crime_network.py)."""
+    project_root = Path(__file__).parent.parent
+    try:
+        return CrimeNetworkStore.from_parquet(project_root / "crime_network_edges.parquet", project_root / "crime_network_layouts.parquet")
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        st.exception(e)
+        return None
+
+@st.cache_data
+def load_anomaly_scores():
+    """Loads the precomputed anomaly store (see precompute_anomalies.py)."""
+    project_root = Path(__file__).parent.parent
+    data_file_path = project_root / "anomaly_scores.parquet"
     try:
         return pd.read_parquet(data_file_path)
+    except FileNotFoundError:
+        return None
     except Exception as e:
         st.exception(e)
-        return pd.DataFrame()
\ No newline at end of file
+        return None
+
+@st.cache_data(ttl=30)
+def tile_server_url():
+    """
+    Base URL of the local vector tile server (tile_server.py), or None if it
+    is not running. Re-checked every 30 seconds.
+    """
+    try:
+        with urllib.request.urlopen(f"{TILE_SERVER_URL}/health", timeout=0.5) as response:
+            return TILE_SERVER_URL if response.status == 200 else None
+    except OSError:
+        return None
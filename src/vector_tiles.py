@@ -0,0 +1,215 @@
+# src/vector_tiles.py
+
+import gzip
+import json
+import math
+import os
+import sqlite3
+import threading
+from urllib.parse import urlencode
+
+import mapbox_vector_tile
+import numpy as np
+import shapely
+from mapbox_vector_tile.Mapbox import vector_tile_pb2
+
+SUBURB_TILES_FILE = 'suburb_tiles.mbtiles'
+RISK_GRID_TILES_FILE = 'risk_grid_tiles.mbtiles'
+SUBURB_LAYER = 'suburbs'
+RISK_GRID_LAYER = 'risk_grid'
+TILE_SERVER_PORT = 8765
+TILE_SERVER_URL = os.environ.get('TILE_SERVER_URL', f'http://127.0.0.1:{TILE_SERVER_PORT}')
+TILE_EXTENT = 4096 # Integer coordinate range inside one vector tile
+TILE_BUFFER = 64 # Extra tile units kept around each tile so polygon edges do not show seams
+STYLED_TILE_GZIP_LEVEL = 6 # Styled tiles are compressed per request; level 9 is ~6x slower for ~1% smaller tiles
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS # Half the width of the Web Mercator plane in metres
+
+# Viridis stops used to colour styled tiles, from low (0) to high (1).
+VIRIDIS = np.array([
+    [68, 1, 84], [72, 40, 120], [62, 74, 137], [49, 104, 142], [38, 130, 142],
+    [31, 158, 137], [53, 183, 121], [109, 205, 89], [180, 222, 44], [253, 231, 37],
+], dtype='float64')
+
+def to_web_mercator(geometries):
+    """Projects shapely geometries from lon/lat (EPSG:4326) to Web Mercator metres (EPSG:3857)."""
+    def project(coords):
+        lon = np.radians(coords[:, 0])
+        lat = np.radians(np.clip(coords[:, 1], -85.0511, 85.0511))
+        return np.column_stack([EARTH_RADIUS * lon, EARTH_RADIUS * np.log(np.tan(np.pi / 4 + lat / 2))])
+    return shapely.transform(geometries, project)
+
+def tile_size(zoom):
+    """Width of one tile at `zoom` in Web Mercator metres."""
+    return 2 * ORIGIN_SHIFT / 2 ** zoom
+
+def tile_bounds(zoom, x, y):
+    """(min_x, min_y, max_x, max_y) of tile z/x/y in Web Mercator metres (XYZ scheme, y down)."""
+    size = tile_size(zoom)
+    min_x = -ORIGIN_SHIFT + x * size
+    max_y = ORIGIN_SHIFT - y * size
+    return min_x, max_y - size, min_x + size, max_y
+
+def tile_ranges(bounds, zoom):
+    """Inclusive x and y tile index ranges covering each (min_x, min_y, max_x, max_y) row of `bounds`."""
+    size = tile_size(zoom)
+    last = 2 ** zoom - 1
+    x_start = np.clip(np.floor((bounds[:, 0] + ORIGIN_SHIFT) / size), 0, last).astype('int64')
+    x_stop = np.clip(np.floor((bounds[:, 2] + ORIGIN_SHIFT) / size), 0, last).astype('int64')
+    y_start = np.clip(np.floor((ORIGIN_SHIFT - bounds[:, 3]) / size), 0, last).astype('int64')
+    y_stop = np.clip(np.floor((ORIGIN_SHIFT - bounds[:, 1]) / size), 0, last).astype('int64')
+    return x_start, x_stop, y_start, y_stop
+
+def features_by_tile(bounds, zoom):
+    """
+    Groups features by the tiles their bounding boxes touch at `zoom`.
+    Returns {(x, y): array of feature positions}.
+    """
+    x_start, x_stop, y_start, y_stop = tile_ranges(np.asarray(bounds).reshape(-1, 4), zoom)
+    width = x_stop - x_start + 1
+    counts = width * (y_stop - y_start + 1)
+    if counts.sum() == 0:
+        return {}
+    # One (feature, tile) pair per tile under each bounding box, without a per-feature loop.
+    positions = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    xs = x_start[positions] + offsets % width[positions]
+    ys = y_start[positions] + offsets // width[positions]
+    order = np.lexsort((positions, ys, xs))
+    positions, xs, ys = positions[order], xs[order], ys[order]
+    starts = np.flatnonzero(np.r_[True, (np.diff(xs) != 0) | (np.diff(ys) != 0)])
+    stops = np.r_[starts[1:], len(positions)]
+    return {(int(xs[start]), int(ys[start])): positions[start:stop] for start, stop in zip(starts, stops)}
+
+def encode_tile(layer_name, geometries, ids, properties, zoom, x, y):
+    """
+    Clips Web Mercator geometries to tile z/x/y (plus a small buffer) and
+    encodes them as one gzipped Mapbox Vector Tile layer. Returns None when
+    nothing is left inside the tile.
+    """
+    bounds = tile_bounds(zoom, x, y)
+    buffer = tile_size(zoom) * TILE_BUFFER / TILE_EXTENT
+    clipped = shapely.clip_by_rect(geometries, bounds[0] - buffer, bounds[1] - buffer, bounds[2] + buffer, bounds[3] + buffer)
+    keep = ~shapely.is_empty(clipped)
+    if not keep.any():
+        return None
+    # Scale into tile units in one vectorized call rather than letting the encoder
+    # transform each feature's coordinates in Python.
+    scale = TILE_EXTENT / tile_size(zoom)
+    tile_geometries = shapely.transform(clipped[keep], lambda coords: (coords - (bounds[0], bounds[1])) * scale)
+    features = [
+        {'geometry': geometry, 'id': int(feature_id), 'properties': feature_properties}
+        for geometry, feature_id, feature_properties in zip(tile_geometries, np.asarray(ids)[keep], np.asarray(properties, dtype=object)[keep])
+    ]
+    tile = mapbox_vector_tile.encode([{'name': layer_name, 'features': features}], default_options={'extents': TILE_EXTENT})
+    return gzip.compress(tile)
+
+def tile_url(base_url, tileset, **style):
+    """deck.gl URL template for a tile set, with the style query the server joins onto each tile."""
+    query = f"?{urlencode(style)}" if style else ''
+    return f"{base_url}/{tileset}/{{z}}/{{x}}/{{y}}.pbf{query}"
+
+def style_tile(tile_data, values, scale_max):
+    """
+    Joins styling data onto a stored tile by feature ID: every feature gets its
+    `value` and a Viridis fill colour (r, g, b) scaled against `scale_max`.
+    Features whose value is missing are dropped. Returns gzipped tile bytes.
+
+    Works on the tile's protobuf message directly, so the stored geometry is
+    copied through as encoded commands and only the property tags are written.
+    """
+    tile = vector_tile_pb2.tile()
+    tile.ParseFromString(gzip.decompress(tile_data))
+    styled = vector_tile_pb2.tile()
+    for layer in tile.layers:
+        ids = np.fromiter((feature.id for feature in layer.features), dtype='int64', count=len(layer.features))
+        feature_values = np.full(len(ids), np.nan)
+        in_range = (ids >= 0) & (ids < len(values))
+        feature_values[in_range] = values[ids[in_range]]
+        keep = np.flatnonzero(~np.isnan(feature_values))
+
+        styled_layer = styled.layers.add()
+        styled_layer.version, styled_layer.name, styled_layer.extent = layer.version, layer.name, layer.extent
+        styled_layer.keys.extend([*layer.keys, 'value', 'r', 'g', 'b'])
+        styled_layer.values.extend(layer.values)
+        if len(keep) == 0:
+            continue
+
+        # Distinct values and colour channels go into the layer's value table once;
+        # each feature's new tags point into it.
+        rounded, value_index = np.unique(np.round(feature_values[keep], 3), return_inverse=True)
+        colours = viridis(feature_values[keep] / scale_max if scale_max > 0 else np.zeros(len(keep)))
+        channels, channel_index = np.unique(colours, return_inverse=True)
+        offset = len(layer.values)
+        for value in rounded:
+            styled_layer.values.add().double_value = float(value)
+        for channel in channels:
+            styled_layer.values.add().int_value = int(channel)
+
+        key_index = len(layer.keys)
+        tags = np.empty((len(keep), 8), dtype='int64')
+        tags[:, 0::2] = np.arange(key_index, key_index + 4)
+        tags[:, 1] = offset + value_index
+        tags[:, 3::2] = offset + len(rounded) + channel_index.reshape(colours.shape)
+        styled_layer.features.extend(layer.features[position] for position in keep)
+        for feature, feature_tags in zip(styled_layer.features, tags.tolist()):
+            feature.tags.extend(feature_tags)
+    return gzip.compress(styled.SerializeToString(), compresslevel=STYLED_TILE_GZIP_LEVEL)
+
+def viridis(fractions):
+    """(n, 3) integer (r, g, b) rows for fractions in [0, 1], interpolated between the Viridis stops."""
+    positions = np.clip(np.asarray(fractions, dtype='float64'), 0.0, 1.0) * (len(VIRIDIS) - 1)
+    stops = np.arange(len(VIRIDIS))
+    colours = np.column_stack([np.interp(positions, stops, VIRIDIS[:, channel]) for channel in range(3)])
+    return np.rint(colours).astype('int64')
+
+class MBTiles:
+    """
+    An MBTiles 1.3 store: one SQLite file holding gzipped vector tiles and a
+    metadata table. Rows use the TMS scheme (y up), so reads and writes flip
+    the XYZ row used by web maps.
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode == 'r' and not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        if mode == 'w':
+            self.connection.executescript("""
+                DROP TABLE IF EXISTS tiles;
+                DROP TABLE IF EXISTS metadata;
+                CREATE TABLE metadata (name TEXT, value TEXT);
+                CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+                CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+            """)
+
+    def write_metadata(self, metadata):
+        rows = [(name, value if isinstance(value, str) else json.dumps(value)) for name, value in metadata.items()]
+        with self.lock:
+            self.connection.executemany("INSERT INTO metadata (name, value) VALUES (?, ?)", rows)
+            self.connection.commit()
+
+    def metadata(self):
+        with self.lock:
+            return dict(self.connection.execute("SELECT name, value FROM metadata").fetchall())
+
+    def write_tiles(self, tiles):
+        """Inserts an iterable of (zoom, x, y, tile_data)."""
+        rows = [(zoom, x, 2 ** zoom - 1 - y, sqlite3.Binary(data)) for zoom, x, y, data in tiles]
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)", rows)
+            self.connection.commit()
+
+    def read_tile(self, zoom, x, y):
+        """Gzipped tile bytes for XYZ tile z/x/y, or None if the tile is empty."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, x, 2 ** zoom - 1 - y),
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,135 @@
+# tile_server.py
+
+import argparse
+import json
+import re
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+from src.analytics import CrimeTensor, get_crime_columns
+from src.risk_grid import CRIME_RISK_WEIGHT, MAX_RISK_SCORE, VENUE_RISK_WEIGHT, RiskGrid, load_coverage, offence_risk_layer
+from src.vector_tiles import (RISK_GRID_LAYER, RISK_GRID_TILES_FILE, SUBURB_LAYER, SUBURB_TILES_FILE, TILE_SERVER_PORT,
+                              MBTiles, style_tile)
+
+MASTER_FILE = 'master_analytics_data.parquet'
+RISK_GRID_FILE = 'risk_grid.parquet'
+COVERAGE_FILE = 'risk_coverage.npz'
+ALL_OFFENCES = "All offences"
+TILE_CACHE_SIZE = 4096 # Stored tiles kept in memory
+STYLED_TILE_CACHE_SIZE = 4096 # Tiles with styling data joined on
+STYLE_CACHE_SIZE = 32 # Per-feature value arrays, one per distinct query
+TILE_PATH = re.compile(r'^/(?P<tileset>\w+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.pbf$')
+
+class TileService:
+    """
+    Serves the MBTiles written by build_tiles.py. Stored tiles and styled
+    tiles sit in LRU caches; styling joins per-feature values onto a stored
+    tile by feature ID, so one tile set serves every offence, year and layer.
+    """
+
+    def __init__(self, suburb_tiles_path=SUBURB_TILES_FILE, risk_grid_tiles_path=RISK_GRID_TILES_FILE):
+        self.stores = {SUBURB_LAYER: MBTiles(suburb_tiles_path), RISK_GRID_LAYER: MBTiles(risk_grid_tiles_path)}
+        self.suburb_ids = json.loads(self.stores[SUBURB_LAYER].metadata()['feature_ids'])
+
+        self.master_df = pd.read_parquet(MASTER_FILE)
+        self.crime_tensor = CrimeTensor.from_master(self.master_df)
+        self.risk_grid = RiskGrid.from_parquet(RISK_GRID_FILE)
+        try:
+            self.coverage, self.coverage_keys, _ = load_coverage(COVERAGE_FILE)
+        except FileNotFoundError:
+            self.coverage = None
+
+        self.raw_tile = lru_cache(maxsize=TILE_CACHE_SIZE)(self._raw_tile)
+        self.styled_tile = lru_cache(maxsize=STYLED_TILE_CACHE_SIZE)(self._styled_tile)
+        self.style_values = lru_cache(maxsize=STYLE_CACHE_SIZE)(self._style_values)
+
+    def _raw_tile(self, tileset, z, x, y):
+        return self.stores[tileset].read_tile(z, x, y)
+
+    def _style_values(self, tileset, style):
+        """(values indexed by feature ID, colour scale maximum) for one style query."""
+        params = dict(style)
+        if tileset == SUBURB_LAYER:
+            offence, year = params['offence'], int(params['year'])
+            year_df = self.crime_tensor.year_frame(year, [offence])
+            incidents = year_df.groupby('Suburb_Clean')[offence].sum()
+            values = incidents.reindex(self.suburb_ids).to_numpy(dtype='float64')
+            return values, np.nanmax(values) if np.isfinite(values).any() else 0.0
+
+        layers = {'VenueRisk': self.risk_grid.layers['VenueRisk'].ravel()}
+        offence = params.get('offence', ALL_OFFENCES)
+        if self.coverage is not None and ('start' in params or offence != ALL_OFFENCES):
+            offence_cols = get_crime_columns(self.master_df) if offence == ALL_OFFENCES else [offence]
+            year_range = (int(params.get('start', self.master_df['Year'].min())), int(params.get('end', self.master_df['Year'].max())))
+            layers['CrimeRisk'] = offence_risk_layer(self.master_df, self.coverage, self.coverage_keys, offence_cols, year_range)
+        else:
+            layers['CrimeRisk'] = self.risk_grid.layers['CrimeRisk'].ravel()
+        layers['BaseRisk'] = layers['CrimeRisk'] * CRIME_RISK_WEIGHT + layers['VenueRisk'] * VENUE_RISK_WEIGHT
+        return np.asarray(layers[params.get('layer', 'BaseRisk')], dtype='float64'), MAX_RISK_SCORE
+
+    def _styled_tile(self, tileset, z, x, y, style):
+        tile_data = self.raw_tile(tileset, z, x, y)
+        if tile_data is None or not style:
+            return tile_data
+        values, scale_max = self.style_values(tileset, style)
+        return style_tile(tile_data, values, scale_max)
+
+    def cache_stats(self):
+        return {name: cache.cache_info()._asdict() for name, cache in
+                [('tiles', self.raw_tile), ('styled_tiles', self.styled_tile), ('styles', self.style_values)]}
+
+def make_handler(service):
+    class TileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/health':
+                return self.respond(200, b'ok', 'text/plain')
+            if url.path == '/stats':
+                return self.respond(200, json.dumps(service.cache_stats()).encode(), 'application/json')
+
+            match = TILE_PATH.match(url.path)
+            if match is None or match['tileset'] not in service.stores:
+                return self.respond(404, b'Unknown tile path', 'text/plain')
+            # Sorted query pairs make the style part of the cache key.
+            style = tuple(sorted((key, values[0]) for key, values in parse_qs(url.query).items()))
+            try:
+                tile_data = service.styled_tile(match['tileset'], int(match['z']), int(match['x']), int(match['y']), style)
+            except (KeyError, ValueError) as e:
+                return self.respond(400, f"Bad style query: {e}".encode(), 'text/plain')
+            if tile_data is None:
+                return self.respond(204, b'', 'application/vnd.mapbox-vector-tile')
+            self.respond(200, tile_data, 'application/vnd.mapbox-vector-tile', gzipped=True)
+
+        def respond(self, status, body, content_type, gzipped=False):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Cache-Control', 'public, max-age=3600')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Tile requests are too frequent to log one line each
+
+    return TileHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the suburb and risk grid vector tiles to the app's maps.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=TILE_SERVER_PORT)
+    args = parser.parse_args()
+
+    print("--- Loading tiles and styling data ---")
+    service = TileService()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"✅ Serving vector tiles on http://{args.host}:{args.port}/{{suburbs,risk_grid}}/{{z}}/{{x}}/{{y}}.pbf (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()